@@ -0,0 +1,251 @@
+import os
+import re
+import json
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+def _trie_pattern(node: dict) -> str:
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:  # a word ends here, so the rest is optional
+        body = (f"(?:{body})" if len(branches) == 1 else body) + "?"
+    return body
+
+
+class CompiledBlocklist:
+    """A fixed set of blocked words and one regex that finds any of them in a message.
+
+    The regex follows a prefix trie of the (lowercased) words, so a search costs about
+    the length of the message rather than the number of words; membership is a set lookup.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._original = {}  # {lowercased: as entered}
+        for word in words:
+            if word and word.lower() not in self._original:
+                self._original[word.lower()] = word
+        trie = {}
+        for word in self._original:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = True
+        self._pattern = re.compile(_trie_pattern(trie)) if trie else None
+
+    def __len__(self):
+        return len(self._original)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._original
+
+    def __iter__(self):
+        return iter(self._original.values())
+
+    def first(self, content: str, skip=frozenset()) -> Optional[str]:
+        """The first listed word found in `content` (already lowercased), ignoring `skip`."""
+        if self._pattern is None:
+            return None
+        pos = 0
+        while True:
+            m = self._pattern.search(content, pos)
+            if m is None:
+                return None
+            word = m.group()
+            if word not in skip:
+                return self._original[word]
+            # the longest word here is exempt: a shorter one may start at the same place,
+            # or another one inside it, which searching again from the next character finds
+            for end in range(len(word) - 1, 0, -1):
+                if word[:end] in self._original and word[:end] not in skip:
+                    return self._original[word[:end]]
+            pos = m.start() + 1
+
+
+def read_words(path: str) -> List[str]:
+    """One word or phrase per line; blank lines and lines starting with # are ignored."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+class BlacklistFiles:
+    """Each guild's own words and exemptions in `<directory>/<guild_id>.json`, read when asked for.
+
+    A file holds a plain list of words, or {"words": [...], "exempt": [...]} once the guild
+    turned some global words off. A change rewrites only that guild's file, atomically.
+    A legacy single blacklist.json ({guild_id: entry}) is split into these files once,
+    leaving out the words `drop` accepts (copies of global words), and renamed to .migrated.
+    """
+
+    def __init__(self, directory: str, legacy_path: Optional[str] = None,
+                 drop: Callable[[str], bool] = lambda word: False):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        if legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path, drop)
+
+    def _path(self, guild_id) -> str:
+        gkey = str(guild_id)
+        if not gkey.isdigit():
+            raise ValueError(f"invalid guild id {gkey!r}")
+        return os.path.join(self.directory, gkey + ".json")
+
+    @staticmethod
+    def entry(data) -> Tuple[list, list]:
+        """(added words, exempt global words) from a stored entry."""
+        if isinstance(data, dict):
+            return list(data.get("words", [])), list(data.get("exempt", []))
+        return list(data) if isinstance(data, list) else [], []
+
+    def load(self, guild_id) -> Tuple[list, list]:
+        try:
+            with open(self._path(guild_id), "r", encoding="utf-8") as f:
+                return self.entry(json.load(f))
+        except FileNotFoundError:
+            return [], []
+        except (OSError, ValueError) as e:
+            print(f"Warning: invalid blacklist file for guild {guild_id} ({e}) — ignored.")
+            return [], []
+
+    def save(self, guild_id, words: Iterable[str], exempt: Iterable[str] = ()):
+        words, exempt = list(words), list(exempt)
+        path = self._path(guild_id)
+        if not words and not exempt:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"words": words, "exempt": exempt} if exempt else words, f, indent=2)
+        os.replace(tmp, path)
+
+    def guild_ids(self) -> List[str]:
+        return sorted(name[:-5] for name in os.listdir(self.directory)
+                      if name.endswith(".json") and name[:-5].isdigit())
+
+    def _migrate(self, legacy_path: str, drop: Callable[[str], bool]):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not migrate {legacy_path}: {e}")
+            return
+        moved = dropped = 0
+        for gkey, data in (legacy.items() if isinstance(legacy, dict) else ()):
+            if not str(gkey).isdigit():
+                continue  # placeholder keys from the .template file
+            words, exempt = self.entry(data)
+            kept = [w for w in words if w and not drop(w)]
+            dropped += len(words) - len(kept)
+            if (kept or exempt) and not os.path.exists(self._path(gkey)):
+                self.save(gkey, kept, exempt)
+                moved += 1
+        os.replace(legacy_path, legacy_path + ".migrated")
+        print(f"Migrated blacklists for {moved} guild(s) from {legacy_path} into {self.directory} "
+              f"({dropped} copies of global words left out)")
+
+
+class _GuildDelta:
+    __slots__ = ("added", "exempt")
+
+    def __init__(self, added: CompiledBlocklist, exempt: set):
+        self.added = added
+        self.exempt = exempt  # lowercased global words this guild turned off
+
+
+class LayeredBlocklist:
+    """A global blocklist shared by every guild, plus each guild's own additions and exemptions.
+
+    The global tier is compiled once and only referenced by guilds, so its memory and
+    compile cost don't grow with the number of guilds. A guild's delta is read through
+    `loader(guild_id) -> (added words, exempt words)` the first time it's needed;
+    callers persist changes themselves and call `invalidate()` when storage changes
+    underneath (e.g. another process edited it).
+    """
+
+    def __init__(self, global_words: Iterable[str] = (),
+                 loader: Optional[Callable[[int], Tuple[Iterable[str], Iterable[str]]]] = None):
+        self.loader = loader
+        self.global_tier = CompiledBlocklist(global_words)
+        self._guilds = {}  # {guild_id: _GuildDelta}
+
+    def set_global(self, words: Iterable[str]):
+        self.global_tier = CompiledBlocklist(words)
+        self._guilds.clear()  # additions that just became global are dropped on reload
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(int(guild_id), None)
+
+    def clear(self):
+        self._guilds.clear()
+
+    def is_loaded(self, guild_id) -> bool:
+        return int(guild_id) in self._guilds
+
+    def prime(self, guild_id, added: Iterable[str], exempt: Iterable[str]):
+        """Set a guild's delta from words read elsewhere (e.g. off the event loop), skipping the loader."""
+        # words a guild copied from the shared list need no entry of their own
+        added = [w for w in added if w and w not in self.global_tier]
+        self._guilds[int(guild_id)] = _GuildDelta(CompiledBlocklist(added), {w.lower() for w in exempt if w})
+
+    def _delta(self, guild_id) -> _GuildDelta:
+        gid = int(guild_id)
+        delta = self._guilds.get(gid)
+        if delta is None:
+            self.prime(gid, *(self.loader(gid) if self.loader else ((), ())))
+            delta = self._guilds[gid]
+        return delta
+
+    # ---------- reading ----------
+    def match(self, guild_id, content: str) -> Optional[str]:
+        """The blocked word found in `content`, if any (global words first)."""
+        delta = self._delta(guild_id)
+        content = content.lower()
+        return self.global_tier.first(content, delta.exempt) or delta.added.first(content)
+
+    def added(self, guild_id) -> List[str]:
+        return list(self._delta(guild_id).added)
+
+    def exemptions(self, guild_id) -> List[str]:
+        return sorted(self._delta(guild_id).exempt)
+
+    def words(self, guild_id) -> List[str]:
+        """Every word in effect for the guild. Builds a new list, so keep it off hot paths."""
+        delta = self._delta(guild_id)
+        return [w for w in self.global_tier if w.lower() not in delta.exempt] + list(delta.added)
+
+    # ---------- writing (the caller persists the change) ----------
+    def add(self, guild_id, word: str) -> Optional[str]:
+        """"added", "unexempted" for a global word the guild had turned off, or None if already blocked."""
+        delta = self._delta(guild_id)
+        key = word.lower()
+        if key in self.global_tier:
+            if key not in delta.exempt:
+                return None
+            delta.exempt.discard(key)
+            return "unexempted"
+        if word in delta.added:
+            return None
+        delta.added = CompiledBlocklist([*delta.added, word])
+        return "added"
+
+    def remove(self, guild_id, word: str) -> Optional[str]:
+        """"removed" for a guild word, "exempted" for a global one, or None if not blocked."""
+        delta = self._delta(guild_id)
+        key = word.lower()
+        if word in delta.added:
+            delta.added = CompiledBlocklist(w for w in delta.added if w.lower() != key)
+            return "removed"
+        if key in self.global_tier and key not in delta.exempt:
+            delta.exempt.add(key)
+            return "exempted"
+        return None
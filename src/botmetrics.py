@@ -0,0 +1,197 @@
+import time
+import bisect
+import inspect
+import functools
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Latency buckets in seconds, from sub-millisecond handler work up to slow REST calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value: float, **labels):
+        self._values[_label_key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Sample `fn` at scrape time instead of storing a value (used for queue depths)."""
+        self._functions[_label_key(labels)] = fn
+
+    def value(self, **labels) -> float:
+        key = _label_key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def render(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+        for key, fn in self._functions.items():
+            try:
+                value = fn()
+            except Exception:
+                continue
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {label_key: [per-bucket counts (+Inf last), sum, count]}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        return series[1] if series else 0.0
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        for key, (counts, total, n) in self._series.items():
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                yield f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {n}"
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, cls, name, doc, **kwargs):
+        existing = self._metrics.get(name)
+        if existing is not None:
+            if not isinstance(existing, cls):
+                raise ValueError(f"metric {name} already registered as {existing.kind}")
+            return existing
+        metric = self._metrics[name] = cls(name, doc, **kwargs)
+        return metric
+
+    def counter(self, name: str, doc: str) -> Counter:
+        return self._register(Counter, name, doc)
+
+    def gauge(self, name: str, doc: str) -> Gauge:
+        return self._register(Gauge, name, doc)
+
+    def histogram(self, name: str, doc: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, doc, buckets=buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator recording the duration of a function or coroutine function in `histogram`."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def start_metrics_server(host: str, port: int, registry: Optional[Registry] = None):
+    """Serve `GET /metrics` on host:port. Returns the aiohttp runner (call `cleanup()` to stop)."""
+    from aiohttp import web  # aiohttp ships with discord.py
+
+    registry = registry or REGISTRY
+
+    async def handle(request):
+        return web.Response(body=registry.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
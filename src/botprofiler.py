@@ -0,0 +1,148 @@
+import os
+import sys
+import asyncio
+import time
+import inspect
+import threading
+import functools
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Optional
+
+# Frames from these files are treated as "our" code when attributing samples to handlers;
+# the instrumentation wrappers themselves are skipped so samples land on the real handler
+SRC_DIR = os.path.abspath(os.path.dirname(__file__))
+WRAPPER_FILES = {"botmetrics.py", "botprofiler.py"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the event-loop thread's Python stack from a helper thread.
+
+    Output is the collapsed-stack ("folded") format read by flamegraph.pl,
+    speedscope and inferno: one `root;child;leaf count` line per unique stack.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.handlers = Counter()  # samples per handler: the outermost src frame above the loop
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, path: str, on_done: Optional[Callable[[str], None]] = None):
+        """Start sampling the calling thread (must be the loop thread) for `duration` seconds."""
+        if self.running:
+            raise RuntimeError("profiler already running")
+        self.stacks.clear()
+        self.handlers.clear()
+        self.samples = 0
+        self._stop.clear()
+        target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target, duration, path, on_done),
+                                        name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    async def wait(self):
+        """Wait (without blocking the loop) until the current window has been written."""
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+    def _run(self, target: int, duration: float, path: str, on_done):
+        deadline = time.monotonic() + duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                self._record(frame)
+            del frame
+            time.sleep(self.interval)
+        self.write(path)
+        if on_done:
+            on_done(path)
+
+    def _record(self, frame):
+        labels = []
+        handler = None
+        settled = False
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            filename = frame.f_code.co_filename
+            ours = filename.startswith(SRC_DIR)
+            if ours and os.path.basename(filename) in WRAPPER_FILES:
+                pass  # instrumentation between a handler and the loop
+            elif ours and frame.f_code.co_name != "<module>" and not settled:
+                handler = frame.f_code.co_name  # outermost of the innermost run of our frames
+            elif handler is not None:
+                # reached asyncio/discord.py below the handler; src frames further out (the entry
+                # point that called bot.run / asyncio.run) are on every sample and mean nothing
+                settled = True
+            frame = frame.f_back
+        labels.reverse()
+        self.stacks[";".join(labels)] += 1
+        self.handlers[handler or "(idle / library)"] += 1
+        self.samples += 1
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class SlowHandlerLog:
+    """Records handler calls that take longer than `threshold` seconds."""
+
+    def __init__(self, threshold: float, keep: int = 50):
+        self.threshold = threshold
+        self.recent = deque(maxlen=keep)  # (time, handler, guild, seconds)
+        self.on_slow: Optional[Callable[[str, Optional[object], float], None]] = None
+
+    def watch(self, name: Optional[str] = None):
+        """Decorator for coroutine functions; logs calls slower than the threshold."""
+        def decorator(fn):
+            label = name or fn.__name__
+            if not inspect.iscoroutinefunction(fn):
+                raise TypeError("SlowHandlerLog.watch only wraps coroutine functions")
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    if elapsed >= self.threshold:
+                        self.record(label, _find_guild(args), elapsed)
+            return wrapper
+        return decorator
+
+    def record(self, handler: str, guild, seconds: float):
+        self.recent.append((datetime.utcnow(), handler, guild, seconds))
+        where = f"{guild.name} ({guild.id})" if guild is not None else "no guild"
+        print(f"Slow handler: {handler} took {seconds * 1000:.0f} ms in {where}")
+        if self.on_slow:
+            self.on_slow(handler, guild, seconds)
+
+
+def _find_guild(args):
+    # handlers receive a Guild, or something with a .guild (Message, Member, Context)
+    for arg in args:
+        if hasattr(arg, "text_channels") and hasattr(arg, "roles"):
+            return arg
+        guild = getattr(arg, "guild", None)
+        if guild is not None:
+            return guild
+    return None
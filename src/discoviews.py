@@ -1,32 +1,33 @@
 import discord
 import discord.ui
-from datetime import datetime
+from modroles import ModRoleCache
+from botmetrics import REGISTRY
+from embeds import send_log
+
+# same series mybot uses, so view failures show up next to the handler ones
+SWALLOWED_ERRORS = REGISTRY.counter("bot_swallowed_errors_total", "Exceptions caught and ignored, by call site.")
 
 class ConfirmBanView(discord.ui.View):
-    def __init__(self, guild: discord.Guild, target_member_id: int, *, timeout: int = 3600):
+    def __init__(self, guild: discord.Guild, target_member_id: int, mod_roles: ModRoleCache, *, timeout: int = 3600,
+                 log_channel: str = "mod-log", threshold: int = 3):
         super().__init__(timeout=timeout)
         self.guild = guild
         self.target_id = target_member_id
+        self.log_channel = log_channel
+        self.mod_roles = mod_roles
+        self.threshold = threshold
 
     async def _send_log(self, title: str, description: str):
-        """Lightweight internal logger to mod-log (avoids importing mybot to prevent circular imports)."""
-        try:
-            embed = discord.Embed(title=title, description=description, color=discord.Color.blurple(), timestamp=datetime.utcnow())
-            for ch in self.guild.text_channels:
-                if ch.name == "mod-log" and ch.permissions_for(self.guild.me).send_messages:
-                    try:
-                        await ch.send(embed=embed)
-                    except Exception:
-                        pass
-                    return
-        except Exception:
-            pass
-    
+        """Post to this guild's mod-log channel (found by name, since importing mybot would be circular)."""
+        for ch in self.guild.text_channels:
+            if ch.name == self.log_channel and ch.permissions_for(self.guild.me).send_messages:
+                await send_log(ch, title, description, where="ban_view_log")
+                return
+
     @discord.ui.button(label="Confirm Ban", style=discord.ButtonStyle.danger)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Only allow moderators (manage_guild) or users with a role named "moderator"/"mod" to confirm
-        is_mod = interaction.user.guild_permissions.manage_guild or any(r.name.lower() in ("moderator", "mod", "mods") for r in interaction.user.roles)
-        if not is_mod:
+        # Only allow moderators (manage_guild) or users holding one of the cached moderator roles to confirm
+        if not self.mod_roles.is_moderator(interaction.user):
             await interaction.response.send_message("You are not authorized to confirm this ban.", ephemeral=True)
             return
 
@@ -42,7 +43,7 @@ class ConfirmBanView(discord.ui.View):
         try:
             await self.guild.ban(member, reason=f"Auto-ban confirmed by {interaction.user}")
             await interaction.response.edit_message(content=f"✅ {member} was banned by {interaction.user}.", view=None)
-            await self._send_log("Member Banned (Auto-confirm)", f"{member.mention} banned by {interaction.user.mention} after reaching 10 warnings.")
+            await self._send_log("Member Banned (Auto-confirm)", f"{member.mention} banned by {interaction.user.mention} after reaching {self.threshold} warnings.")
             self.stop()
         except Exception as e:
             await interaction.response.send_message(f"Failed to ban: {e}", ephemeral=True)
@@ -0,0 +1,131 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Optional
+import discord
+
+
+class _ExpiringSet:
+    """Keys that expire `ttl` seconds after being added. Entries all share one TTL, so
+    insertion order is expiry order and pruning only ever looks at the front."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._expires = OrderedDict()
+
+    def _prune(self, now: float):
+        while self._expires:
+            key, expires = next(iter(self._expires.items()))
+            if expires > now and len(self._expires) <= self.maxsize:
+                break
+            self._expires.popitem(last=False)
+
+    def add(self, key, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._expires.pop(key, None)
+        self._expires[key] = now + self.ttl
+        self._prune(now)
+
+    def __contains__(self, key) -> bool:
+        expires = self._expires.get(key)
+        return expires is not None and expires > time.monotonic()
+
+    def __len__(self):
+        return len(self._expires)
+
+    def discard(self, key):
+        self._expires.pop(key, None)
+
+    def clear(self):
+        self._expires.clear()
+
+
+class DMDispatcher:
+    """Background queue for direct messages, so event handlers never wait on them.
+
+    - DMs go out one at a time, at most `rate` per second across the whole bot (0 = unpaced);
+    - users whose DMs are closed (403) are remembered for `closed_ttl` seconds and skipped;
+    - the same text to the same user within `dedup_window` seconds is sent once;
+    - when `maxsize` DMs are already waiting, new ones are dropped rather than piling up.
+
+    `on_result(result)` is called with "sent", "closed", "duplicate", "dropped" or "failed".
+    """
+
+    def __init__(self, *, rate: float = 5.0, closed_ttl: float = 6 * 3600, dedup_window: float = 300,
+                 maxsize: int = 1000, on_result: Optional[Callable[[str], None]] = None):
+        self.rate = rate
+        self.closed = _ExpiringSet(closed_ttl, maxsize=100_000)
+        self.recent = _ExpiringSet(dedup_window, maxsize=100_000)
+        self.maxsize = maxsize
+        self.on_result = on_result
+        self._queue = asyncio.Queue()
+        self._next_send = 0.0
+
+    def _result(self, result: str):
+        if self.on_result:
+            self.on_result(result)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def send(self, user: discord.abc.User, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None) -> bool:
+        """Queue a DM; returns False if it was skipped (closed DMs, duplicate, queue full)."""
+        if user.id in self.closed:
+            self._result("closed")
+            return False
+        key = (user.id, content, embed.title if embed else None, embed.description if embed else None)
+        if key in self.recent:
+            self._result("duplicate")
+            return False
+        if self._queue.qsize() >= self.maxsize:
+            self._result("dropped")
+            return False
+        self.recent.add(key)
+        self._queue.put_nowait((user, content, embed))
+        return True
+
+    async def _deliver(self, user, content, embed):
+        if user.id in self.closed:  # learned while this one was waiting
+            self._result("closed")
+            return
+        if self.rate:
+            delay = self._next_send - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_send = max(self._next_send, time.monotonic()) + 1 / self.rate
+        try:
+            await user.send(content, embed=embed)
+            self._result("sent")
+        except (discord.Forbidden, discord.NotFound):
+            self.closed.add(user.id)
+            self._result("closed")
+        except Exception:
+            self._result("failed")
+
+    async def run(self, is_closed: Callable[[], bool] = lambda: False):
+        """Background task: deliver queued DMs until `is_closed()`."""
+        # a fresh queue bound to this loop (a restarted bot or a new test loop), keeping anything already queued
+        old, self._queue = self._queue, asyncio.Queue()
+        while not old.empty():
+            self._queue.put_nowait(old.get_nowait())
+            old.task_done()
+        while not is_closed():
+            user, content, embed = await self._queue.get()
+            try:
+                await self._deliver(user, content, embed)
+            finally:
+                self._queue.task_done()
+
+    def clear(self):
+        """Forget closed-DM users and recent notices (queued DMs are kept)."""
+        self.closed.clear()
+        self.recent.clear()
+
+    async def drain(self):
+        """Wait until everything queued so far has been handled (needs `run()` going)."""
+        while True:
+            queue = self._queue
+            await queue.join()
+            if queue is self._queue:  # run() didn't swap in a new queue meanwhile
+                return
@@ -0,0 +1,65 @@
+from typing import Optional
+import discord
+from botmetrics import REGISTRY
+
+SWALLOWED_ERRORS = REGISTRY.counter("bot_swallowed_errors_total", "Exceptions caught and ignored, by call site.")
+
+
+class EmbedTemplate:
+    """A fixed colour and footer that `build()` turns into a fresh embed per call.
+
+    Building only uses discord.Embed's public constructor and `set_footer()`, so every
+    embed owns its footer and nothing depends on Embed's internals. The colour object is
+    made once, and the timestamp is an aware UTC time, which the constructor takes as is
+    (a naive `datetime.utcnow()` would be converted on every call).
+    """
+
+    def __init__(self, *, color: discord.Color = discord.Color.blurple(), footer: Optional[str] = None,
+                 timestamp: bool = True):
+        self.color = color
+        self.footer = footer
+        self.timestamp = timestamp
+
+    def build(self, title: Optional[str] = None, description: Optional[str] = None, *,
+              footer: Optional[str] = None) -> discord.Embed:
+        embed = discord.Embed(colour=self.color, title=title, description=description,
+                              timestamp=discord.utils.utcnow() if self.timestamp else None)
+        footer = self.footer if footer is None else footer
+        if footer:
+            embed.set_footer(text=footer)
+        return embed
+
+
+TEMPLATES = {}
+
+
+def register(name: str, **options) -> EmbedTemplate:
+    """Add (or replace) a named template; options are EmbedTemplate's."""
+    TEMPLATES[name] = EmbedTemplate(**options)
+    return TEMPLATES[name]
+
+
+register("log")
+
+_by_color = {}
+
+
+def template_for(color: discord.Color) -> EmbedTemplate:
+    """The template for a plain embed of this colour, made on first use."""
+    template = _by_color.get(color.value)
+    if template is None:
+        template = _by_color[color.value] = EmbedTemplate(color=color)
+    return template
+
+
+async def send_log(channel: Optional[discord.abc.Messageable], title: str, description: str, *,
+                   where: str = "log_action") -> bool:
+    """Post a mod-log entry from the "log" template; failures are counted under `where`, not raised."""
+    if channel is None:
+        return False
+    try:
+        await channel.send(embed=TEMPLATES["log"].build(title, description))
+        return True
+    except Exception:
+        SWALLOWED_ERRORS.inc(where=where)
+        return False
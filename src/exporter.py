@@ -0,0 +1,70 @@
+import csv
+import gzip
+import json
+import asyncio
+from typing import AsyncIterator, Optional
+import discord
+
+EXPORT_FORMATS = ("jsonl", "csv")
+FIELDS = ("type", "time", "user_id", "user_name", "moderator_id", "moderator_name", "reason")
+CHUNK_ROWS = 500  # rows written between yields to the event loop
+AUDIT_ACTIONS = (discord.AuditLogAction.ban, discord.AuditLogAction.unban, discord.AuditLogAction.kick)
+AUDIT_LIMIT = 1000  # newest audit-log entries exported per action; older history is left out
+
+
+async def moderation_rows(guild: discord.Guild, warnings: dict, *, audit_limit: Optional[int] = AUDIT_LIMIT) -> AsyncIterator[dict]:
+    """Yield one flat row per warning, current ban and moderation audit-log entry.
+
+    Row types: "warning", "ban" (currently banned), and "audit_ban" / "audit_unban" /
+    "audit_kick" for audit-log events, so a ban shows up both as current and as the
+    event that caused it without the two being confused. Only the newest `audit_limit`
+    entries per action are exported (None for the whole log).
+
+    `warnings` is the guild's {user_id: [entries]} mapping. Bans and audit-log entries
+    are paged from the API as they are consumed, so nothing is collected up front.
+    Audit-log rows are skipped when the bot can't read the audit log.
+    """
+    for user_id, entries in list(warnings.items()):
+        for w in entries:
+            yield {"type": "warning", "time": w.get("time"), "user_id": user_id, "user_name": None,
+                   "moderator_id": w.get("by"), "moderator_name": w.get("by_name"), "reason": w.get("reason")}
+
+    async for ban in guild.bans(limit=None):
+        yield {"type": "ban", "time": None, "user_id": str(ban.user.id), "user_name": str(ban.user),
+               "moderator_id": None, "moderator_name": None, "reason": ban.reason}
+
+    for action in AUDIT_ACTIONS:
+        try:
+            async for entry in guild.audit_logs(limit=audit_limit, action=action):
+                target, mod = entry.target, entry.user
+                yield {"type": f"audit_{action.name}", "time": entry.created_at.isoformat(),
+                       "user_id": str(getattr(target, "id", "")) or None, "user_name": str(target) if target else None,
+                       "moderator_id": mod.id if mod else None, "moderator_name": str(mod) if mod else None,
+                       "reason": entry.reason}
+        except (discord.Forbidden, discord.NotFound):
+            return
+
+
+async def write_export(rows: AsyncIterator[dict], path: str, fmt: str = "jsonl") -> int:
+    """Stream `rows` into a gzip-compressed JSONL/CSV file at `path`; returns the row count.
+
+    Rows go straight to the compressor, so memory stays flat however large the guild,
+    and the loop gets a turn every CHUNK_ROWS rows.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            writer.writeheader()
+        async for row in rows:
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+            if count % CHUNK_ROWS == 0:
+                await asyncio.sleep(0)
+    return count
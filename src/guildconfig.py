@@ -0,0 +1,149 @@
+import os
+import json
+from typing import Optional
+
+# Defaults used for any guild without an override. mybot passes its own module
+# constants in, so these only matter when the store is used on its own.
+DEFAULT_CONFIG = {
+    "prefix": "!",
+    "log_channel": "mod-log",
+    "muted_role": "Muted",
+    "warn_threshold": 3,
+    "mod_role_names": ["moderator", "mod", "mods"],
+    "mod_role_ids": [],
+    "lag_alerts": False,
+}
+
+
+class GuildConfigStore:
+    """Per-guild settings kept in one JSON file with an in-memory read-through cache.
+
+    The file only stores overrides: {guild_id: {key: value}}. Lookups never touch
+    disk; the file is read on start and on `reload()` / `reload_if_changed()`.
+    """
+
+    def __init__(self, path: str, defaults: Optional[dict] = None, choices: Optional[dict] = None):
+        self.path = path
+        self.defaults = dict(DEFAULT_CONFIG)
+        if defaults:
+            self.defaults.update(defaults)
+        self.choices = dict(choices or {})  # {key: allowed values} for settings that take one of a few words
+        self._overrides = {}  # {guild_id: {key: value}}
+        self._cache = {}  # {guild_id: merged settings}
+        self._mtime = None
+        self.reload()
+
+    # ---------- reading ----------
+    def get(self, guild_id) -> dict:
+        gkey = str(guild_id)
+        cfg = self._cache.get(gkey)
+        if cfg is None:
+            cfg = dict(self.defaults)
+            cfg.update(self._overrides.get(gkey, {}))
+            self._cache[gkey] = cfg
+        return cfg
+
+    def value(self, guild_id, key: str):
+        return self.get(guild_id)[key]
+
+    def overrides(self, guild_id) -> dict:
+        return dict(self._overrides.get(str(guild_id), {}))
+
+    def prefix_for(self, guild) -> str:
+        if guild is None:
+            return self.defaults["prefix"]
+        return self.get(guild.id)["prefix"]
+
+    # ---------- writing ----------
+    def coerce(self, key: str, raw: str):
+        """Convert a user-supplied string to the type of the default value."""
+        if key not in self.defaults:
+            raise KeyError(key)
+        default = self.defaults[key]
+        if isinstance(default, bool):
+            return raw.strip().lower() in ("1", "true", "yes", "on")
+        if isinstance(default, int):
+            # the only numeric settings are counts; 0 would e.g. make every warning hit the threshold
+            try:
+                value = int(raw)
+            except ValueError:
+                raise ValueError("must be a whole number") from None
+            if value < 1:
+                raise ValueError("must be at least 1")
+            return value
+        if key.endswith("_ids"):
+            # accept plain IDs or role mentions (<@&id>), comma separated
+            return [int(p.strip().strip("<@&>")) for p in raw.split(",") if p.strip()]
+        if isinstance(default, list):
+            return [p.strip() for p in raw.split(",") if p.strip()]
+        value = raw.strip()
+        if not value:
+            raise ValueError("value cannot be empty")
+        if key in self.choices:
+            value = value.lower()
+            if value not in self.choices[key]:
+                raise ValueError(f"must be one of: {', '.join(self.choices[key])}")
+        return value
+
+    def set(self, guild_id, key: str, value):
+        if key not in self.defaults:
+            raise KeyError(key)
+        self.reload_if_changed()  # don't overwrite edits made by another process
+        gkey = str(guild_id)
+        self._overrides.setdefault(gkey, {})[key] = value
+        self._cache.pop(gkey, None)
+        self.save()
+
+    def reset(self, guild_id, key: Optional[str] = None):
+        self.reload_if_changed()
+        gkey = str(guild_id)
+        if key is None:
+            self._overrides.pop(gkey, None)
+        else:
+            self._overrides.get(gkey, {}).pop(key, None)
+            if not self._overrides.get(gkey):
+                self._overrides.pop(gkey, None)
+        self._cache.pop(gkey, None)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._overrides, f, indent=2)
+        os.replace(tmp, self.path)
+        self._mtime = self._stat()
+
+    # ---------- hot reload ----------
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> bool:
+        """Re-read the file. Keeps the current settings if the file is invalid."""
+        mtime = self._stat()
+        if mtime is None:
+            self._overrides = {}
+            self._cache.clear()
+            self._mtime = None
+            return True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not reload {self.path}: {e}")
+            return False
+        if not isinstance(data, dict):
+            print(f"Warning: {self.path} must contain a JSON object — ignored.")
+            return False
+        self._overrides = {str(g): dict(v) for g, v in data.items() if isinstance(v, dict)}
+        self._cache.clear()
+        self._mtime = mtime
+        return True
+
+    def reload_if_changed(self) -> bool:
+        if self._stat() != self._mtime:
+            return self.reload()
+        return False
@@ -0,0 +1,123 @@
+"""Run the bot as several worker processes, each owning a range of shards.
+
+    python src/launcher.py --shards 8 --workers 4
+
+Every worker is `src/mybot.py` started with SHARD_COUNT / SHARD_IDS set, so discord.py's
+AutoShardedBot only connects the worker's own shards, and with STATE_DB pointing at one
+shared SQLite database for warnings, blacklists and mute schedules. Workers that exit
+are restarted with a growing delay. Ctrl+C / SIGTERM stops them all.
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mybot.py")
+DEFAULT_STATE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "state.db")
+RESTART_DELAY = 5  # seconds before the first restart of a crashed worker; doubles up to MAX_RESTART_DELAY
+MAX_RESTART_DELAY = 300
+
+
+def parse_shard_ids(text: str) -> list:
+    """"0-3,6" -> [0, 1, 2, 3, 6]"""
+    ids = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+def shard_ranges(shards: int, workers: int) -> list:
+    """Split shard IDs 0..shards-1 into `workers` contiguous, near-equal ranges."""
+    workers = max(1, min(workers, shards))
+    size, extra = divmod(shards, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class Worker:
+    def __init__(self, index: int, shard_ids: list, env: dict):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.env = env
+        self.proc = None
+        self.delay = RESTART_DELAY
+        self.restart_at = 0.0
+        self.started = 0.0
+
+    def start(self):
+        label = f"{self.shard_ids[0]}-{self.shard_ids[-1]}" if len(self.shard_ids) > 1 else str(self.shard_ids[0])
+        print(f"Starting worker {self.index} (shards {label})")
+        self.proc = subprocess.Popen([sys.executable, BOT_SCRIPT], env=self.env)
+        self.started = time.monotonic()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, required=True, help="total shard count")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes to spread the shards over")
+    parser.add_argument("--state-db", default=os.getenv("STATE_DB", DEFAULT_STATE_DB), help="shared SQLite database")
+    parser.add_argument("--stagger", type=float, default=5.0, help="seconds between worker starts (identify rate limit)")
+    args = parser.parse_args(argv)
+
+    base_port = int(os.getenv("METRICS_PORT", "0"))
+    workers = []
+    for i, ids in enumerate(shard_ranges(args.shards, args.workers)):
+        env = dict(os.environ, SHARD_COUNT=str(args.shards), SHARD_IDS=",".join(map(str, ids)),
+                   STATE_DB=os.path.abspath(args.state_db))
+        if base_port:
+            env["METRICS_PORT"] = str(base_port + i)  # one scrape target per worker
+        workers.append(Worker(i, ids, env))
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for i, worker in enumerate(workers):
+        if i:
+            time.sleep(args.stagger)
+        worker.start()
+
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for worker in workers:
+            code = worker.proc.poll() if worker.proc else None
+            if worker.proc and code is not None:
+                if now - worker.started > MAX_RESTART_DELAY:
+                    worker.delay = RESTART_DELAY  # it ran fine for a while; start the backoff over
+                print(f"Worker {worker.index} exited with code {code}; restarting in {worker.delay}s")
+                worker.proc = None
+                worker.restart_at = now + worker.delay
+                worker.delay = min(worker.delay * 2, MAX_RESTART_DELAY)
+            elif worker.proc is None and now >= worker.restart_at:
+                worker.start()
+
+    print("Stopping workers...")
+    for worker in workers:
+        if worker.proc and worker.proc.poll() is None:
+            worker.proc.terminate()
+    for worker in workers:
+        if worker.proc:
+            try:
+                worker.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.proc.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import time
+import heapq
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+
+class SlowCallbackCapture(logging.Handler):
+    """Collects asyncio debug-mode "Executing <Handle ...> took N seconds" reports.
+
+    Keeps only the `keep` slowest callbacks seen so far, so memory stays bounded.
+    """
+
+    def __init__(self, keep: int = 10):
+        super().__init__(level=logging.WARNING)
+        self.keep = keep
+        self.worst = []  # min-heap of (seconds, time, description)
+        self.total = 0
+
+    def emit(self, record: logging.LogRecord):
+        if not isinstance(record.msg, str) or not record.msg.startswith("Executing") or not record.args or len(record.args) < 2:
+            return
+        handle, seconds = record.args[0], record.args[1]
+        entry = (float(seconds), datetime.utcnow(), str(handle)[:300])
+        self.total += 1
+        if len(self.worst) < self.keep:
+            heapq.heappush(self.worst, entry)
+        elif entry[0] > self.worst[0][0]:
+            heapq.heapreplace(self.worst, entry)
+
+    def slowest(self):
+        return sorted(self.worst, reverse=True)
+
+
+def enable_slow_callback_reports(loop: asyncio.AbstractEventLoop, threshold: float, keep: int = 10) -> SlowCallbackCapture:
+    """Turn on asyncio debug mode and capture callbacks that run longer than `threshold` seconds.
+
+    Debug mode adds overhead to every callback, so this is opt-in.
+    """
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+    capture = SlowCallbackCapture(keep)
+    logger = logging.getLogger("asyncio")
+    logger.addHandler(capture)
+    if logger.getEffectiveLevel() > logging.WARNING:
+        logger.setLevel(logging.WARNING)
+    return capture
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag: how late a short sleep wakes up compared to when it should."""
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.5, cooldown: float = 300.0, observe: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.observe = observe
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.alerts = 0
+        self._last_alert = None
+
+    def record(self, lag: float) -> bool:
+        """Record one measurement; returns True when an alert should be sent."""
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        if self.observe:
+            self.observe(lag)
+        if lag < self.threshold:
+            return False
+        now = time.monotonic()
+        if self._last_alert is not None and now - self._last_alert < self.cooldown:
+            return False
+        self._last_alert = now
+        self.alerts += 1
+        return True
+
+    async def run(self, on_alert: Callable[[float], Awaitable[None]], is_closed: Callable[[], bool] = lambda: False, *,
+                  on_error: Optional[Callable[[Exception], None]] = None):
+        """Probe until `is_closed()`; a failing `on_alert` is reported to `on_error` and the probing goes on."""
+        loop = asyncio.get_running_loop()
+        while not is_closed():
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            if self.record(lag):
+                try:
+                    await on_alert(lag)
+                except Exception as e:
+                    if on_error:
+                        on_error(e)
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from typing import Optional
+import discord
+
+MEMBER_CACHE_MODES = ("full", "lean")
+
+
+def cache_options(mode: str) -> dict:
+    """Keyword arguments for commands.Bot for a member-cache mode.
+
+    "full" is discord.py's default: every member of every guild is chunked at startup
+    and kept. "lean" keeps no member list at all (the members intent stays on, so join
+    events still arrive); commands resolve members through MemberLRU instead.
+    """
+    if mode not in MEMBER_CACHE_MODES:
+        raise ValueError(f"unknown member cache mode {mode!r} (expected one of {', '.join(MEMBER_CACHE_MODES)})")
+    if mode == "full":
+        return {}
+    return {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+
+
+class MemberLRU:
+    """Bounded cache of recently active members, keyed by (guild_id, user_id).
+
+    Members seen in messages and joins are kept (most recent first) up to `maxsize`;
+    anything else is fetched over REST on demand by `resolve()`. Memory therefore follows
+    how many members are active, not how large the guilds are.
+    """
+
+    def __init__(self, maxsize: int = 5000):
+        self.maxsize = maxsize
+        self._members = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    def touch(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        self._members[key] = member
+        self._members.move_to_end(key)
+        if len(self._members) > self.maxsize:
+            self._members.popitem(last=False)
+
+    def get(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Cached member, from the guild's own cache first; never does I/O."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        key = (guild.id, user_id)
+        member = self._members.get(key)
+        if member is not None:
+            self._members.move_to_end(key)
+        return member
+
+    def discard(self, guild_id: int, user_id: int):
+        self._members.pop((guild_id, user_id), None)
+
+    def forget_guild(self, guild_id: int):
+        for key in [k for k in self._members if k[0] == guild_id]:
+            del self._members[key]
+
+    def recent(self, guild: discord.Guild) -> list:
+        """Cached members of one guild (for approximate counts when there is no member list)."""
+        return [m for (gid, _), m in self._members.items() if gid == guild.id]
+
+    async def resolve(self, guild: discord.Guild, user_id: int, *, fresh: bool = False) -> Optional[discord.Member]:
+        """Member from cache, else from `fetch_member`; None if they are not in the guild.
+
+        `fresh=True` skips this LRU (guild cache is still trusted), for callers that
+        need current roles rather than the ones seen at the member's last message.
+        """
+        member = guild.get_member(user_id) if fresh else self.get(guild, user_id)
+        if member is not None:
+            self.hits += 1
+            return member
+        self.misses += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            self.discard(guild.id, user_id)
+            return None
+        self.touch(member)
+        return member
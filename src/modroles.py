@@ -0,0 +1,52 @@
+from typing import Optional
+import discord
+from guildconfig import GuildConfigStore
+
+
+class ModRoleCache:
+    """Per-guild set of moderator role IDs.
+
+    Built from the guild's `mod_role_ids` setting plus any role whose name is in
+    `mod_role_names`. Entries are dropped on role/config changes and rebuilt on the
+    next lookup, so authorization checks are set lookups instead of role scans.
+    """
+
+    def __init__(self, config: GuildConfigStore):
+        self.config = config
+        self._roles = {}  # {guild_id: (frozenset(role_ids), mention_role_id or None)}
+
+    def _build(self, guild: discord.Guild):
+        cfg = self.config.get(guild.id)
+        names = {n.lower() for n in cfg["mod_role_names"]}
+        configured = set(cfg["mod_role_ids"])
+        matched = [r for r in guild.roles if r.id in configured or r.name.lower() in names]
+        # highest role first, so the mention goes to the most senior moderator role
+        matched.sort(key=lambda r: r.position, reverse=True)
+        entry = (frozenset(r.id for r in matched), matched[0].id if matched else None)
+        self._roles[guild.id] = entry
+        return entry
+
+    def role_ids(self, guild: discord.Guild) -> frozenset:
+        entry = self._roles.get(guild.id) or self._build(guild)
+        return entry[0]
+
+    def mention_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        entry = self._roles.get(guild.id) or self._build(guild)
+        return guild.get_role(entry[1]) if entry[1] else None
+
+    def is_moderator(self, member: discord.Member) -> bool:
+        if member.guild_permissions.manage_guild:
+            return True
+        ids = self.role_ids(member.guild)
+        return any(r.id in ids for r in member.roles)
+
+    def is_mod_role(self, role: discord.Role) -> bool:
+        """Whether `role` qualifies by config, without building the guild's cache."""
+        cfg = self.config.get(role.guild.id)
+        return role.id in cfg["mod_role_ids"] or role.name.lower() in {n.lower() for n in cfg["mod_role_names"]}
+
+    def invalidate(self, guild_id: int):
+        self._roles.pop(guild_id, None)
+
+    def clear(self):
+        self._roles.clear()
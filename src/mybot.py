@@ -2,25 +2,98 @@
 import os
 import json
 import asyncio
-from datetime import datetime
+import time
+import signal
+import tempfile
+from datetime import datetime, timedelta
 from typing import Optional
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 import difflib
+from collections import Counter
 from discoviews import ConfirmBanView
+from guildconfig import GuildConfigStore
+from modroles import ModRoleCache
+from botmetrics import REGISTRY, timed, start_metrics_server
+from botprofiler import StackSampler, SlowHandlerLog
+from loopmonitor import LoopLagMonitor, enable_slow_callback_reports
+from traffic import TrafficRecorder
+from warnstore import WarningStore
+from sharedstore import SharedStore
+from launcher import parse_shard_ids
+from membercache import MemberLRU, cache_options
+from exporter import EXPORT_FORMATS, moderation_rows, write_export
+from dmqueue import DMDispatcher
+from embeds import TEMPLATES, register, send_log, template_for
+from raiddetect import RAID_ACTIONS, RaidDetector
+from blocklist import BlacklistFiles, LayeredBlocklist, read_words
 
 load_dotenv()  # loads .env in project root into environment
 
 # ---------- Configuration ----------
 PREFIX = "!"
-# --- use an absolute data directory relative to this file ---
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+# --- use an absolute data directory relative to this file (BOT_DATA_DIR overrides it, e.g. for benchmarks) ---
+DATA_DIR = os.path.abspath(os.getenv("BOT_DATA_DIR") or os.path.join(os.path.dirname(__file__), "..", "data"))
 os.makedirs(DATA_DIR, exist_ok=True)
-WARNINGS_FILE = os.path.join(DATA_DIR, "warnings.json")
-BLACKLIST_FILE = os.path.join(DATA_DIR, "blacklist.json")
+WARNINGS_FILE = os.path.join(DATA_DIR, "warnings.json")  # legacy single file, migrated into WARNINGS_DIR
+WARNINGS_DIR = os.path.join(DATA_DIR, "warnings")  # one file per guild, loaded on first use
+BLACKLIST_FILE = os.path.join(DATA_DIR, "blacklist.json")  # legacy single file, migrated into BLACKLIST_DIR
+BLACKLIST_DIR = os.path.join(DATA_DIR, "blacklists")  # one file per guild: its additions/exemptions on top of the global list
+# Blocklist shared by every guild, one word per line; edits are picked up with the config hot reload
+GLOBAL_BLOCKLIST_FILE = os.getenv("GLOBAL_BLOCKLIST_FILE") or os.path.join(DATA_DIR, "global_blocklist.txt")
+CONFIG_FILE = os.path.join(DATA_DIR, "guild_config.json")
+# Defaults below can be overridden per guild with `!config set` (see guild_config)
 LOG_CHANNEL_NAME = "mod-log"
 MUTED_ROLE_NAME = "Muted"
+WARN_THRESHOLD = 3
+MOD_ROLE_NAMES = ["moderator", "mod", "mods"]
+MOD_ROLE_IDS = []  # role IDs that always count as moderator, in addition to MOD_ROLE_NAMES
+CONFIG_RELOAD_SECONDS = 30  # how often the config file is checked for external edits
+# Metrics endpoint (Prometheus text format); disabled unless METRICS_PORT is set
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+# Profiling: `!profile` (owner only) or SIGUSR1 samples the event loop into data/profiles/
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 120
+SLOW_HANDLER_MS = int(os.getenv("SLOW_HANDLER_MS", "250"))  # handlers slower than this are logged
+# Event-loop lag: alerts go to the mod-log of guilds with `lag_alerts` enabled. Opt-in, since lag is
+# process-wide: on by default, one stall would post to the mod-log of every guild the bot is in.
+LOOP_LAG_INTERVAL = 0.5  # seconds between lag probes
+LOOP_LAG_ALERT_MS = int(os.getenv("LOOP_LAG_ALERT_MS", "500"))
+LOOP_LAG_ALERT_COOLDOWN = 300  # seconds between alerts
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "").lower() in ("1", "true", "yes")  # asyncio slow-callback reports (adds overhead)
+SLOW_CALLBACK_SECONDS = 0.1  # with LOOP_DEBUG, callbacks running longer than this are recorded
+# Traffic capture: sanitized gateway events for offline replay (tests/replay_traffic.py)
+TRAFFIC_DIR = os.path.join(DATA_DIR, "traffic")
+TRAFFIC_RECORD_FILE = os.getenv("TRAFFIC_RECORD_FILE")  # record from startup when set
+# Sharding (see src/launcher.py): SHARD_COUNT is a number or "auto"; SHARD_IDS limits this process to some shards
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS", "")) or None
+STATE_DB = os.getenv("STATE_DB")  # shared SQLite store for multi-process deployments; JSON files when unset
+SHARED_POLL_SECONDS = 2  # how often to pick up other processes' writes and due unmutes
+# Member cache: "full" keeps every member (discord.py default); "lean" keeps only MEMBER_LRU_SIZE recently active ones
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "full").lower()
+MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "5000"))
+DM_PER_SECOND = 5  # outbound DM pacing, across all guilds
+DM_CLOSED_TTL = 6 * 3600  # skip users whose DMs were closed for this long before trying again
+DM_DEDUP_SECONDS = 300  # identical DMs to the same user within this window are sent once
+# Expensive commands: {command: (uses, per seconds) per member, runs at once per guild, queue extra runs instead of rejecting}
+THROTTLES = {
+    "purge": (2, 10, 1, True),  # bulk deletes in one guild share a rate-limit bucket anyway
+    "banned": (1, 30, 1, False),  # pages through the whole ban list
+    "roleinfo": (3, 15, 2, True),
+    "listroles": (2, 30, 1, False),  # counts members for every role
+    "setperms": (3, 30, 1, True),
+}
+# Raid detection: a burst of joins, or of young accounts, puts a guild in raid mode (response: `!config set raid_action`)
+RAID_WINDOW_SECONDS = int(os.getenv("RAID_WINDOW_SECONDS", "10"))
+RAID_MAX_JOINS = int(os.getenv("RAID_MAX_JOINS", "10"))  # joins within the window
+RAID_MAX_YOUNG = int(os.getenv("RAID_MAX_YOUNG", "4"))  # joins from young accounts within the window
+RAID_ACCOUNT_AGE_DAYS = float(os.getenv("RAID_ACCOUNT_AGE_DAYS", "7"))  # accounts younger than this are "young"
+RAID_COOLDOWN = 300  # seconds of calm before raid mode ends
+RAID_QUARANTINE_MINUTES = 60  # timeout given to flagged accounts with raid_action=quarantine
 AUTO_DELETE_IN_SECONDS = 5  # how long to keep auto-deleted messages in DM notifications, not needed by Discord API
 
 # Emoji / UI
@@ -31,10 +104,41 @@ EMOJI_INFO = "ℹ️"
 EMOJI_LOCK = "🔒"
 # -----------------------------------
 
-# Utility: create a consistent embed
+# ---------- Metrics ----------
+EVENT_SECONDS = REGISTRY.histogram("bot_event_handler_seconds", "Time spent handling gateway events.")
+COMMAND_SECONDS = REGISTRY.histogram("bot_command_seconds", "Time spent running prefix commands.")
+IO_SECONDS = REGISTRY.histogram("bot_io_seconds", "Time spent in persistence and mod-log helpers.")
+SWALLOWED_ERRORS = REGISTRY.counter("bot_swallowed_errors_total", "Exceptions caught and ignored, by call site.")
+COMMAND_ERRORS = REGISTRY.counter("bot_command_errors_total", "Errors reported to on_command_error, by type.")
+PENDING_TASKS = REGISTRY.gauge("bot_pending_tasks", "Tasks scheduled on the event loop.")
+GATEWAY_LATENCY = REGISTRY.gauge("bot_gateway_latency_seconds", "Heartbeat latency reported by discord.py.")
+SLOW_HANDLERS = REGISTRY.counter("bot_slow_handlers_total", "Handler calls slower than SLOW_HANDLER_MS.")
+LOOP_LAG = REGISTRY.histogram("bot_event_loop_lag_seconds", "How late the event loop woke up a short sleep.")
+DM_RESULTS = REGISTRY.counter("bot_dms_total", "Direct messages by outcome (sent, closed, duplicate, dropped, failed).")
+DM_PENDING = REGISTRY.gauge("bot_dm_queue_size", "Direct messages waiting to be sent.")
+RAID_FLAGGED = REGISTRY.counter("bot_raid_flagged_total", "Joins flagged by the raid detector, by response.")
+MEMBER_LRU = REGISTRY.gauge("bot_member_lru_size", "Members held in the recently-active member cache.")
+
+profiler = StackSampler()
+slow_handlers = SlowHandlerLog(SLOW_HANDLER_MS / 1000)
+slow_handlers.on_slow = lambda handler, guild, seconds: SLOW_HANDLERS.inc(handler=handler)
+loop_lag = LoopLagMonitor(LOOP_LAG_INTERVAL, LOOP_LAG_ALERT_MS / 1000, LOOP_LAG_ALERT_COOLDOWN, observe=LOOP_LAG.observe)
+slow_callbacks = None  # SlowCallbackCapture when LOOP_DEBUG is set
+recorder: Optional[TrafficRecorder] = None  # set while traffic capture is running
+dms = DMDispatcher(rate=DM_PER_SECOND, closed_ttl=DM_CLOSED_TTL, dedup_window=DM_DEDUP_SECONDS,
+                   on_result=lambda result: DM_RESULTS.inc(result=result))
+DM_PENDING.set_function(dms.pending)
+raids = RaidDetector(window=RAID_WINDOW_SECONDS, max_joins=RAID_MAX_JOINS, max_young=RAID_MAX_YOUNG,
+                     young_days=RAID_ACCOUNT_AGE_DAYS, cooldown=RAID_COOLDOWN)
+register("automod_dm", footer=f"This message will auto-delete in {AUTO_DELETE_IN_SECONDS}s")
+
+def swallowed(where: str):
+    # errors we deliberately ignore still get counted so they show up in metrics
+    SWALLOWED_ERRORS.inc(where=where)
+
+# Utility: create a consistent embed (copied from a prebuilt per-colour template, see embeds.py)
 def make_embed(title: str = None, description: str = None, color=discord.Color.blurple()):
-    e = discord.Embed(title=title, description=description, color=color, timestamp=datetime.utcnow())
-    return e
+    return template_for(color).build(title, description)
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -42,7 +146,31 @@ intents.members = True
 intents.guilds = True
 intents.messages = True
 
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=commands.MinimalHelpCommand())
+guild_config = GuildConfigStore(CONFIG_FILE, defaults={
+    "prefix": PREFIX,
+    "log_channel": LOG_CHANNEL_NAME,
+    "muted_role": MUTED_ROLE_NAME,
+    "warn_threshold": WARN_THRESHOLD,
+    "mod_role_names": MOD_ROLE_NAMES,
+    "mod_role_ids": MOD_ROLE_IDS,
+    "lag_alerts": False,
+    "raid_action": "alert",
+}, choices={"raid_action": RAID_ACTIONS})
+mod_roles = ModRoleCache(guild_config)
+members = MemberLRU(MEMBER_LRU_SIZE)
+MEMBER_LRU.set_function(lambda: len(members))
+
+def get_prefix(bot, message):
+    # in-memory lookup only; called for every message
+    return guild_config.prefix_for(message.guild)
+
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(command_prefix=get_prefix, intents=intents, help_command=commands.MinimalHelpCommand(),
+                                  shard_count=None if SHARD_COUNT == "auto" else int(SHARD_COUNT), shard_ids=SHARD_IDS,
+                                  **cache_options(MEMBER_CACHE))
+else:
+    bot = commands.Bot(command_prefix=get_prefix, intents=intents, help_command=commands.MinimalHelpCommand(),
+                       **cache_options(MEMBER_CACHE))
 
 # Load / save helpers
 def load_json(path, default):
@@ -72,77 +200,300 @@ def load_json(path, default):
     except Exception:
         return default
 
+@timed(IO_SECONDS, op="save_json")
 def save_json(path, data):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
 
-warnings_db = load_json(WARNINGS_FILE, {})  # structure: {guild_id: {user_id: [ {by, reason, time}, ... ] } }
-blacklists = load_json(BLACKLIST_FILE, {})  # structure: {guild_id: [word1, word2]}
+# global words compiled once and shared; each guild only keeps its own additions and exemptions
+blocklist = LayeredBlocklist(loader=lambda guild_id: load_blacklist_delta(guild_id))
+global_blocklist_mtime = -1.0  # not loaded yet
+
+def reload_global_blocklist(force: bool = False) -> bool:
+    """Recompile the global blocklist if its file changed since the last load."""
+    global global_blocklist_mtime
+    try:
+        mtime = os.stat(GLOBAL_BLOCKLIST_FILE).st_mtime
+    except OSError:
+        mtime = None
+    if mtime == global_blocklist_mtime and not force:
+        return False
+    global_blocklist_mtime = mtime
+    blocklist.set_global(read_words(GLOBAL_BLOCKLIST_FILE))
+    return True
+
+reload_global_blocklist()
+
+def open_blacklist_files() -> BlacklistFiles:
+    # loaded after the global list, so the one-time split of blacklist.json leaves out guild copies of global words
+    return BlacklistFiles(BLACKLIST_DIR, legacy_path=BLACKLIST_FILE, drop=lambda word: word in blocklist.global_tier)
+
+def open_shared_store(path: str) -> SharedStore:
+    store = SharedStore(path, observe=lambda s: IO_SECONDS.observe(s, op="shared_store"))
+    if not store.is_empty():
+        return store
+    files = WarningStore(WARNINGS_DIR, legacy_path=WARNINGS_FILE)
+    lists = open_blacklist_files()
+    deltas = {g: lists.load(g) for g in lists.guild_ids()}
+    if store.import_legacy({g: d[0] for g, d in deltas.items()}, {g: files.guild(g) for g in files.guild_ids()},
+                           exemptions={g: d[1] for g, d in deltas.items()}):
+        print(f"Imported existing warnings and blacklists into {path}")
+    return store
+
+if STATE_DB:
+    shared_store = open_shared_store(STATE_DB)
+    warnings_db = shared_store.warnings
+    blacklist_files = None  # blacklists live in the shared store, see load_blacklist_delta()
+else:
+    shared_store = None
+    # per-guild shards: {guild_id: {user_id: [ {by, reason, time}, ... ] } }, each read the first time the guild is touched
+    warnings_db = WarningStore(WARNINGS_DIR, legacy_path=WARNINGS_FILE, observe=lambda s: IO_SECONDS.observe(s, op="save_warnings"))
+    # one small file per guild with its own words/exemptions, read the first time the guild is checked
+    blacklist_files = open_blacklist_files()
+
+def load_blacklist_delta(guild_id) -> tuple:
+    if shared_store:
+        # normally primed by load_guild_blocklist() first; this is the fallback for sync callers
+        return shared_store.call(shared_store.blacklist_delta, guild_id)
+    return blacklist_files.load(guild_id)
+
+async def in_store_thread(fn, *args):
+    # storage calls run on the store's own thread: journal fsyncs, and waits for other
+    # workers' SQLite write locks, never block the event loop
+    return await (shared_store or warnings_db).run(fn, *args)
+
+async def load_guild_blocklist(guild_id):
+    """Shared-store mode: read a guild's words off the event loop before the sync lookups need them."""
+    if shared_store and not blocklist.is_loaded(guild_id):
+        blocklist.prime(guild_id, *await shared_store.run(shared_store.blacklist_delta, guild_id))
+
+@timed(IO_SECONDS, op="save_blacklist")
+def save_guild_blacklist(guild_id):
+    # rewrites only this guild's file
+    blacklist_files.save(guild_id, blocklist.added(guild_id), blocklist.exemptions(guild_id))
+
+async def add_blacklist_word(guild_id, word: str) -> bool:
+    """False if the word is already blocked (case-insensitive), globally or by the guild."""
+    await load_guild_blocklist(guild_id)
+    change = blocklist.add(guild_id, word)
+    if change is None:
+        return False
+    if not shared_store:
+        save_guild_blacklist(guild_id)
+    elif change == "added":
+        await shared_store.run(shared_store.blacklist_add, guild_id, word)
+    else:
+        await shared_store.run(shared_store.blacklist_exempt, guild_id, word, False)
+    return True
+
+async def remove_blacklist_word(guild_id, word: str) -> bool:
+    """Removes a guild word, or turns a global word off for this guild only."""
+    await load_guild_blocklist(guild_id)
+    change = blocklist.remove(guild_id, word)
+    if change is None:
+        return False
+    if not shared_store:
+        save_guild_blacklist(guild_id)
+    elif change == "removed":
+        await shared_store.run(shared_store.blacklist_remove, guild_id, word)
+    else:
+        await shared_store.run(shared_store.blacklist_exempt, guild_id, word)
+    return True
 
 # Utility: get or create mod-log channel
 async def get_mod_log(guild: discord.Guild) -> Optional[discord.TextChannel]:
+    log_name = guild_config.value(guild.id, "log_channel")
     for ch in guild.text_channels:
-        if ch.name == LOG_CHANNEL_NAME:
+        if ch.name == log_name:
             return ch
     # create channel if bot has perms
     try:
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(send_messages=False, view_channel=True)
         }
-        ch = await guild.create_text_channel(LOG_CHANNEL_NAME, overwrites=None)
+        ch = await guild.create_text_channel(log_name, overwrites=None)
         return ch
     except Exception:
+        swallowed("get_mod_log")
         return None
 
 # Utility: ensure muted role exists and has correct perms
+muted_role_locks = {}  # {guild_id: asyncio.Lock} held while the role is being created
 async def ensure_muted_role(guild: discord.Guild) -> Optional[discord.Role]:
-    role = discord.utils.get(guild.roles, name=MUTED_ROLE_NAME)
+    muted_name = guild_config.value(guild.id, "muted_role")
+    role = discord.utils.get(guild.roles, name=muted_name)
     if role:
         return role
-    try:
-        role = await guild.create_role(name=MUTED_ROLE_NAME, reason="Create muted role for moderation bot")
-        # set channel overwrites to prevent sending messages for the role
-        for channel in guild.channels:
-            try:
-                if isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.Thread)):
-                    await channel.set_permissions(role, send_messages=False, speak=False, add_reactions=False)
-            except Exception:
-                pass
-        return role
-    except Exception:
-        return None
+    # concurrent callers (e.g. a raid muting several joins at once) must not each create a role
+    async with muted_role_locks.setdefault(guild.id, asyncio.Lock()):
+        role = discord.utils.get(guild.roles, name=muted_name)
+        if role:
+            return role
+        try:
+            role = await guild.create_role(name=muted_name, reason="Create muted role for moderation bot")
+            # set channel overwrites to prevent sending messages for the role
+            for channel in guild.channels:
+                try:
+                    if isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.Thread)):
+                        await channel.set_permissions(role, send_messages=False, speak=False, add_reactions=False)
+                except Exception:
+                    swallowed("muted_role_overwrite")
+            return role
+        except Exception:
+            swallowed("ensure_muted_role")
+            return None
 
+@timed(IO_SECONDS, op="log_action")
 async def log_action(guild: discord.Guild, title: str, description: str):
-    ch = await get_mod_log(guild)
-    if ch:
-        embed = discord.Embed(title=title, description=description, color=discord.Color.blurple(), timestamp=datetime.utcnow())
+    await send_log(await get_mod_log(guild), title, description)
+
+# ---------------- Commands ----------------
+
+def throttled(name: str):
+    """Per-member cooldown plus per-guild concurrency limit for an expensive command (see THROTTLES).
+
+    Commands marked to queue wait for a free slot instead of failing; the rest are
+    rejected with MaxConcurrencyReached. Both errors are answered in on_command_error.
+    """
+    uses, per, at_once, queue = THROTTLES[name]
+
+    def decorator(func):
+        func = commands.cooldown(uses, per, commands.BucketType.member)(func)
+        return commands.max_concurrency(at_once, per=commands.BucketType.guild, wait=queue)(func)
+    return decorator
+
+async def watch_config():
+    # hot reload: pick up edits made to the config file without a restart
+    while not bot.is_closed():
+        await asyncio.sleep(CONFIG_RELOAD_SECONDS)
         try:
-            await ch.send(embed=embed)
+            if guild_config.reload_if_changed():
+                mod_roles.clear()
+                print(f"Reloaded guild config from {CONFIG_FILE}")
+            if reload_global_blocklist():
+                print(f"Reloaded global blocklist from {GLOBAL_BLOCKLIST_FILE} ({len(blocklist.global_tier)} words)")
         except Exception:
-            pass
+            swallowed("watch_config")
 
-# ---------------- Commands ----------------
+async def watch_shared_store():
+    # pick up other processes' writes, and run due unmutes for the guilds this process owns
+    polls = 0
+    while not bot.is_closed():
+        await asyncio.sleep(SHARED_POLL_SECONDS)
+        try:
+            for guild_id, kind in await shared_store.run(shared_store.poll_changes):
+                if kind == "blacklist":
+                    blocklist.invalidate(guild_id)
+            owned = [g.id for g in bot.guilds]
+            for guild_id, user_id, role_id, channel_id, minutes in await shared_store.run(shared_store.due_unmutes, owned):
+                if not await shared_store.run(shared_store.cancel_unmute, guild_id, user_id):
+                    continue  # another process got there first
+                guild = bot.get_guild(guild_id)
+                role = guild.get_role(role_id) if guild else None
+                if role:
+                    bot.loop.create_task(finish_mute(guild, user_id, role, guild.get_channel(channel_id), minutes))
+            polls += 1
+            if polls % 1800 == 0:
+                await shared_store.run(shared_store.prune_changes)
+        except Exception:
+            swallowed("watch_shared_store")
+
+async def alert_loop_lag(lag: float):
+    desc = f"Event loop was blocked for **{lag * 1000:.0f} ms** (threshold {LOOP_LAG_ALERT_MS} ms)."
+    if slow_callbacks and slow_callbacks.worst:
+        seconds, _, what = slow_callbacks.slowest()[0]
+        desc += f"\nSlowest callback so far ({seconds * 1000:.0f} ms): `{what[:200]}`"
+    elif slow_handlers.recent:
+        _, handler, guild, seconds = slow_handlers.recent[-1]
+        desc += f"\nLast slow handler: `{handler}` ({seconds * 1000:.0f} ms)"
+    print(f"Event loop lag: {lag * 1000:.0f} ms")
+    for guild in bot.guilds:
+        if guild_config.value(guild.id, "lag_alerts"):
+            await log_action(guild, "Event Loop Lag", desc)
+
+def start_recording(path: str) -> TrafficRecorder:
+    global recorder
+    stop_recording()
+    recorder = TrafficRecorder(path, global_blacklist=blocklist.global_tier)
+    print(f"Recording traffic to {path}")
+    return recorder
+
+def recorded_blacklist(guild_id) -> dict:
+    # callables, so the recorder reads a guild's additions/exemptions only for its first event
+    return {"blacklist": lambda: blocklist.added(guild_id), "exempt": lambda: blocklist.exemptions(guild_id)}
+
+def stop_recording() -> Optional[TrafficRecorder]:
+    global recorder
+    old, recorder = recorder, None
+    if old:
+        old.close()
+    return old
+
+@bot.event
+async def setup_hook():
+    global slow_callbacks
+    if TRAFFIC_RECORD_FILE:
+        start_recording(TRAFFIC_RECORD_FILE)
+    bot.loop.create_task(watch_config())
+    bot.loop.create_task(dms.run(bot.is_closed))
+    if shared_store:
+        bot.loop.create_task(watch_shared_store())
+    bot.loop.create_task(loop_lag.run(alert_loop_lag, bot.is_closed, on_error=lambda e: swallowed("loop_lag_alert")))
+    if LOOP_DEBUG:
+        slow_callbacks = enable_slow_callback_reports(bot.loop, SLOW_CALLBACK_SECONDS)
+    PENDING_TASKS.set_function(lambda: len(asyncio.all_tasks()))
+    GATEWAY_LATENCY.set_function(lambda: bot.latency if bot.latency == bot.latency else 0)  # NaN before first heartbeat
+    if hasattr(signal, "SIGUSR1"):
+        try:
+            bot.loop.add_signal_handler(signal.SIGUSR1, start_profile, PROFILE_DEFAULT_SECONDS)
+        except (NotImplementedError, RuntimeError):
+            pass  # no signal support on this platform / loop
+    if METRICS_PORT:
+        try:
+            bot.metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            print(f"Metrics available at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"Could not start metrics endpoint: {e}")
+
+def start_profile(seconds: int) -> Optional[str]:
+    """Start a sampling window; returns the output path, or None if one is already running."""
+    if profiler.running:
+        return None
+    path = os.path.join(PROFILE_DIR, f"profile-{datetime.utcnow():%Y%m%d-%H%M%S}.folded")
+    profiler.start(seconds, path, on_done=lambda p: print(f"Profile written to {p}"))
+    return path
+
+# Per-command latency: before/after hooks run around every command, including failed ones
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_start = time.perf_counter()
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    start = getattr(ctx, "metrics_start", None)
+    if start is not None:
+        COMMAND_SECONDS.observe(time.perf_counter() - start, command=ctx.command.qualified_name)
 
 @bot.event
 async def on_ready():
     print(f"Bot ready as {bot.user} (ID: {bot.user.id})")
 
 @bot.event
+@timed(EVENT_SECONDS, event="on_guild_join")
+@slow_handlers.watch()
 async def on_guild_join(guild):
-    # Initialize defaults for new guild
-    warnings_db.setdefault(str(guild.id), {})
-    blacklists.setdefault(str(guild.id), [])
-    save_json(WARNINGS_FILE, warnings_db)
-    save_json(BLACKLIST_FILE, blacklists)
+    # (no per-guild setup: warnings and blacklist entries are created on first use)
 
     # Send a friendly intro message in a suitable channel when the bot joins
+    cfg = guild_config.get(guild.id)
+    prefix = cfg["prefix"]
     intro = make_embed(
         title=f"{EMOJI_INFO} Moderator Bot here!",
         description=(
             f"Thanks for inviting me to **{guild.name}** 👋\n\n"
-            f"My prefix is `{PREFIX}` — type `{PREFIX}modhelp` to see moderation commands.\n\n"
-            "I will create a `mod-log` channel if needed to post moderation actions."
+            f"My prefix is `{prefix}` — type `{prefix}modhelp` to see moderation commands.\n\n"
+            f"I will create a `{cfg['log_channel']}` channel if needed to post moderation actions."
         ),
         color=discord.Color.blurple()
     )
@@ -159,63 +510,149 @@ async def on_guild_join(guild):
             await target.send(embed=intro)
         except Exception:
             # ignore failures (no perms, channel deleted, etc.)
-            pass
+            swallowed("guild_intro")
 
     # Log join
     await log_action(guild, "Bot Joined Guild", f"Joined guild **{guild.name}** (`{guild.id}`)")
 
 @bot.event
+@timed(EVENT_SECONDS, event="on_message")
+@slow_handlers.watch()
 async def on_message(message: discord.Message):
     # print(f"Message from {message.author} in {message.guild}: {message.content}\n")  # debug
+    if isinstance(message.author, discord.Member):
+        members.touch(message.author)
+    if message.guild:
+        await load_guild_blocklist(message.guild.id)
+    if recorder and message.guild:
+        recorder.message(message, **recorded_blacklist(message.guild.id), blocked=lambda word: blocklist.match(message.guild.id, word),
+                         prefix=guild_config.prefix_for(message.guild),
+                         is_mod=isinstance(message.author, discord.Member) and mod_roles.is_moderator(message.author))
     if message.author.bot:
         return
     
-    if message.content and message.guild and not message.content.startswith(PREFIX):
+    prefix = guild_config.prefix_for(message.guild)
+    if message.content and message.guild and not message.content.startswith(prefix):
         # The bot will send a greeting message in the channel where the user posted
         if message.content.lower().startswith("hello bot"):
             embed = make_embed(
                 title=f"{EMOJI_INFO} Hello, {message.author.display_name}!",
-                description="I am the moderator bot. Type `!modhelp` to see moderation commands."
+                description=f"I am the moderator bot. Type `{prefix}modhelp` to see moderation commands."
             )
             try:
                 await message.channel.send(embed=embed)
-            except:
-                pass
+            except Exception:
+                swallowed("hello_reply")
 
     guild = message.guild
     if guild:
-        gkey = str(guild.id)
-        bl = blacklists.get(gkey, [])
-        content = (message.content or "").lower()
-        trigger = None
-        for bad in bl:
-            if bad and bad.lower() in content:
-                trigger = bad
-                break
+        trigger = blocklist.match(guild.id, message.content or "")
         if trigger:
             try:
                 await message.delete()
             except Exception:
-                pass
+                swallowed("automod_delete")
             # warn the user automatically
             await warn_user(guild, message.author, None, f"Auto-moderation: used blocked word '{trigger}'")
             await log_action(guild, "Auto-moderation", f"Deleted message from {message.author.mention} containing blocked word '{trigger}'.")
-            try:
-                dm = make_embed(
-                    title=f"{EMOJI_WARN} Message removed",
-                    description=f"Your message in **{guild.name}** was removed for containing a blocked word: `{trigger}`.\nPlease follow the server rules."
-                )
-                dm.set_footer(text=f"This message will auto-delete in {AUTO_DELETE_IN_SECONDS}s")
-                await message.author.send(embed=dm)
-            except Exception:
-                pass
+            dm = TEMPLATES["automod_dm"].build(
+                f"{EMOJI_WARN} Message removed",
+                f"Your message in **{guild.name}** was removed for containing a blocked word: `{trigger}`.\nPlease follow the server rules."
+            )
+            dms.send(message.author, embed=dm)
 
     await bot.process_commands(message)
 
+# Keep the moderator-role cache in sync with the guild's roles
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    mod_roles.invalidate(role.guild.id)
+    if recorder:
+        recorder.role(role, "create", is_mod=mod_roles.is_mod_role(role))
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    mod_roles.invalidate(role.guild.id)
+    if recorder:
+        recorder.role(role, "delete", is_mod=mod_roles.is_mod_role(role))
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name or before.position != after.position:
+        mod_roles.invalidate(after.guild.id)
+    if recorder:
+        recorder.role(after, "update", is_mod=mod_roles.is_mod_role(after))
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    members.discard(payload.guild_id, payload.user.id)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    members.forget_guild(guild.id)
+    raids.forget_guild(guild.id)
+
+async def respond_to_raid(guild: discord.Guild, check, joined: discord.Member):
+    """Apply the guild's raid_action to flagged accounts; post one summary when the raid starts."""
+    action = guild_config.value(guild.id, "raid_action")
+    acted = 0
+    if action in ("mute", "quarantine") and check.flagged:
+        role = await ensure_muted_role(guild) if action == "mute" else None
+        for user_id in check.flagged:
+            member = joined if user_id == joined.id else await members.resolve(guild, user_id)
+            if member is None:
+                continue
+            try:
+                if action == "mute" and role:
+                    await member.add_roles(role, reason="Raid detector")
+                elif action == "quarantine":
+                    await member.timeout(timedelta(minutes=RAID_QUARANTINE_MINUTES), reason="Raid detector")
+                acted += 1
+            except Exception:
+                swallowed("raid_response")
+    RAID_FLAGGED.inc(len(check.flagged), action=action)
+    if not check.started:
+        return
+    locked = 0
+    if action == "lockdown":
+        log_name = guild_config.value(guild.id, "log_channel")
+        for channel in guild.text_channels:
+            if channel.name == log_name:
+                continue
+            overwrite = channel.overwrites_for(guild.default_role)
+            overwrite.send_messages = False
+            try:
+                await channel.set_permissions(guild.default_role, overwrite=overwrite, reason="Raid detector")
+                locked += 1
+            except Exception:
+                swallowed("raid_lockdown")
+    lines = [f"**{check.joins}** joins in the last {RAID_WINDOW_SECONDS}s, **{check.young}** from accounts "
+             f"younger than {RAID_ACCOUNT_AGE_DAYS:g} days. Welcomes are skipped for those accounts until it calms down."]
+    if action == "mute":
+        lines.append(f"Muted {acted} of {len(check.flagged)} flagged accounts; new ones are muted as they join.")
+    elif action == "quarantine":
+        lines.append(f"Timed out {acted} of {len(check.flagged)} flagged accounts for {RAID_QUARANTINE_MINUTES} minutes; "
+                     "new ones are timed out as they join.")
+    elif action == "lockdown":
+        lines.append(f"Locked {locked} channels for @everyone; use `unlock` to reopen them.")
+    else:
+        lines.append(f"{len(check.flagged)} accounts flagged; no action taken (`config set raid_action` to change).")
+    await log_action(guild, f"{EMOJI_WARN} Possible raid", "\n".join(lines))
+
 # ———————— welcome new members ————————
 @bot.event
+@timed(EVENT_SECONDS, event="on_member_join")
+@slow_handlers.watch()
 async def on_member_join(member: discord.Member):
     guild = member.guild
+    members.touch(member)
+    if recorder:
+        recorder.join(member, **recorded_blacklist(guild.id), prefix=guild_config.prefix_for(guild))
+    check = raids.observe(guild.id, member.id, member.created_at)
+    if check.flagged or check.started:
+        await respond_to_raid(guild, check, member)
+        if member.id in check.flagged:
+            return  # no welcome for likely raid accounts
     print(f"New member joined: {member} in {guild.name}")
     print(f"Guild has {guild.member_count} members now.")
     print("Attempting to send welcome message...")
@@ -229,7 +666,8 @@ async def on_member_join(member: discord.Member):
                     if msg.author != bot.user:  # ignore bot's own messages
                         target_channel = channel
                         break
-            except:
+            except Exception:
+                swallowed("welcome_history")
                 continue
         if target_channel:
             break
@@ -248,50 +686,39 @@ async def on_member_join(member: discord.Member):
         welcome_text = f"🎉 Everyone welcome {member.mention} to **{guild.name}**! Say hi! 👋"
         try:
             await target_channel.send(welcome_text)
-        except:
-            pass  # silently fail if something weird happens
+        except Exception:
+            swallowed("welcome_send")  # silently fail if something weird happens
 
     # 4. Optional: Still log to mod-log
     await log_action(guild, "Member Joined", f"{member.mention} (`{member.id}`) joined the server. Total members: {guild.member_count}")
 
     # 5. Optional: DM the new member (comment if you needed)
     
-    try:
-        await member.send(f"Welcome to **{guild.name}**! 🎉\nHave fun and follow the rules!")
-    except:
-        pass
+    dms.send(member, f"Welcome to **{guild.name}**! 🎉\nHave fun and follow the rules!")
     
 
 
 # Helper to add a warning
+@slow_handlers.watch()
 async def warn_user(guild: discord.Guild, user: discord.Member, moderator: Optional[discord.Member], reason: str):
-    gkey = str(guild.id)
-    ukey = str(user.id)
-    warnings_db.setdefault(gkey, {})
-    warnings_db[gkey].setdefault(ukey, [])
     entry = {
         "by": moderator.id if moderator else None,
         "by_name": moderator.name if moderator else "Auto",
         "reason": reason,
         "time": datetime.utcnow().isoformat()
     }
-    warnings_db[gkey][ukey].append(entry)
-    save_json(WARNINGS_FILE, warnings_db)
+    count = await in_store_thread(warnings_db.add, guild.id, user.id, entry)
     await log_action(guild, "Warn Issued", f"{user.mention} was warned by {entry['by_name']}: {reason}")
 
     # If warnings reached threshold, send confirmation request to moderators
-    try:
-        count = len(warnings_db[gkey][ukey])
-    except Exception:
-        count = 0
-
-    THRESHOLD = 3
-    if count >= THRESHOLD:
+    cfg = guild_config.get(guild.id)
+    threshold = cfg["warn_threshold"]
+    if count >= threshold:
         # build message and view
-        mod_role = discord.utils.find(lambda r: r.name.lower() in ("moderator", "mod", "mods"), guild.roles)
+        mod_role = mod_roles.mention_role(guild)
         mod_mention = mod_role.mention if mod_role else "@here"
         embed = make_embed(
-            title=f"{EMOJI_WARN} {user.display_name} reached {THRESHOLD} warnings",
+            title=f"{EMOJI_WARN} {user.display_name} reached {threshold} warnings",
             description=f"{user.mention} has accumulated **{count}** warnings.\n\nReason (most recent): {reason}\n\n{mod_mention} — confirm ban?",
             color=discord.Color.red()
         )
@@ -300,9 +727,10 @@ async def warn_user(guild: discord.Guild, user: discord.Member, moderator: Optio
         sent_channel = None
         if ch:
             try:
-                await ch.send(embed=embed, view=ConfirmBanView(guild, user.id))
+                await ch.send(embed=embed, view=ConfirmBanView(guild, user.id, mod_roles, log_channel=cfg["log_channel"], threshold=threshold))
                 sent_channel = ch
             except Exception:
+                swallowed("ban_prompt_modlog")
                 sent_channel = None
 
         if not sent_channel:
@@ -315,9 +743,9 @@ async def warn_user(guild: discord.Guild, user: discord.Member, moderator: Optio
                         break
             if target:
                 try:
-                    await target.send(embed=embed, view=ConfirmBanView(guild, user.id))
+                    await target.send(embed=embed, view=ConfirmBanView(guild, user.id, mod_roles, log_channel=cfg["log_channel"], threshold=threshold))
                 except Exception:
-                    pass
+                    swallowed("ban_prompt")
 
 # Basic moderation commands require appropriate permissions
 
@@ -386,28 +814,38 @@ async def cmd_mute(ctx, member: discord.Member, duration: Optional[int] = None,
         await ctx.send(embed=make_embed(title=f"{EMOJI_WARN} Member Muted", description=desc))
         await log_action(ctx.guild, "Member Muted", f"{member.mention} muted by {ctx.author.mention}. Reason: {reason}")
         if duration and duration > 0:
+            if shared_store:
+                # persisted, so the unmute survives restarts and runs in whichever process owns the guild
+                await shared_store.run(shared_store.schedule_unmute, ctx.guild.id, member.id, role.id, ctx.channel.id, duration)
+                return
             await asyncio.sleep(duration * 60)
-            # check if still muted
-            m = ctx.guild.get_member(member.id)
-            if m and role in m.roles:
-                try:
-                    await m.remove_roles(role, reason="Auto unmute after duration")
-                    await log_action(ctx.guild, "Member Unmuted", f"{m.mention} auto-unmuted after {duration} minutes.")
-                    # notify channel
-                    await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Auto-unmuted", description=f"{m.mention} was auto-unmuted after {duration} minutes."))
-                except Exception:
-                    pass
+            await finish_mute(ctx.guild, member.id, role, ctx.channel, duration)
     except Exception as e:
         await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Failed to mute", description=str(e), color=discord.Color.red()))
 
+async def finish_mute(guild: discord.Guild, member_id: int, role: discord.Role, channel, duration: int):
+    # check if still muted (fetched, so the roles are current even without a member cache)
+    m = await members.resolve(guild, member_id, fresh=True)
+    if m and role in m.roles:
+        try:
+            await m.remove_roles(role, reason="Auto unmute after duration")
+            await log_action(guild, "Member Unmuted", f"{m.mention} auto-unmuted after {duration} minutes.")
+            # notify channel
+            if channel:
+                await channel.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Auto-unmuted", description=f"{m.mention} was auto-unmuted after {duration} minutes."))
+        except Exception:
+            swallowed("auto_unmute")
+
 @bot.command(name="unmute")
 @commands.has_permissions(manage_roles=True)
 async def cmd_unmute(ctx, member: discord.Member):
-    role = discord.utils.get(ctx.guild.roles, name=MUTED_ROLE_NAME)
+    role = discord.utils.get(ctx.guild.roles, name=guild_config.value(ctx.guild.id, "muted_role"))
     if not role:
         return await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Not found", description="Muted role doesn't exist.", color=discord.Color.orange()))
     try:
         await member.remove_roles(role)
+        if shared_store:
+            await shared_store.run(shared_store.cancel_unmute, ctx.guild.id, member.id)
         await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Member Unmuted", description=f"{member.mention} has been unmuted."))
         await log_action(ctx.guild, "Member Unmuted", f"{member.mention} unmuted by {ctx.author.mention}.")
     except Exception as e:
@@ -426,12 +864,9 @@ async def cmd_warnings(ctx, member: Optional[discord.Member] = None):
     If a member is provided: show that member's warnings.
     If no member provided: list all users in this guild who have warnings (with counts).
     """
-    gkey = str(ctx.guild.id)
-
     # If a specific member was requested, show their warnings
     if member:
-        ukey = str(member.id)
-        user_warnings = warnings_db.get(gkey, {}).get(ukey, [])
+        user_warnings = await in_store_thread(warnings_db.user, ctx.guild.id, member.id)
         if not user_warnings:
             return await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} No warnings", description=f"{member.mention} has no warnings.", color=discord.Color.green()))
         lines = []
@@ -442,13 +877,13 @@ async def cmd_warnings(ctx, member: Optional[discord.Member] = None):
         return await ctx.send(embed=embed)
 
     # No member provided: list all warned users in the guild
-    guild_warns = warnings_db.get(gkey, {})
+    guild_warns = await in_store_thread(warnings_db.guild, ctx.guild.id)
     # build a list of users with non-empty warnings
     warned = []
-    for uid, entries in guild_warns.items():
+    for uid, entries in list(guild_warns.items()):  # the store's thread may add to it meanwhile
         if entries:
-            member_obj = ctx.guild.get_member(int(uid))
-            display = member_obj.mention if member_obj else f"<@{uid}"
+            member_obj = members.get(ctx.guild, int(uid))
+            display = member_obj.mention if member_obj else f"<@{uid}>"
             warned.append((display, len(entries)))
 
     if not warned:
@@ -463,6 +898,7 @@ async def cmd_warnings(ctx, member: Optional[discord.Member] = None):
 
 @bot.command(name="banned")
 @commands.has_permissions(ban_members=True)
+@throttled("banned")
 async def cmd_banned(ctx):
     """
     Lists users currently banned from the guild (shows username#discriminator and reason if present).
@@ -491,14 +927,39 @@ async def cmd_banned(ctx):
     embed = make_embed(title=f"{EMOJI_WARN} Banned users ({len(bans)})", description="\n".join(lines) + more)
     await ctx.send(embed=embed)
 
+@bot.command(name="export")
+@commands.has_permissions(ban_members=True)
+@commands.max_concurrency(1, per=commands.BucketType.guild, wait=False)
+async def cmd_export(ctx, fmt: str = "jsonl"):
+    """
+    Export this server's warnings, bans and moderation audit log (newest entries, see exporter.AUDIT_LIMIT)
+    as a gzipped JSONL or CSV file.
+    """
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Unknown format", description=f"Use one of: {', '.join(EXPORT_FORMATS)}.", color=discord.Color.red()))
+    # streamed to a temp file rather than memory; removed once uploaded
+    fd, path = tempfile.mkstemp(prefix="modbot-export-", suffix=f".{fmt}.gz")
+    os.close(fd)
+    try:
+        try:
+            count = await write_export(moderation_rows(ctx.guild, await in_store_thread(warnings_db.guild, ctx.guild.id)), path, fmt)
+        except discord.HTTPException as e:
+            return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Export failed", description=str(e), color=discord.Color.red()))
+        size = os.path.getsize(path)
+        if size > ctx.guild.filesize_limit:
+            return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Export too large", description=f"{count} rows compress to {size // 1024} KiB, over this server's upload limit.", color=discord.Color.red()))
+        filename = f"moderation-{ctx.guild.id}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}.gz"
+        await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Export ready", description=f"{count} rows (warnings, bans and audit-log entries)."),
+                       file=discord.File(path, filename=filename))
+        await log_action(ctx.guild, "Moderation Export", f"{ctx.author.mention} exported {count} moderation records ({fmt}).")
+    finally:
+        os.remove(path)
+
 @bot.command(name="clearwarns")
 @commands.has_permissions(kick_members=True)
 async def cmd_clearwarns(ctx, member: discord.Member):
-    gkey = str(ctx.guild.id)
-    ukey = str(member.id)
-    if gkey in warnings_db and ukey in warnings_db[gkey]:
-        warnings_db[gkey][ukey] = []
-        save_json(WARNINGS_FILE, warnings_db)
+    if await in_store_thread(warnings_db.clear_user, ctx.guild.id, member.id):
         await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Cleared warnings", description=f"Cleared warnings for {member.mention}."))
         await log_action(ctx.guild, "Warnings Cleared", f"Warnings for {member.mention} cleared by {ctx.author.mention}.")
     else:
@@ -506,6 +967,7 @@ async def cmd_clearwarns(ctx, member: discord.Member):
 
 @bot.command(name="purge")
 @commands.has_permissions(manage_messages=True)
+@throttled("purge")
 async def cmd_purge(ctx, amount: int = 10):
     if amount < 1 or amount > 100:
         return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Invalid amount", description="Amount must be between 1 and 100.", color=discord.Color.orange()))
@@ -700,6 +1162,7 @@ async def cmd_addrole(ctx, member: discord.Member, *, rolename: str):
 # ———————— SET PERMISSIONS ON EXISTING ROLE ————————
 @bot.command(name="setperms")
 @commands.has_permissions(manage_roles=True)
+@throttled("setperms")
 async def cmd_setperms(ctx, role_name: str, *, permissions: str = None):
     """
     Sets permissions on an existing role.
@@ -774,7 +1237,21 @@ async def cmd_setperms(ctx, role_name: str, *, permissions: str = None):
         await ctx.send("Failed — I don't have permission to edit this role!")
 
 # ————————  SHOW ROLE INFO (permissions + details) ————————
+def recent_role_counts(guild: discord.Guild) -> tuple:
+    """(Counter of role id -> holders, active members) over the member LRU, in one pass."""
+    recent = members.recent(guild)
+    return Counter(r.id for m in recent for r in m.roles), len(recent)
+
+def role_member_count(guild: discord.Guild, role: discord.Role, recent: Optional[tuple] = None) -> str:
+    """`recent` is a recent_role_counts() result, for callers counting many roles at once."""
+    if MEMBER_CACHE == "full":
+        return str(len(role.members))
+    # no member list in lean mode: count among recently active members only
+    counts, active = recent or recent_role_counts(guild)
+    return f"{counts[role.id]} of {active} active"
+
 @bot.command(name="roleinfo")
+@throttled("roleinfo")
 async def cmd_roleinfo(ctx, *, role_name: str):
     """Shows full info + current permissions of any role"""
 
@@ -808,7 +1285,7 @@ async def cmd_roleinfo(ctx, *, role_name: str):
         return await ctx.send(f"Role `{role_name}` not found!")
 
     # Count members with the role
-    members_with_role = len([m for m in ctx.guild.members if role in m.roles])
+    members_with_role = role_member_count(ctx.guild, role)
 
     # List enabled permissions
     enabled = [perm.replace("_", " ").title() for perm, value in role.permissions if value]
@@ -840,17 +1317,19 @@ async def cmd_roleinfo(ctx, *, role_name: str):
 
 # ———————— LIST ALL ROLES (with member count) ————————
 @bot.command(name="listroles")
+@throttled("listroles")
 async def cmd_listroles(ctx):
     """Shows all roles in order (top to bottom) with member count"""
     if not ctx.guild.roles:
         return await ctx.send("No roles found.")
 
+    recent = recent_role_counts(ctx.guild) if MEMBER_CACHE != "full" else None
     lines = []
     for role in reversed(ctx.guild.roles):  # Top → bottom
         if role.name == "@everyone":
             member_count = ctx.guild.member_count
         else:
-            member_count = len(role.members)
+            member_count = role_member_count(ctx.guild, role, recent)
 
         lines.append(f"{role.position:2d}. {role.mention} — **{member_count}** members")
 
@@ -881,68 +1360,192 @@ async def cmd_removerole(ctx, member: discord.Member, *, rolename: str):
 @bot.group(name="blacklist", invoke_without_command=True)
 @commands.has_permissions(manage_guild=True)
 async def cmd_blacklist(ctx):
-    bl = blacklists.get(str(ctx.guild.id), [])
-    if not bl:
-        await ctx.send("No blacklisted words.")
-    else:
-        await ctx.send("Blacklisted words: " + ", ".join(bl))
+    await load_guild_blocklist(ctx.guild.id)
+    bl = blocklist.added(ctx.guild.id)
+    shared = len(blocklist.global_tier)
+    lines = ["Blacklisted words: " + ", ".join(bl) if bl else "No blacklisted words."]
+    if shared:
+        exempt = blocklist.exemptions(ctx.guild.id)
+        lines.append(f"Plus {shared - len(exempt)} words from the shared blocklist"
+                     + (f" (turned off here: {', '.join(exempt)})." if exempt else "."))
+    await ctx.send("\n".join(lines))
 
 @cmd_blacklist.command(name="add")
 @commands.has_permissions(manage_guild=True)
 async def cmd_blacklist_add(ctx, *, word: str):
-    gkey = str(ctx.guild.id)
-    blacklists.setdefault(gkey, [])
-    if word.lower() in (w.lower() for w in blacklists[gkey]):
+    if not await add_blacklist_word(ctx.guild.id, word):
         await ctx.send("Word already blacklisted.")
         return
-    blacklists[gkey].append(word)
-    save_json(BLACKLIST_FILE, blacklists)
     await ctx.send(f"Added '{word}' to blacklist.")
     await log_action(ctx.guild, "Blacklist Added", f"'{word}' added to blacklist by {ctx.author.mention}")
 
 @cmd_blacklist.command(name="remove")
 @commands.has_permissions(manage_guild=True)
 async def cmd_blacklist_remove(ctx, *, word: str):
-    gkey = str(ctx.guild.id)
-    if word in blacklists.get(gkey, []):
-        blacklists[gkey].remove(word)
-        save_json(BLACKLIST_FILE, blacklists)
+    if await remove_blacklist_word(ctx.guild.id, word):
         await ctx.send(f"Removed '{word}' from blacklist.")
         await log_action(ctx.guild, "Blacklist Removed", f"'{word}' removed from blacklist by {ctx.author.mention}")
     else:
         await ctx.send("Word not found in blacklist.")
 
+# Per-guild configuration
+@bot.group(name="config", invoke_without_command=True)
+@commands.has_permissions(manage_guild=True)
+async def cmd_config(ctx):
+    cfg = guild_config.get(ctx.guild.id)
+    overridden = guild_config.overrides(ctx.guild.id)
+    lines = []
+    for key, value in cfg.items():
+        shown = ", ".join(str(v) for v in value) if isinstance(value, list) else value
+        marker = "" if key in overridden else " *(default)*"
+        lines.append(f"`{key}` = `{shown}`{marker}")
+    await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Bot settings for {ctx.guild.name}", description="\n".join(lines)))
+
+@cmd_config.command(name="set")
+@commands.has_permissions(manage_guild=True)
+async def cmd_config_set(ctx, key: str, *, value: str):
+    key = key.lower()
+    try:
+        parsed = guild_config.coerce(key, value)
+    except KeyError:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Unknown setting", description=f"Valid settings: {', '.join(f'`{k}`' for k in guild_config.defaults)}", color=discord.Color.orange()))
+    except ValueError as e:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Invalid value", description=str(e), color=discord.Color.orange()))
+    guild_config.set(ctx.guild.id, key, parsed)
+    mod_roles.invalidate(ctx.guild.id)
+    await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Setting updated", description=f"`{key}` is now `{value}`."))
+    await log_action(ctx.guild, "Config Changed", f"{ctx.author.mention} set `{key}` to `{value}`")
+
+@cmd_config.command(name="reset")
+@commands.has_permissions(manage_guild=True)
+async def cmd_config_reset(ctx, key: Optional[str] = None):
+    if key and key.lower() not in guild_config.defaults:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Unknown setting", description=f"Valid settings: {', '.join(f'`{k}`' for k in guild_config.defaults)}", color=discord.Color.orange()))
+    guild_config.reset(ctx.guild.id, key.lower() if key else None)
+    mod_roles.invalidate(ctx.guild.id)
+    what = f"`{key.lower()}`" if key else "All settings"
+    await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Setting reset", description=f"{what} restored to default."))
+    await log_action(ctx.guild, "Config Reset", f"{ctx.author.mention} reset {what}")
+
+@cmd_config.command(name="reload")
+@commands.is_owner()
+async def cmd_config_reload(ctx):
+    reload_global_blocklist(force=True)
+    if guild_config.reload():
+        mod_roles.clear()
+        await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Config reloaded", description=f"Reloaded `{os.path.basename(CONFIG_FILE)}`."))
+    else:
+        await ctx.send(embed=make_embed(title=f"{EMOJI_ERROR} Reload failed", description="Config file is invalid; keeping current settings.", color=discord.Color.red()))
+
+# Profiling (bot owner only)
+@bot.group(name="profile", invoke_without_command=True)
+@commands.is_owner()
+async def cmd_profile(ctx, seconds: int = PROFILE_DEFAULT_SECONDS):
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    path = start_profile(seconds)
+    if not path:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Already profiling", description="A profiling window is already running.", color=discord.Color.gold()))
+    await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Profiling started", description=f"Sampling the event loop for {seconds}s."))
+    await profiler.wait()
+    top = profiler.handlers.most_common(8)
+    lines = [f"`{name}` — {count * 100 // max(profiler.samples, 1)}%" for name, count in top]
+    await ctx.send(embed=make_embed(
+        title=f"{EMOJI_SUCCESS} Profile written",
+        description=f"`{os.path.relpath(path, DATA_DIR)}` ({profiler.samples} samples)\n\n" + "\n".join(lines)
+    ))
+
+@cmd_profile.command(name="stop")
+@commands.is_owner()
+async def cmd_profile_stop(ctx):
+    if not profiler.running:
+        return await ctx.send("No profiling window is running.")
+    profiler.stop()
+    await ctx.send("Stopping profiler; the partial profile will be written.")
+
+@cmd_profile.command(name="lag")
+@commands.is_owner()
+async def cmd_profile_lag(ctx):
+    lines = [
+        f"Last: **{loop_lag.last_lag * 1000:.1f} ms** | Max: **{loop_lag.max_lag * 1000:.1f} ms** | Alerts: {loop_lag.alerts}",
+        f"Alert threshold: {LOOP_LAG_ALERT_MS} ms",
+    ]
+    if slow_callbacks is None:
+        lines.append("Slow-callback reports are off (set `LOOP_DEBUG=1`).")
+    else:
+        for seconds, when, what in slow_callbacks.slowest():
+            lines.append(f"`{when:%H:%M:%S}` {seconds * 1000:.0f} ms — `{what[:150]}`")
+    await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Event loop lag", description="\n".join(lines)))
+
+@cmd_profile.command(name="slow")
+@commands.is_owner()
+async def cmd_profile_slow(ctx):
+    if not slow_handlers.recent:
+        return await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} No slow handlers", description=f"Nothing over {SLOW_HANDLER_MS} ms so far.", color=discord.Color.green()))
+    lines = []
+    for when, handler, guild, seconds in reversed(slow_handlers.recent):
+        where = guild.name if guild is not None else "no guild"
+        lines.append(f"`{when:%H:%M:%S}` **{handler}** — {seconds * 1000:.0f} ms in {where}")
+    await ctx.send(embed=make_embed(title=f"{EMOJI_WARN} Slow handlers (> {SLOW_HANDLER_MS} ms)", description="\n".join(lines[:20])))
+
+# Traffic capture (bot owner only)
+@bot.group(name="traffic", invoke_without_command=True)
+@commands.is_owner()
+async def cmd_traffic(ctx):
+    if recorder:
+        await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Recording traffic", description=f"`{recorder.path}` — {recorder.events} events so far."))
+    else:
+        await ctx.send(embed=make_embed(title=f"{EMOJI_INFO} Not recording", description="Use `traffic start` to capture sanitized events.", color=discord.Color.gold()))
+
+@cmd_traffic.command(name="start")
+@commands.is_owner()
+async def cmd_traffic_start(ctx):
+    path = os.path.join(TRAFFIC_DIR, f"traffic-{datetime.utcnow():%Y%m%d-%H%M%S}.jsonl")
+    start_recording(path)
+    await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Recording started", description=f"Writing to `{os.path.relpath(path, DATA_DIR)}`."))
+
+@cmd_traffic.command(name="stop")
+@commands.is_owner()
+async def cmd_traffic_stop(ctx):
+    old = stop_recording()
+    if not old:
+        return await ctx.send("Not recording.")
+    await ctx.send(embed=make_embed(title=f"{EMOJI_SUCCESS} Recording stopped", description=f"{old.events} events written to `{os.path.relpath(old.path, DATA_DIR)}`."))
+
 # Small help override to show basic commands
 @bot.command(name="modhelp")
 async def cmd_help(ctx):
+    p = ctx.clean_prefix
     text = (
         f"""
-        Moderation commands (prefix {PREFIX}):
-        `!kick @user [reason]` - Kick a member
-        `!ban @user [reason]` - Ban a member
-        `!unban username#discriminator` - Unban a member
-        `!mute @user [duration_minutes] [reason]` - Mute a member
-        `!unmute @user` - Unmute a member
-        `!warn @user [reason]` - Warn a member
-        `!warnings @user` - List warnings for a member
-        `!warnings` - List members with warnings
-        `!banned` - List banned users
-        `!clearwarns @user` - Clear warnings for a member
-        `!purge [amount]` - Delete recent messages
-        `!lock [#channel]` - Lock a channel
-        `!unlock [#channel]` - Unlock a channel
-        `!addrole @user RoleName` - Add a role to a user (creates role if missing)
-        `!removerole @user RoleName` - Remove a role from a user
-        `!createrole RoleName [options]` - Create a new role with options
-        `!setperms RoleName permissions` - Set permissions on an existing role
-        `!roleinfo RoleName` - Show info about a role
-        `!listroles` - List all roles in the server
-        `!blacklist` - Show blacklisted words
-        `!blacklist add word` - Add a word to the blacklist
-        `!blacklist remove word` - Remove a word from the blacklist
-        `!modhelp` - Show this help message
-        `!assign @user RoleName` - Assign a role to a user
-        `!remove @user RoleName` - Remove a role from a user
+        Moderation commands (prefix {p}):
+        `{p}kick @user [reason]` - Kick a member
+        `{p}ban @user [reason]` - Ban a member
+        `{p}unban username#discriminator` - Unban a member
+        `{p}mute @user [duration_minutes] [reason]` - Mute a member
+        `{p}unmute @user` - Unmute a member
+        `{p}warn @user [reason]` - Warn a member
+        `{p}warnings @user` - List warnings for a member
+        `{p}warnings` - List members with warnings
+        `{p}banned` - List banned users
+        `{p}clearwarns @user` - Clear warnings for a member
+        `{p}purge [amount]` - Delete recent messages
+        `{p}lock [#channel]` - Lock a channel
+        `{p}unlock [#channel]` - Unlock a channel
+        `{p}addrole @user RoleName` - Add a role to a user (creates role if missing)
+        `{p}removerole @user RoleName` - Remove a role from a user
+        `{p}createrole RoleName [options]` - Create a new role with options
+        `{p}setperms RoleName permissions` - Set permissions on an existing role
+        `{p}roleinfo RoleName` - Show info about a role
+        `{p}listroles` - List all roles in the server
+        `{p}blacklist` - Show blacklisted words
+        `{p}blacklist add word` - Add a word to the blacklist
+        `{p}blacklist remove word` - Remove a word from the blacklist (shared words are turned off for this server)
+        `{p}modhelp` - Show this help message
+        `{p}assign @user RoleName` - Assign a role to a user
+        `{p}remove @user RoleName` - Remove a role from a user
+        `{p}config` - Show this server's bot settings
+        `{p}config set key value` - Change a setting (`{p}config reset key` to restore default)
+        `{p}export [jsonl|csv]` - Download warnings, bans and moderation history
         """
     )
     await ctx.send(embed = make_embed(title="Moderator Bot Help", description=text))
@@ -950,12 +1553,17 @@ async def cmd_help(ctx):
 # Error handlers
 @bot.event
 async def on_command_error(ctx, error):
+    COMMAND_ERRORS.inc(error=type(error).__name__)
     if isinstance(error, commands.MissingPermissions):
         await ctx.send("You do not have permission to use this command.")
     elif isinstance(error, commands.MissingRequiredArgument):
         await ctx.send("Missing argument for command.")
     elif isinstance(error, commands.BadArgument):
         await ctx.send("Bad argument type passed.")
+    elif isinstance(error, commands.MaxConcurrencyReached):
+        await ctx.send(f"`{ctx.command}` is already running in this server; try again when it finishes.")
+    elif isinstance(error, commands.CommandOnCooldown):
+        await ctx.send(f"`{ctx.command}` is on cooldown; try again in {error.retry_after:.0f}s.", delete_after=10)
     else:
         # fallback - log to mod channel if possible
         await log_action(ctx.guild or ctx.author, "Command Error", f"Error running command {ctx.command}: {error}")
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+RAID_ACTIONS = ("alert", "mute", "quarantine", "lockdown")
+
+
+class RaidCheck(NamedTuple):
+    flagged: tuple  # user ids to act on now
+    started: bool  # this join tripped the detector
+    joins: int  # joins in the window, this one included
+    young: int  # of which from accounts younger than the age limit
+
+
+class _JoinWindow:
+    __slots__ = ("joins", "young", "until")
+
+    def __init__(self):
+        self.joins = deque()  # (monotonic time, user id, is young)
+        self.young = 0
+        self.until = 0.0  # raid mode lasts until this monotonic time
+
+
+class RaidDetector:
+    """Per-guild sliding windows over recent joins, to spot raids as they start.
+
+    A guild enters raid mode when `max_joins` members join within `window` seconds, or
+    `max_young` of them have accounts younger than `young_days`. While it's in raid
+    mode (until `cooldown` seconds after the thresholds were last exceeded), every
+    young account that joins is flagged.
+
+    Each join costs O(1) amortized: expired joins drop off the front of the window and
+    the young-account count is kept as a running total. At most `max_tracked` joins are
+    kept per guild, and idle guilds beyond `max_guilds` are forgotten.
+    """
+
+    def __init__(self, *, window: float = 10.0, max_joins: int = 10, max_young: int = 4, young_days: float = 7.0,
+                 cooldown: float = 300.0, max_tracked: int = 1000, max_guilds: int = 10_000):
+        self.window = window
+        self.max_joins = max_joins
+        self.max_young = max_young
+        self.young_days = young_days
+        self.cooldown = cooldown
+        self.max_tracked = max_tracked
+        self.max_guilds = max_guilds
+        self._guilds = OrderedDict()
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def observe(self, guild_id: int, user_id: int, created_at: datetime, now: Optional[float] = None) -> RaidCheck:
+        now = time.monotonic() if now is None else now
+        young = time.time() - created_at.timestamp() < self.young_days * 86400
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _JoinWindow()
+            if len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+        else:
+            self._guilds.move_to_end(guild_id)
+
+        joins = state.joins
+        while joins and (joins[0][0] <= now - self.window or len(joins) >= self.max_tracked):
+            if joins.popleft()[2]:
+                state.young -= 1
+        joins.append((now, user_id, young))
+        state.young += young
+
+        tripped = len(joins) >= self.max_joins or state.young >= self.max_young
+        if state.until > now:
+            if tripped:
+                state.until = now + self.cooldown
+            return RaidCheck((user_id,) if young else (), False, len(joins), state.young)
+        if tripped:
+            state.until = now + self.cooldown
+            # the young accounts that got in before the threshold was reached are flagged too
+            return RaidCheck(tuple(uid for _, uid, y in joins if y), True, len(joins), state.young)
+        return RaidCheck((), False, len(joins), state.young)
+
+    def active(self, guild_id: int, now: Optional[float] = None) -> bool:
+        state = self._guilds.get(guild_id)
+        return state is not None and state.until > (time.monotonic() if now is None else now)
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def clear(self):
+        self._guilds.clear()
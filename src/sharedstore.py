@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_guild_user ON warnings (guild_id, user_id);
+CREATE TABLE IF NOT EXISTS blacklist (
+    guild_id INTEGER NOT NULL,
+    word TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (guild_id, word)
+);
+CREATE TABLE IF NOT EXISTS blacklist_exempt (
+    guild_id INTEGER NOT NULL,
+    word TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (guild_id, word)
+);
+CREATE TABLE IF NOT EXISTS mutes (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    minutes INTEGER NOT NULL,
+    until REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS mutes_until ON mutes (until);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    at REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """Warnings, blacklists and mute schedules in one SQLite database (WAL mode) that
+    several bot processes on the same host can use at once.
+
+    Each process caches the warnings it reads (blacklists are cached by the caller's
+    LayeredBlocklist). Every write also appends a row to `changes`; `poll_changes()`
+    reads the rows written by *other* processes, drops the matching warnings and
+    reports the rest. With sharding a guild normally belongs to one process, so this
+    only matters when shards move between processes (restarts, rebalancing).
+
+    The methods are blocking. From async code, call them through `run()`, which uses
+    the store's own thread. A writer waiting for another process's lock then holds up
+    only that thread: the busy timeout is short, and retried with backoff up to
+    `lock_wait` seconds.
+    """
+
+    def __init__(self, path: str, *, origin: Optional[str] = None,
+                 observe: Optional[Callable[[float], None]] = None, busy_timeout: float = 0.25, lock_wait: float = 10.0):
+        self.path = path
+        self.origin = origin or f"{socket.gethostname()}:{os.getpid()}"
+        self.observe = observe  # called with the seconds spent in each write transaction
+        self.lock_wait = lock_wait
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # autocommit mode; writes use explicit BEGIN IMMEDIATE transactions
+        self.db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._seen = self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-store")
+        self.warnings = SharedWarnings(self)
+
+    async def run(self, fn: Callable, *args):
+        """`fn(*args)` on the store's thread, so the event loop never waits on SQLite."""
+        return await asyncio.get_running_loop().run_in_executor(self._thread, functools.partial(fn, *args))
+
+    def call(self, fn: Callable, *args):
+        """`fn(*args)` on the store's thread, waiting for the result; for sync callers on the event loop."""
+        return self._thread.submit(fn, *args).result()
+
+    def close(self):
+        self._thread.shutdown()
+        self.db.close()
+
+    def _begin(self):
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while True:
+            try:
+                self.db.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                # another process holds the write lock past the busy timeout
+                if "locked" not in str(e) or time.monotonic() + delay > deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    @contextmanager
+    def _write(self, guild_id: int, kind: str):
+        start = time.perf_counter()
+        self._begin()
+        try:
+            yield self.db
+            self.db.execute("INSERT INTO changes (guild_id, kind, origin, at) VALUES (?, ?, ?, ?)",
+                            (guild_id, kind, self.origin, time.time()))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        if self.observe:
+            self.observe(time.perf_counter() - start)
+
+    # ---------- cross-process invalidation ----------
+    def poll_changes(self) -> List[Tuple[int, str]]:
+        """Drop cached warnings that another process changed; returns [(guild_id, kind)] for
+        every change, so callers can drop what they cache themselves."""
+        rows = self.db.execute("SELECT seq, guild_id, kind, origin FROM changes WHERE seq > ? ORDER BY seq",
+                               (self._seen,)).fetchall()
+        changed = []
+        for seq, guild_id, kind, origin in rows:
+            self._seen = seq
+            if origin == self.origin:
+                continue
+            if kind == "warnings":
+                self.warnings.unload(guild_id)
+            changed.append((guild_id, kind))
+        return changed
+
+    def prune_changes(self, older_than: float = 3600):
+        self.db.execute("DELETE FROM changes WHERE at < ?", (time.time() - older_than,))
+
+    # ---------- blacklists ----------
+    def blacklist(self, guild_id) -> list:
+        rows = self.db.execute("SELECT word FROM blacklist WHERE guild_id = ? ORDER BY rowid", (int(guild_id),))
+        return [w for (w,) in rows]
+
+    def blacklist_delta(self, guild_id) -> tuple:
+        """(the guild's own words, global words it turned off): a LayeredBlocklist loader."""
+        return self.blacklist(guild_id), self.blacklist_exemptions(guild_id)
+
+    def blacklist_add(self, guild_id, word: str) -> bool:
+        """False if the word (case-insensitively) is already listed."""
+        gid = int(guild_id)
+        with self._write(gid, "blacklist") as db:
+            added = db.execute("INSERT OR IGNORE INTO blacklist (guild_id, word) VALUES (?, ?)", (gid, word)).rowcount
+        return bool(added)
+
+    def blacklist_remove(self, guild_id, word: str) -> bool:
+        gid = int(guild_id)
+        with self._write(gid, "blacklist") as db:
+            removed = db.execute("DELETE FROM blacklist WHERE guild_id = ? AND word = ?", (gid, word)).rowcount
+        return bool(removed)
+
+    def blacklist_exemptions(self, guild_id) -> list:
+        """Words of the global blocklist that this guild has turned off."""
+        rows = self.db.execute("SELECT word FROM blacklist_exempt WHERE guild_id = ? ORDER BY rowid", (int(guild_id),))
+        return [w for (w,) in rows]
+
+    def blacklist_exempt(self, guild_id, word: str, exempt: bool = True):
+        """Turn a global word off (or back on) for one guild; a guild copy of the word is dropped too."""
+        gid = int(guild_id)
+        with self._write(gid, "blacklist") as db:
+            if exempt:
+                db.execute("INSERT OR IGNORE INTO blacklist_exempt (guild_id, word) VALUES (?, ?)", (gid, word))
+                db.execute("DELETE FROM blacklist WHERE guild_id = ? AND word = ?", (gid, word))
+            else:
+                db.execute("DELETE FROM blacklist_exempt WHERE guild_id = ? AND word = ?", (gid, word))
+
+    # ---------- migration ----------
+    def is_empty(self) -> bool:
+        return not self.db.execute("SELECT EXISTS (SELECT 1 FROM warnings) OR EXISTS (SELECT 1 FROM blacklist)").fetchone()[0]
+
+    def import_legacy(self, blacklists: dict, warnings: dict, exemptions: Optional[dict] = None) -> bool:
+        """Copy file-based data ({guild_id: [words]}, {guild_id: {user_id: [entries]}}, and
+        {guild_id: [exempt global words]}) into an empty database. Runs in one transaction,
+        so concurrent workers import it only once."""
+        self._begin()
+        try:
+            used = self.db.execute("SELECT EXISTS (SELECT 1 FROM warnings) OR EXISTS (SELECT 1 FROM blacklist)").fetchone()[0]
+            if not used:
+                # placeholder keys (e.g. "guild_id_1" from the .template files) are skipped
+                self.db.executemany("INSERT OR IGNORE INTO blacklist (guild_id, word) VALUES (?, ?)",
+                                    [(int(g), w) for g, words in blacklists.items() if str(g).isdigit()
+                                     for w in words if w])
+                self.db.executemany("INSERT OR IGNORE INTO blacklist_exempt (guild_id, word) VALUES (?, ?)",
+                                    [(int(g), w) for g, words in (exemptions or {}).items() if str(g).isdigit()
+                                     for w in words if w])
+                self.db.executemany("INSERT INTO warnings (guild_id, user_id, entry) VALUES (?, ?, ?)",
+                                    [(int(g), int(u), json.dumps(e)) for g, users in warnings.items() if str(g).isdigit()
+                                     for u, entries in users.items() if str(u).isdigit() for e in entries])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return not used
+
+    # ---------- mute schedules ----------
+    def schedule_unmute(self, guild_id, user_id, role_id, channel_id, minutes: int):
+        with self._write(int(guild_id), "mutes") as db:
+            db.execute("INSERT OR REPLACE INTO mutes (guild_id, user_id, role_id, channel_id, minutes, until) VALUES (?, ?, ?, ?, ?, ?)",
+                       (int(guild_id), int(user_id), int(role_id), channel_id, minutes, time.time() + minutes * 60))
+
+    def cancel_unmute(self, guild_id, user_id) -> bool:
+        with self._write(int(guild_id), "mutes") as db:
+            return bool(db.execute("DELETE FROM mutes WHERE guild_id = ? AND user_id = ?",
+                                   (int(guild_id), int(user_id))).rowcount)
+
+    def due_unmutes(self, guild_ids: Iterable[int], now: Optional[float] = None) -> list:
+        """[(guild_id, user_id, role_id, channel_id, minutes)] that are due, limited to `guild_ids`
+        (the guilds this process owns)."""
+        owned = set(guild_ids)
+        rows = self.db.execute("SELECT guild_id, user_id, role_id, channel_id, minutes FROM mutes WHERE until <= ?",
+                               (now if now is not None else time.time(),)).fetchall()
+        return [row for row in rows if row[0] in owned]
+
+
+class SharedWarnings:
+    """Same interface as warnstore.WarningStore, backed by a SharedStore."""
+
+    def __init__(self, store: SharedStore):
+        self.store = store
+        self._guilds = {}  # {guild_id str: {user_id str: [entries]}}
+
+    async def run(self, fn: Callable, *args):
+        return await self.store.run(fn, *args)
+
+    def guild(self, guild_id) -> dict:
+        gkey = str(guild_id)
+        users = self._guilds.get(gkey)
+        if users is None:
+            users = {}
+            rows = self.store.db.execute("SELECT user_id, entry FROM warnings WHERE guild_id = ? ORDER BY id", (int(gkey),))
+            for user_id, entry in rows:
+                users.setdefault(str(user_id), []).append(json.loads(entry))
+            self._guilds[gkey] = users
+        return users
+
+    def user(self, guild_id, user_id) -> list:
+        return self.guild(guild_id).get(str(user_id), [])
+
+    def loaded(self) -> dict:
+        return self._guilds
+
+    def add(self, guild_id, user_id, entry: dict) -> int:
+        entries = self.guild(guild_id).setdefault(str(user_id), [])
+        with self.store._write(int(guild_id), "warnings") as db:
+            db.execute("INSERT INTO warnings (guild_id, user_id, entry) VALUES (?, ?, ?)",
+                       (int(guild_id), int(user_id), json.dumps(entry)))
+        entries.append(entry)
+        return len(entries)
+
+    def clear_user(self, guild_id, user_id) -> bool:
+        users = self.guild(guild_id)
+        if not users.get(str(user_id)):
+            return False
+        with self.store._write(int(guild_id), "warnings") as db:
+            db.execute("DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (int(guild_id), int(user_id)))
+        del users[str(user_id)]
+        return True
+
+    def unload(self, guild_id=None):
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(str(guild_id), None)
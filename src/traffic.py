@@ -0,0 +1,140 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import secrets
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+FORMAT_VERSION = 1
+
+
+def sanitize_content(content: str, keep: Union[Iterable[str], Callable[[str], object]] = (), prefix: Optional[str] = None,
+                     pseudonym=None) -> str:
+    """Blank out message text while keeping what the bot reacts to.
+
+    Words are replaced by `x` runs of the same length, except words containing a
+    blacklisted entry and the command name of prefixed commands. User/role/channel
+    mentions are kept as mentions with pseudonymous IDs. `keep` is the blacklisted
+    entries, or a predicate telling whether a (lowercased) word contains one.
+    """
+    if callable(keep):
+        is_kept = keep
+    else:
+        entries = [k.lower() for k in keep if k]
+        is_kept = lambda lowered: any(k in lowered for k in entries)  # noqa: E731
+    out = []
+    for i, word in enumerate(content.split(" ")):
+        lowered = word.lower()
+        if not word:
+            out.append(word)
+        elif i == 0 and prefix and word.startswith(prefix):
+            out.append(word)
+        elif word.startswith("<") and word.endswith(">") and pseudonym is not None:
+            head = word[:3] if word[:3] in ("<@!", "<@&") else word[:2]
+            digits = word[len(head):-1]
+            out.append(f"{head}{pseudonym(int(digits))}>" if digits.isdigit() else "x" * len(word))
+        elif is_kept(lowered):
+            out.append(word)
+        else:
+            out.append("x" * len(word))
+    return " ".join(out)
+
+
+class TrafficRecorder:
+    """Writes a sanitized, line-delimited record of gateway events.
+
+    IDs are replaced by keyed hashes (the key is random per recording and never
+    written), so a file can't be joined back to real users. Each line is a compact
+    JSON object with `t` = seconds since the recording started and `e` = event kind.
+    """
+
+    def __init__(self, path: str, *, flush_every: int = 100, global_blacklist: Iterable[str] = ()):
+        self.path = path
+        self.flush_every = flush_every
+        self._key = secrets.token_bytes(16)
+        self._start = time.monotonic()
+        self._seen_guilds = set()
+        self._pending = 0
+        self.events = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        self._write({"e": "header", "v": FORMAT_VERSION, "started": datetime.now(timezone.utc).isoformat()})
+        global_blacklist = list(global_blacklist)
+        if global_blacklist:  # written once; guild lines only carry their own additions/exemptions
+            self._write({"e": "blocklist", "words": global_blacklist})
+
+    def pseudonym(self, snowflake: int) -> int:
+        digest = hmac.new(self._key, str(snowflake).encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:6], "big")
+
+    def _write(self, entry: dict):
+        entry.setdefault("t", round(time.monotonic() - self._start, 4))
+        self._file.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._file.flush()
+            self._pending = 0
+
+    def guild(self, guild, *, blacklist=(), exempt=(), prefix: str = "!"):
+        """Record a guild's shape once, the first time one of its events is seen.
+
+        `blacklist` and `exempt` may be zero-argument callables, so callers can pass them
+        on every event and they are only evaluated here, once per guild.
+        """
+        if guild.id in self._seen_guilds:
+            return
+        self._seen_guilds.add(guild.id)
+        entry = {"e": "guild", "g": self.pseudonym(guild.id), "members": guild.member_count or 0,
+                 "channels": len(guild.text_channels), "blacklist": list(_value(blacklist)), "prefix": prefix}
+        exempt = list(_value(exempt))
+        if exempt:
+            entry["exempt"] = exempt
+        self._write(entry)
+
+    def message(self, message, *, blacklist=(), exempt=(), blocked: Optional[Callable[[str], object]] = None,
+                prefix: str = "!", is_mod: bool = False):
+        """`blocked(word)` says whether a word contains a blocked entry; defaults to scanning `blacklist`."""
+        guild = message.guild
+        if guild is None:
+            return
+        self.guild(guild, blacklist=blacklist, exempt=exempt, prefix=prefix)
+        self.events += 1
+        self._write({"e": "message", "g": self.pseudonym(guild.id), "c": self.pseudonym(message.channel.id),
+                     "u": self.pseudonym(message.author.id), "bot": bool(message.author.bot), "mod": is_mod,
+                     "text": sanitize_content(message.content or "", blocked or _value(blacklist), prefix, self.pseudonym)})
+
+    def join(self, member, *, blacklist=(), exempt=(), prefix: str = "!"):
+        self.guild(member.guild, blacklist=blacklist, exempt=exempt, prefix=prefix)
+        self.events += 1
+        age = (datetime.now(timezone.utc) - member.created_at).total_seconds() / 86400
+        self._write({"e": "join", "g": self.pseudonym(member.guild.id), "u": self.pseudonym(member.id),
+                     "bot": bool(member.bot), "age": round(age, 2)})
+
+    def role(self, role, op: str, *, is_mod: bool = False):
+        self.events += 1
+        self._write({"e": "role", "op": op, "g": self.pseudonym(role.guild.id), "r": self.pseudonym(role.id), "mod": is_mod})
+
+    def close(self):
+        self._file.flush()
+        self._file.close()
+
+
+def _value(value):
+    return value() if callable(value) else value
+
+
+def read_traffic(path: str) -> Iterator[dict]:
+    """Yield the events of a recording, skipping the header and blank lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get("e") == "header":
+                if entry.get("v") != FORMAT_VERSION:
+                    raise ValueError(f"unsupported traffic format version {entry.get('v')}")
+                continue
+            yield entry
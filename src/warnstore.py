@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class WarningStore:
+    """Warnings kept per guild as a JSON snapshot plus an append-only journal, loaded
+    the first time a guild is touched.
+
+    Layout, for each guild:
+      `<directory>/<guild_id>.json`     snapshot: {"seq": n, "users": {user_id: [ {by, by_name, reason, time}, ... ]}}
+      `<directory>/<guild_id>.journal`  one JSON line per change since: {"seq", "op": "add"|"clear", "u", "w"}
+
+    A warning costs one appended (and fsynced) line instead of rewriting the guild.
+    Every `compact_every` changes the snapshot is rewritten atomically and the journal
+    emptied; loading replays only lines newer than the snapshot's `seq`, so a crash
+    between those two steps can't apply a change twice, and a torn last line from a
+    crash mid-append is dropped. Nothing is read at startup, and a corrupt snapshot is
+    backed up and reset without touching any other guild.
+
+    A legacy single `warnings.json` is split into snapshots once, on first start.
+
+    At most `max_open` journals stay open (least recently written closed first), however
+    many guilds warn. The methods block on disk; from async code, call them through
+    `run()`, which uses the store's own thread, so an fsync never stalls the event loop.
+    """
+
+    def __init__(self, directory: str, legacy_path: Optional[str] = None,
+                 observe: Optional[Callable[[float], None]] = None, *, compact_every: int = 500, fsync: bool = True,
+                 max_open: int = 64):
+        self.directory = directory
+        self.observe = observe  # called with the seconds spent on each journal append / snapshot write
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.max_open = max_open
+        self._guilds = {}  # {guild_id: {user_id: [entries]}} for loaded guilds only
+        self._seq = {}  # {guild_id: last applied seq}
+        self._pending = {}  # {guild_id: journal lines since the last snapshot}
+        self._journals = OrderedDict()  # {guild_id: open journal file}, least recently written first
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warnstore")
+        os.makedirs(directory, exist_ok=True)
+        if legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+
+    async def run(self, fn: Callable, *args):
+        """`fn(*args)` on the store's thread, so the event loop never waits on the disk."""
+        return await asyncio.get_running_loop().run_in_executor(self._thread, functools.partial(fn, *args))
+
+    def _path(self, gkey: str, ext: str = ".json") -> str:
+        if not gkey.isdigit():
+            raise ValueError(f"invalid guild id {gkey!r}")
+        return os.path.join(self.directory, gkey + ext)
+
+    # ---------- loading ----------
+    def _load_snapshot(self, gkey: str):
+        path = self._path(gkey)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            if "users" in data and "seq" in data:
+                return data["users"], data["seq"]
+            return data, 0  # pre-journal shard: plain {user_id: [entries]}
+        except FileNotFoundError:
+            return {}, 0
+        except (OSError, ValueError) as e:  # JSONDecodeError is a ValueError
+            bak = path + ".bak"
+            try:
+                os.replace(path, bak)
+                print(f"Warning: invalid warnings file for guild {gkey} ({e}) — backed up to {bak} and reset.")
+            except OSError:
+                print(f"Warning: invalid warnings file for guild {gkey} ({e}) — ignored.")
+            return {}, 0
+
+    def _replay(self, gkey: str, users: dict, seq: int):
+        """Apply journal lines newer than `seq`; returns (seq, lines in the journal)."""
+        path = self._path(gkey, ".journal")
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return seq, 0
+        if raw and not raw.endswith(b"\n"):
+            # torn write from a crash: drop the partial line so the next append starts clean
+            raw = raw[:raw.rfind(b"\n") + 1]
+            with open(path, "r+b") as f:
+                f.truncate(len(raw))
+            print(f"Warning: dropped a partial journal line for guild {gkey}")
+        lines = raw.splitlines()
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                print(f"Warning: skipped an unreadable journal line for guild {gkey}")
+                continue
+            if rec["seq"] <= seq:
+                continue  # already in the snapshot
+            seq = rec["seq"]
+            self._apply(users, rec)
+        return seq, len(lines)
+
+    @staticmethod
+    def _apply(users: dict, rec: dict):
+        if rec["op"] == "add":
+            users.setdefault(rec["u"], []).append(rec["w"])
+        elif rec["op"] == "clear":
+            users.pop(rec["u"], None)
+
+    def _migrate(self, legacy_path: str):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not migrate {legacy_path}: {e}")
+            return
+        moved = 0
+        for gkey, users in (legacy.items() if isinstance(legacy, dict) else ()):
+            if not str(gkey).isdigit():
+                print(f"Warning: skipped non-numeric guild id {gkey!r} in {legacy_path}")
+                continue
+            if users and isinstance(users, dict) and not os.path.exists(self._path(str(gkey))):
+                self._write_snapshot(str(gkey), users, 0)
+                moved += 1
+        os.replace(legacy_path, legacy_path + ".migrated")
+        print(f"Migrated warnings for {moved} guild(s) from {legacy_path} into {self.directory}")
+
+    # ---------- reading ----------
+    def guild(self, guild_id) -> dict:
+        """{user_id: [entries]} for one guild. Treat as read-only; use add()/clear_user() to change it."""
+        gkey = str(guild_id)
+        users = self._guilds.get(gkey)
+        if users is None:
+            users, seq = self._load_snapshot(gkey)
+            self._seq[gkey], self._pending[gkey] = self._replay(gkey, users, seq)
+            self._guilds[gkey] = users
+        return users
+
+    def user(self, guild_id, user_id) -> list:
+        return self.guild(guild_id).get(str(user_id), [])
+
+    def guild_ids(self) -> list:
+        """Every guild with data on disk (loaded or not)."""
+        ids = {name.split(".", 1)[0] for name in os.listdir(self.directory)
+               if name.endswith((".json", ".journal")) and name.split(".", 1)[0].isdigit()}
+        return sorted(ids)
+
+    def loaded(self) -> dict:
+        """The guilds currently held in memory."""
+        return self._guilds
+
+    # ---------- writing ----------
+    def add(self, guild_id, user_id, entry: dict) -> int:
+        """Append a warning to the guild's journal; returns the user's warning count."""
+        gkey, ukey = str(guild_id), str(user_id)
+        users = self.guild(gkey)
+        self._log(gkey, {"op": "add", "u": ukey, "w": entry})
+        entries = users.setdefault(ukey, [])
+        entries.append(entry)
+        self._maybe_compact(gkey)
+        return len(entries)
+
+    def clear_user(self, guild_id, user_id) -> bool:
+        """Drop a user's warnings; returns False if there was nothing to clear."""
+        gkey, ukey = str(guild_id), str(user_id)
+        users = self.guild(gkey)
+        if not users.get(ukey):
+            return False
+        self._log(gkey, {"op": "clear", "u": ukey})
+        del users[ukey]
+        self._maybe_compact(gkey)
+        return True
+
+    def _log(self, gkey: str, rec: dict):
+        start = time.perf_counter()
+        rec["seq"] = self._seq[gkey] + 1
+        f = self._journals.get(gkey)
+        if f is None:
+            f = self._journals[gkey] = open(self._path(gkey, ".journal"), "a", encoding="utf-8")
+            if len(self._journals) > self.max_open:
+                self._journals.popitem(last=False)[1].close()
+        else:
+            self._journals.move_to_end(gkey)
+        f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        self._seq[gkey] = rec["seq"]
+        self._pending[gkey] += 1
+        if self.observe:
+            self.observe(time.perf_counter() - start)
+
+    def _maybe_compact(self, gkey: str):
+        if self._pending[gkey] >= self.compact_every:
+            self.compact(gkey)
+
+    def compact(self, guild_id):
+        """Fold the journal into a fresh snapshot and empty the journal."""
+        gkey = str(guild_id)
+        users = self.guild(gkey)
+        self._write_snapshot(gkey, users, self._seq[gkey])
+        # the snapshot now covers every journal line, so truncating can't lose anything
+        f = self._journals.pop(gkey, None)
+        if f:
+            f.close()
+        open(self._path(gkey, ".journal"), "w").close()
+        self._pending[gkey] = 0
+
+    def save(self, guild_id):
+        self.compact(guild_id)
+
+    def _write_snapshot(self, gkey: str, users: dict, seq: int):
+        start = time.perf_counter()
+        path = self._path(gkey)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "users": users}, f, indent=2)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.observe:
+            self.observe(time.perf_counter() - start)
+
+    def close(self):
+        self._thread.shutdown()
+        for f in self._journals.values():
+            f.close()
+        self._journals.clear()
+
+    def unload(self, guild_id=None):
+        """Forget cached guilds (all of them by default); they are re-read on next use."""
+        keys = list(self._guilds) if guild_id is None else [str(guild_id)]
+        for gkey in keys:
+            self._guilds.pop(gkey, None)
+            self._seq.pop(gkey, None)
+            self._pending.pop(gkey, None)
+            f = self._journals.pop(gkey, None)
+            if f:
+                f.close()
@@ -0,0 +1,230 @@
+"""Offline benchmarks for the bot's hot paths, driven by synthetic traffic.
+
+Replays generated message / join / warning streams through the real handlers in
+src/mybot.py against the fakes in tests/fakes.py, then reports throughput,
+p50/p99 latency, memory and the number of (simulated) REST calls.
+
+    python tests/bench_handlers.py                       # all scenarios
+    python tests/bench_handlers.py messages --events 20000 --rate 2000 --blacklist 500
+    python tests/bench_handlers.py embeds                # mod-log/embed building vs plain discord.Embed
+
+With `--rate 0` events are processed back to back; otherwise they are dispatched
+as tasks at the given rate per second, the way discord.py dispatches gateway events.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from collections import Counter
+from dataclasses import dataclass, field
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+# never touch real data: always a fresh data dir of our own, and the JSON stores even if
+# STATE_DB is exported or set in .env (load_dotenv doesn't override what's already set)
+os.environ["BOT_DATA_DIR"] = tempfile.mkdtemp(prefix="modbot-bench-")
+os.environ["STATE_DB"] = ""
+
+import mybot  # noqa: E402
+from fakes import MemberMock, MessageMock, build_guild  # noqa: E402
+
+SCENARIOS = ("messages", "joins", "warns", "embeds")
+
+
+@dataclass
+class BenchResult:
+    scenario: str
+    events: int
+    elapsed: float
+    latencies: list
+    peak_bytes: int
+    requests: Counter = field(default_factory=Counter)
+    notes: str = ""
+
+    @property
+    def throughput(self) -> float:
+        return self.events / self.elapsed if self.elapsed else float("inf")
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def report(self) -> str:
+        calls = ", ".join(f"{route}={n}" for route, n in sorted(self.requests.items())) or "none"
+        return (
+            f"{self.scenario:<10} {self.events:>7} events  {self.throughput:>10.0f} ev/s  "
+            f"p50 {self.percentile(50) * 1000:>8.3f} ms  p99 {self.percentile(99) * 1000:>8.3f} ms  "
+            f"peak mem {self.peak_bytes / 1024:>8.0f} KiB\n"
+            f"{'':<10} REST calls: {calls}"
+            + (f"\n{'':<10} {self.notes}" if self.notes else "")
+        )
+
+
+def reset_state():
+    mybot.warnings_db.unload()  # every run uses new guild ids, so what's on disk never overlaps
+    mybot.blocklist.set_global(())
+    mybot.mod_roles.clear()
+    mybot.dms.clear()
+    mybot.raids.clear()
+    if mybot.bot._connection.user is None:
+        # get_context compares message authors against bot.user
+        mybot.bot._connection.user = MemberMock(build_guild(0, channels=(), log_channel=None, mod_role=None), "ModeratorBot", bot=True)
+
+
+def build_world(guilds: int, members: int, latency: float):
+    return [build_guild(members, latency=latency) for _ in range(guilds)]
+
+
+def setup_blacklists(world, size: int, rng: random.Random, shared: bool = False):
+    words = [f"badword{i}" for i in range(size)]
+    if shared:  # one global list instead of a copy per guild
+        mybot.blocklist.set_global(words)
+        return words
+    for guild in world:
+        mybot.blocklist.prime(guild.id, words, ())
+    return words
+
+
+def message_stream(world, count: int, words, hit_ratio: float, rng: random.Random):
+    filler = "the quick brown fox jumps over the lazy dog and keeps on talking about things".split()
+    for _ in range(count):
+        guild = rng.choice(world)
+        author = rng.choice(guild.members)
+        channel = guild.text_channels[rng.randrange(len(guild.text_channels) - 1)]
+        text = " ".join(rng.choices(filler, k=rng.randint(3, 20)))
+        if words and rng.random() < hit_ratio:
+            text += " " + rng.choice(words)
+        yield MessageMock(guild, author, text, channel=channel)
+
+
+def join_stream(world, count: int, rng: random.Random):
+    for _ in range(count):
+        guild = rng.choice(world)
+        yield guild.add_member(MemberMock(guild))
+
+
+def embed_overhead(count: int = 20000) -> tuple:
+    """Microseconds per embed: built from a template vs constructed with discord.Embed(...)."""
+    from datetime import datetime
+    colors = (mybot.discord.Color.blurple(), mybot.discord.Color.red(), mybot.discord.Color.green())
+    start = time.perf_counter()
+    for i in range(count):
+        mybot.make_embed(f"Title {i}", f"Description {i}", colors[i % 3])
+    templated = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(count):
+        mybot.discord.Embed(title=f"Title {i}", description=f"Description {i}", color=colors[i % 3], timestamp=datetime.utcnow())
+    constructed = time.perf_counter() - start
+    return templated / count * 1e6, constructed / count * 1e6
+
+
+async def replay(events, handler, rate: float):
+    """Run `handler(event)` for every event; returns per-event latencies."""
+    latencies = []
+
+    async def run(ev, scheduled):
+        await handler(ev)
+        latencies.append(time.perf_counter() - scheduled)
+
+    if not rate:
+        for ev in events:
+            await run(ev, time.perf_counter())
+        return latencies
+
+    start = time.perf_counter()
+    tasks = []
+    for i, ev in enumerate(events):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(ev, scheduled)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def run_scenario(scenario: str, *, events: int = 2000, rate: float = 0, guilds: int = 5, members: int = 200,
+                       blacklist: int = 100, hit_ratio: float = 0.02, latency: float = 0.0, seed: int = 1,
+                       shared_blacklist: bool = False) -> BenchResult:
+    if scenario not in SCENARIOS:
+        raise ValueError(f"unknown scenario {scenario!r}")
+    rng = random.Random(seed)
+    reset_state()
+    world = build_world(guilds, members, latency)
+
+    if scenario == "messages":
+        words = setup_blacklists(world, blacklist, rng, shared=shared_blacklist)
+        stream = list(message_stream(world, events, words, hit_ratio, rng))
+        handler = mybot.on_message
+    elif scenario == "joins":
+        stream = list(join_stream(world, events, rng))
+        handler = mybot.on_member_join
+    elif scenario == "embeds":
+        stream = [(g, rng.choice(g.members)) for g in (rng.choice(world) for _ in range(events))]
+
+        async def handler(ev):
+            await mybot.log_action(ev[0], "Auto-moderation", f"Deleted message from {ev[1].mention} containing a blocked word.")
+    else:
+        stream = [(g, rng.choice(g.members)) for g in (rng.choice(world) for _ in range(events))]
+
+        async def handler(ev):
+            await mybot.warn_user(ev[0], ev[1], None, "Benchmark warning")
+
+    mybot.dms.rate = 0  # DMs leave the handlers; don't pace them here
+    dm_task = asyncio.create_task(mybot.dms.run())
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        latencies = await replay(stream, handler, rate)
+        elapsed = time.perf_counter() - start
+        await mybot.dms.drain()  # counted in REST calls, not in handler latency
+    dm_task.cancel()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    requests = Counter()
+    for guild in world:
+        requests.update(guild.requests)
+    result = BenchResult(scenario, len(stream), elapsed, latencies, peak, requests)
+    if scenario == "embeds":
+        templated, constructed = embed_overhead()
+        result.notes = f"embed build: template {templated:.2f} us, discord.Embed(...) {constructed:.2f} us"
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"one or more of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0, help="events per second (0 = back to back)")
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--members", type=int, default=200, help="members per guild")
+    parser.add_argument("--blacklist", type=int, default=100, help="blacklisted words per guild")
+    parser.add_argument("--shared-blacklist", action="store_true", help="put the words in the global blocklist tier")
+    parser.add_argument("--hit-ratio", type=float, default=0.02, help="share of messages containing a blocked word")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated REST latency in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    for scenario in args.scenarios or SCENARIOS:
+        result = asyncio.run(run_scenario(
+            scenario, events=args.events, rate=args.rate, guilds=args.guilds, members=args.members,
+            blacklist=args.blacklist, hit_ratio=args.hit_ratio, latency=args.latency, seed=args.seed,
+            shared_blacklist=args.shared_blacklist,
+        ))
+        print(result.report())
+
+
+if __name__ == "__main__":
+    main()
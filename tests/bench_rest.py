@@ -0,0 +1,91 @@
+"""Load tests for the bot's REST-heavy paths against the fake Discord backend.
+
+Runs the real commands / helpers from src/mybot.py through discord.py's HTTP client
+against tests/fakediscord.py, with simulated route buckets, 429s and latency, and
+reports wall time plus per-route request and 429 counts.
+
+    python tests/bench_rest.py                                  # all scenarios
+    python tests/bench_rest.py muted_role --channels 200 --latency 0.05
+    python tests/bench_rest.py bans --count 50 --bucket-limit 5 --bucket-window 5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+os.environ.setdefault("BOT_DATA_DIR", tempfile.mkdtemp(prefix="modbot-bench-"))
+
+import mybot  # noqa: E402
+from fakediscord import FakeDiscord  # noqa: E402
+
+SCENARIOS = ("muted_role", "purge", "bans", "modlog")
+
+
+async def run_scenario(scenario: str, *, channels: int = 50, count: int = 20, latency: float = 0.0, jitter: float = 0.0,
+                       bucket_limit: int = 5, bucket_window: float = 1.0, global_limit: int = 50):
+    """Returns (elapsed seconds, FakeDiscord) for one scenario."""
+    if scenario not in SCENARIOS:
+        raise ValueError(f"unknown scenario {scenario!r}")
+    fake = FakeDiscord(latency=latency, jitter=jitter, bucket_limit=bucket_limit, bucket_window=bucket_window,
+                       global_limit=global_limit)
+    await fake.start(mybot.bot)
+    try:
+        guild = fake.add_guild("Load test", members=max(count, 10) + 5, channels=channels)
+        owner = fake.owner(guild)
+        channel = guild.text_channels[0]
+        await mybot.get_mod_log(guild)  # exists already; keeps channel lookups out of the timing
+        fake.requests.clear()
+
+        start = time.perf_counter()
+        if scenario == "muted_role":
+            await mybot.ensure_muted_role(guild)
+        elif scenario == "purge":
+            fake.seed_messages(channel, count * 100)
+            for _ in range(count):
+                fake.inject_message(channel, owner.id, "!purge 100")
+        elif scenario == "bans":
+            targets = [m for m in guild.members if not m.bot and m.id != owner.id][:count]
+            for member in targets:
+                fake.inject_message(channel, owner.id, f"!ban <@{member.id}> load test")
+        else:
+            await asyncio.gather(*(mybot.log_action(guild, "Load test", f"entry {i}") for i in range(count)))
+        await asyncio.sleep(0)
+        await fake.drain()
+        elapsed = time.perf_counter() - start
+    finally:
+        await fake.stop()
+    return elapsed, fake
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"one or more of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--channels", type=int, default=50, help="text channels in the guild")
+    parser.add_argument("--count", type=int, default=20, help="purges / bans / log entries to issue")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    parser.add_argument("--bucket-limit", type=int, default=5)
+    parser.add_argument("--bucket-window", type=float, default=1.0)
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second across all routes")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    for scenario in args.scenarios or SCENARIOS:
+        with contextlib.redirect_stdout(sys.stderr):  # handler prints go to stderr
+            elapsed, fake = asyncio.run(run_scenario(
+                scenario, channels=args.channels, count=args.count, latency=args.latency, jitter=args.jitter,
+                bucket_limit=args.bucket_limit, bucket_window=args.bucket_window, global_limit=args.global_limit,
+            ))
+        print(f"{scenario}: {elapsed:.3f}s, {fake.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+import pytest_asyncio
+
+# mybot imports its sibling modules (discoviews, guildconfig, ...) by plain name
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# keep test runs out of the real data/ directory
+os.environ.setdefault("BOT_DATA_DIR", tempfile.mkdtemp(prefix="modbot-tests-"))
+
+
+@pytest_asyncio.fixture
+async def fake():
+    """The bot logged in against a fresh FakeDiscord backend (tests/fakediscord.py)."""
+    import mybot
+    from fakediscord import FakeDiscord
+    fake = FakeDiscord(bucket_limit=3, bucket_window=0.2)
+    await fake.start(mybot.bot)
+    yield fake
+    await fake.stop()
@@ -0,0 +1,594 @@
+"""In-process stand-in for Discord's REST API and gateway, for offline load tests.
+
+`FakeDiscord` runs a local aiohttp server that speaks enough of the v10 REST API for
+the bot's moderation paths (messages, purge, roles, channel overwrites, bans, kicks,
+DMs) and points discord.py's real HTTP client at it. That keeps discord.py's own
+rate-limit handling in the loop:
+
+- every route has a bucket (keyed on method, route template and major parameter)
+  with `X-RateLimit-*` headers, plus a global requests-per-second limit;
+- exhausted buckets answer 429 with `retry_after`, and `force_429()` injects extra ones;
+- `latency` / `jitter` delay every response.
+
+State changes are echoed back as gateway events through the bot's ConnectionState
+(GUILD_ROLE_CREATE, MESSAGE_CREATE, GUILD_BAN_ADD, ...), so caches stay in sync the
+way they would on a live connection, and `inject_message()`, `add_member()` and
+`inject_role()` simulate inbound traffic.
+
+    fake = FakeDiscord(latency=0.05, bucket_limit=5, bucket_window=5)
+    await fake.start(mybot.bot)
+    guild = fake.add_guild("Load test", members=500, channels=40)
+    ...
+    await fake.drain()      # wait for dispatched event handlers to finish
+    print(fake.report())
+    await fake.stop()
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+import discord
+from aiohttp import web
+
+API_PREFIX = "/api/v10"
+MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+ADMINISTRATOR = 1 << 3
+EVENT_TASK_PREFIX = "discord.py: "
+
+
+def _json_response(data, *, status: int = 200, headers: dict = None) -> web.Response:
+    # discord.py only parses bodies whose content-type is exactly "application/json"
+    return web.Response(body=json.dumps(data).encode("utf-8"), status=status,
+                        headers=dict(headers or {}, **{"Content-Type": "application/json"}))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _Bucket:
+    __slots__ = ("limit", "window", "remaining", "reset_at")
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float):
+        """Returns None when the request may proceed, else the retry-after in seconds."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return None
+
+
+class FakeDiscord:
+    def __init__(self, *, latency: float = 0.0, jitter: float = 0.0, bucket_limit: int = 5, bucket_window: float = 1.0,
+                 global_limit: int = 50, route_limits: dict = None, gateway: bool = True, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.global_limit = global_limit
+        self.route_limits = dict(route_limits or {})  # {"PUT /channels/{channel}/permissions/{id}": (limit, window)}
+        self.gateway = gateway
+        self.rng = random.Random(seed)
+
+        self.requests = Counter()  # {route template: count}
+        self.ratelimited = Counter()  # {route template: 429s returned}
+        self._buckets = {}
+        self._global_window = []  # timestamps in the last second
+        self._forced = []  # [route template prefix, remaining count]
+        self._last_id = 0
+
+        self.users = {}
+        self.guilds = {}  # {guild_id: {"roles", "channels", "members", "bans", ...}}
+        self.channels = {}  # {channel_id: {"payload", "messages": OrderedDict}}
+        self.dm_channels = {}  # {channel_id: user_id}
+        self.closed_dms = set()
+        self.uploads = []  # [(channel_id, filename, bytes)] for attachments sent by the bot
+
+        self.bot = None
+        self.state = None
+        self._runner = None
+        self._old_base = None
+        self._routes = [
+            ("GET", r"/users/@me", self._get_me),
+            ("GET", r"/oauth2/applications/@me", self._get_application),
+            ("POST", r"/users/@me/channels", self._create_dm),
+            ("POST", r"/channels/(\d+)/messages", self._create_message),
+            ("GET", r"/channels/(\d+)/messages", self._get_messages),
+            ("POST", r"/channels/(\d+)/messages/bulk-delete", self._bulk_delete),
+            ("DELETE", r"/channels/(\d+)/messages/(\d+)", self._delete_message),
+            ("PUT", r"/channels/(\d+)/permissions/(\d+)", self._edit_overwrite),
+            ("POST", r"/guilds/(\d+)/channels", self._create_channel),
+            ("POST", r"/guilds/(\d+)/roles", self._create_role),
+            ("PATCH", r"/guilds/(\d+)/roles/(\d+)", self._edit_role),
+            ("GET", r"/guilds/(\d+)/members/(\d+)", self._get_member),
+            ("DELETE", r"/guilds/(\d+)/members/(\d+)", self._kick),
+            ("PUT", r"/guilds/(\d+)/members/(\d+)/roles/(\d+)", self._add_member_role),
+            ("DELETE", r"/guilds/(\d+)/members/(\d+)/roles/(\d+)", self._remove_member_role),
+            ("GET", r"/guilds/(\d+)/bans", self._get_bans),
+            ("PUT", r"/guilds/(\d+)/bans/(\d+)", self._ban),
+            ("DELETE", r"/guilds/(\d+)/bans/(\d+)", self._unban),
+        ]
+        self._routes = [(m, re.compile(p + "$"), h) for m, p, h in self._routes]
+
+    # ---------- lifecycle ----------
+    async def start(self, bot, *, token: str = "fake-token"):
+        """Start the server and log `bot` in against it (no gateway connection is opened)."""
+        app = web.Application()
+        app.router.add_route("*", API_PREFIX + "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self._old_base = discord.http.Route.BASE
+        discord.http.Route.BASE = f"http://127.0.0.1:{port}{API_PREFIX}"
+
+        self.bot = bot
+        self.state = bot._connection
+        self.bot_user = self._user("ModeratorBot", bot=True)
+        await bot._async_setup_hook()
+        # a fresh connector and bucket table per run, so one FakeDiscord doesn't inherit another's state
+        bot.http.connector = discord.utils.MISSING
+        bot.http._buckets.clear()
+        bot.http._bucket_hashes.clear()
+        data = await bot.http.static_login(token)
+        self.state.user = discord.ClientUser(state=self.state, data=data)
+        return self
+
+    async def stop(self):
+        if self.bot is not None:
+            await self.bot.http.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+        if self._old_base is not None:
+            discord.http.Route.BASE = self._old_base
+
+    async def drain(self, timeout: float = 60.0):
+        """Wait until every dispatched event handler task has finished."""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks()
+                       if t is not current and t.get_name().startswith(EVENT_TASK_PREFIX) and not t.done()]
+            if not pending:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{len(pending)} event handlers still running")
+            await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+
+    # ---------- building state ----------
+    def snowflake(self) -> int:
+        self._last_id = max(self._last_id + 1, discord.utils.time_snowflake(datetime.now(timezone.utc)))
+        return self._last_id
+
+    def _user(self, name: str, *, bot: bool = False) -> dict:
+        uid = self.snowflake()
+        user = {"id": str(uid), "username": name, "discriminator": "0", "global_name": None, "avatar": None, "bot": bot}
+        self.users[uid] = user
+        return user
+
+    def _member(self, user: dict, roles=()) -> dict:
+        return {"user": user, "roles": [str(r) for r in roles], "joined_at": _now_iso(), "deaf": False, "mute": False,
+                "nick": None, "flags": 0}
+
+    def add_guild(self, name: str = "Fake Guild", *, members: int = 50, channels: int = 3, log_channel: str = "mod-log",
+                  mod_role: str = "Moderator") -> discord.Guild:
+        gid = self.snowflake()
+        owner = self._user("owner")
+        everyone = {"id": str(gid), "name": "@everyone", "color": 0, "hoist": False, "position": 0,
+                    "permissions": str(discord.Permissions.general().value), "managed": False, "mentionable": False, "flags": 0}
+        bot_role = dict(everyone, id=str(self.snowflake()), name="ModeratorBot", position=10, permissions=str(ADMINISTRATOR), managed=True)
+        g = {"id": gid, "owner_id": int(owner["id"]), "roles": OrderedDict(), "channels": OrderedDict(),
+             "members": OrderedDict(), "bans": OrderedDict()}
+        for role in (everyone, bot_role):
+            g["roles"][int(role["id"])] = role
+        if mod_role:
+            role = dict(everyone, id=str(self.snowflake()), name=mod_role, position=5, permissions="0")
+            g["roles"][int(role["id"])] = role
+        self.guilds[gid] = g
+
+        names = [f"channel-{i}" for i in range(channels)] + ([log_channel] if log_channel else [])
+        for position, cname in enumerate(names):
+            self._new_channel(g, cname, position)
+        g["members"][int(self.bot_user["id"])] = self._member(self.bot_user, roles=[bot_role["id"]])
+        g["members"][int(owner["id"])] = self._member(owner)
+        for i in range(members):
+            user = self._user(f"member{i}")
+            g["members"][int(user["id"])] = self._member(user)
+
+        payload = {
+            "id": str(gid), "name": name, "icon": None, "owner_id": owner["id"], "features": [], "emojis": [], "stickers": [],
+            "roles": list(g["roles"].values()), "channels": [c["payload"] for c in self._guild_channels(gid)],
+            "members": list(g["members"].values()), "member_count": len(g["members"]), "large": len(g["members"]) > 250,
+            "system_channel_id": str(next(iter(g["channels"]))) if g["channels"] else None,
+            "premium_tier": 0, "verification_level": 0, "default_message_notifications": 0, "explicit_content_filter": 0,
+            "mfa_level": 0, "nsfw_level": 0, "preferred_locale": "en-US", "afk_timeout": 300, "unavailable": False,
+            "threads": [], "stage_instances": [], "guild_scheduled_events": [], "voice_states": [], "presences": [],
+        }
+        return self.state._add_guild_from_data(payload)
+
+    def _new_channel(self, g: dict, name: str, position: int) -> dict:
+        cid = self.snowflake()
+        payload = {"id": str(cid), "type": 0, "guild_id": str(g["id"]), "name": name, "position": position,
+                   "permission_overwrites": [], "nsfw": False, "parent_id": None, "topic": None, "rate_limit_per_user": 0}
+        g["channels"][cid] = payload
+        self.channels[cid] = {"payload": payload, "messages": OrderedDict()}
+        return payload
+
+    def _guild_channels(self, gid: int):
+        return [self.channels[cid] for cid in self.guilds[gid]["channels"]]
+
+    def owner(self, guild: discord.Guild) -> discord.Member:
+        return guild.get_member(self.guilds[guild.id]["owner_id"])
+
+    def close_dms(self, user_id: int):
+        self.closed_dms.add(user_id)
+
+    def seed_messages(self, channel: discord.abc.Messageable, count: int, author_id: int = None):
+        """Fill a channel's history without dispatching events (for purge tests)."""
+        guild_id = channel.guild.id
+        author = self.users[author_id or self.guilds[guild_id]["owner_id"]]
+        for i in range(count):
+            self._store_message(channel.id, author, f"seed message {i}")
+
+    def inject_message(self, channel: discord.abc.Messageable, author_id: int, content: str):
+        """Simulate a user posting `content`: stores it and dispatches MESSAGE_CREATE."""
+        author = self.users[author_id]
+        payload = self._store_message(channel.id, author, content)
+        self._dispatch("MESSAGE_CREATE", payload, force=True)
+        return payload
+
+    def add_member(self, guild: discord.Guild, name: str = None, *, bot: bool = False, created_at: datetime = None,
+                   dispatch: bool = True) -> int:
+        """Add a member (dispatching GUILD_MEMBER_ADD unless `dispatch` is False) and return its ID.
+
+        `created_at` backdates the account: the ID is a snowflake for that time, which is
+        what `Member.created_at` reads.
+        """
+        if created_at is None:
+            uid = self.snowflake()
+        else:
+            self._last_id += 1
+            uid = discord.utils.time_snowflake(created_at) + (self._last_id & 0x3FFFFF)
+        user = {"id": str(uid), "username": name or f"user{uid}", "discriminator": "0", "global_name": None,
+                "avatar": None, "bot": bot}
+        self.users[uid] = user
+        member = self._member(user)
+        self.guilds[guild.id]["members"][uid] = member
+        if dispatch:
+            self._dispatch("GUILD_MEMBER_ADD", dict(member, guild_id=str(guild.id)), force=True)
+        else:
+            guild._add_member(discord.Member(data=member, guild=guild, state=self.state))
+        return uid
+
+    def add_channel(self, guild: discord.Guild, name: str) -> int:
+        """Add a text channel and return its ID. CHANNEL_CREATE is parsed right away, so
+        the channel can be used before control returns to the loop."""
+        g = self.guilds[guild.id]
+        payload = self._new_channel(g, name, len(g["channels"]))
+        self.state.parse_channel_create(payload)
+        return int(payload["id"])
+
+    def inject_role(self, guild: discord.Guild, op: str, role_id: int = None, *, name: str = None) -> int:
+        """Simulate a role being created, updated or deleted outside the bot; returns the role ID."""
+        g = self.guilds[guild.id]
+        if op == "create":
+            role_id = self.snowflake()
+            g["roles"][role_id] = {"id": str(role_id), "name": name or "new role", "color": 0, "hoist": False,
+                                   "position": 1, "permissions": "0", "managed": False, "mentionable": False, "flags": 0}
+            self._dispatch("GUILD_ROLE_CREATE", {"guild_id": str(guild.id), "role": g["roles"][role_id]}, force=True)
+        elif op == "update":
+            role = g["roles"][role_id]
+            if name:
+                role["name"] = name
+            self._dispatch("GUILD_ROLE_UPDATE", {"guild_id": str(guild.id), "role": role}, force=True)
+        elif op == "delete":
+            g["roles"].pop(role_id, None)
+            self._dispatch("GUILD_ROLE_DELETE", {"guild_id": str(guild.id), "role_id": str(role_id)}, force=True)
+        else:
+            raise ValueError(f"unknown role op {op!r}")
+        return role_id
+
+    def _store_message(self, channel_id: int, author: dict, content: str, embeds=()) -> dict:
+        channel = self.channels[channel_id]
+        guild_id = channel["payload"].get("guild_id")
+        mid = self.snowflake()
+        payload = {
+            "id": str(mid), "channel_id": str(channel_id), "author": author, "content": content, "timestamp": _now_iso(),
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": list(embeds), "pinned": False, "type": 0, "components": [],
+        }
+        if guild_id:
+            g = self.guilds[int(guild_id)]
+            payload["guild_id"] = guild_id
+            member = g["members"].get(int(author["id"]))
+            if member:
+                payload["member"] = {k: v for k, v in member.items() if k != "user"}
+            payload["mentions"] = [dict(g["members"][int(uid)]["user"], member={k: v for k, v in g["members"][int(uid)].items() if k != "user"})
+                                   for uid in re.findall(r"<@!?(\d+)>", content) if int(uid) in g["members"]]
+        channel["messages"][mid] = payload
+        return payload
+
+    # ---------- stats ----------
+    def report(self) -> str:
+        total = sum(self.requests.values())
+        limited = sum(self.ratelimited.values())
+        lines = [f"{total} requests, {limited} answered 429"]
+        for route, n in self.requests.most_common():
+            extra = f" ({self.ratelimited[route]} x 429)" if self.ratelimited[route] else ""
+            lines.append(f"  {n:>6}  {route}{extra}")
+        return "\n".join(lines)
+
+    def force_429(self, route_prefix: str, count: int = 1):
+        """Answer the next `count` requests whose route template starts with `route_prefix`
+        (e.g. "POST /channels/{channel}/messages") with a 429."""
+        self._forced.append([route_prefix, count])
+
+    # ---------- request handling ----------
+    @staticmethod
+    def _template(method: str, path: str):
+        """Route template used for bucketing, plus the major parameter value."""
+        parts = path.strip("/").split("/")
+        out, major = [], None
+        for i, part in enumerate(parts):
+            if part.isdigit():
+                prev = parts[i - 1] if i else ""
+                if prev in MAJOR_PARAMETERS and major is None:
+                    major = part
+                    out.append("{" + prev[:-1] + "}")
+                else:
+                    out.append("{id}")
+            else:
+                out.append(part)
+        return f"{method} /" + "/".join(out), major
+
+    def _limit_for(self, template: str):
+        return self.route_limits.get(template, (self.bucket_limit, self.bucket_window))
+
+    def _check_ratelimit(self, template: str, major, now: float):
+        """Returns (headers, retry_after or None, is_global)."""
+        for forced in self._forced:
+            if template.startswith(forced[0]):
+                forced[1] -= 1
+                if forced[1] <= 0:
+                    self._forced.remove(forced)
+                return {}, 0.05, False
+
+        self._global_window = [t for t in self._global_window if now - t < 1.0]
+        if self.global_limit and len(self._global_window) >= self.global_limit:
+            return {}, 1.0 - (now - self._global_window[0]), True
+        self._global_window.append(now)
+
+        limit, window = self._limit_for(template)
+        bucket = self._buckets.get((template, major))
+        if bucket is None:
+            bucket = self._buckets[(template, major)] = _Bucket(limit, window)
+        retry_after = bucket.take(now)
+        headers = {
+            "X-RateLimit-Limit": str(bucket.limit),
+            "X-RateLimit-Remaining": str(max(bucket.remaining, 0)),
+            "X-RateLimit-Reset": f"{time.time() + bucket.reset_at - now:.3f}",
+            "X-RateLimit-Reset-After": f"{bucket.reset_at - now:.3f}",
+            "X-RateLimit-Bucket": hashlib.sha1(template.encode()).hexdigest()[:16],
+        }
+        return headers, retry_after, False
+
+    async def _handle(self, request: web.Request):
+        path = "/" + request.match_info["tail"]
+        template, major = self._template(request.method, path)
+        self.requests[template] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.rng.random() * self.jitter)
+
+        headers, retry_after, is_global = self._check_ratelimit(template, major, time.monotonic())
+        if retry_after is not None:
+            self.ratelimited[template] += 1
+            headers.update({"Retry-After": f"{retry_after:.3f}", "Via": "1.1 google",
+                            "X-RateLimit-Scope": "global" if is_global else "user"})
+            if is_global:
+                headers["X-RateLimit-Global"] = "true"
+            return _json_response({"message": "You are being rate limited.", "retry_after": retry_after, "global": is_global},
+                                     status=429, headers=headers)
+
+        body = None
+        if request.content_type == "multipart/form-data":
+            # messages with attachments: JSON in `payload_json`, files in `files[n]`
+            form = await request.post()
+            body = json.loads(form.get("payload_json") or "{}")
+            body["_files"] = [(v.filename, v.file.read()) for k, v in form.items() if k.startswith("files[")]
+        elif request.can_read_body:
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+        for method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match and method == request.method:
+                status, data = handler(request, body, *(int(g) for g in match.groups()))
+                if data is None:
+                    return web.Response(status=status, headers=headers)
+                return _json_response(data, status=status, headers=headers)
+        return _json_response({"message": "404: Not Found", "code": 0}, status=404, headers=headers)
+
+    def _dispatch(self, event: str, payload: dict, *, force: bool = False):
+        if not (self.gateway or force) or self.state is None:
+            return
+        parser = getattr(self.state, "parse_" + event.lower())
+        # real gateway events arrive after the REST response
+        asyncio.get_running_loop().call_soon(parser, payload)
+
+    @staticmethod
+    def _error(status: int, code: int, message: str):
+        return status, {"message": message, "code": code}
+
+    # ---------- route handlers: (request, json body, *path ids) -> (status, json) ----------
+    def _get_me(self, request, body):
+        return 200, self.bot_user
+
+    def _get_application(self, request, body):
+        return 200, {"id": self.bot_user["id"], "name": "ModeratorBot", "description": "", "bot_public": True,
+                     "bot_require_code_grant": False, "verify_key": "", "flags": 0, "icon": None}
+
+    def _create_dm(self, request, body):
+        uid = int(body["recipient_id"])
+        cid = self.snowflake()
+        self.dm_channels[cid] = uid
+        self.channels[cid] = {"payload": {"id": str(cid), "type": 1}, "messages": OrderedDict()}
+        return 200, {"id": str(cid), "type": 1, "last_message_id": None, "recipients": [self.users[uid]]}
+
+    def _create_message(self, request, body, channel_id):
+        if channel_id not in self.channels:
+            return self._error(404, 10003, "Unknown Channel")
+        if self.dm_channels.get(channel_id) in self.closed_dms:
+            return self._error(403, 50007, "Cannot send messages to this user")
+        body = body or {}
+        payload = self._store_message(channel_id, self.bot_user, body.get("content") or "", body.get("embeds") or [])
+        for filename, data in body.get("_files", ()):
+            self.uploads.append((channel_id, filename, data))
+            aid = self.snowflake()
+            payload["attachments"].append({"id": str(aid), "filename": filename, "size": len(data),
+                                           "url": f"https://cdn.invalid/{aid}/{filename}", "proxy_url": f"https://cdn.invalid/{aid}/{filename}"})
+        if channel_id not in self.dm_channels:
+            self._dispatch("MESSAGE_CREATE", payload)
+        return 200, payload
+
+    def _get_messages(self, request, body, channel_id):
+        if channel_id not in self.channels:
+            return self._error(404, 10003, "Unknown Channel")
+        limit = int(request.query.get("limit", 50))
+        before = int(request.query.get("before", 0)) or None
+        out = []
+        for mid in reversed(self.channels[channel_id]["messages"]):
+            if before is None or mid < before:
+                out.append(self.channels[channel_id]["messages"][mid])
+                if len(out) >= limit:
+                    break
+        return 200, out
+
+    def _delete_message(self, request, body, channel_id, message_id):
+        messages = self.channels.get(channel_id, {}).get("messages", {})
+        if messages.pop(message_id, None) is None:
+            return self._error(404, 10008, "Unknown Message")
+        payload = {"id": str(message_id), "channel_id": str(channel_id)}
+        guild_id = self.channels[channel_id]["payload"].get("guild_id")
+        if guild_id:
+            payload["guild_id"] = guild_id
+        self._dispatch("MESSAGE_DELETE", payload)
+        return 204, None
+
+    def _bulk_delete(self, request, body, channel_id):
+        ids = [int(i) for i in (body or {}).get("messages", [])]
+        if not 2 <= len(ids) <= 100:
+            return self._error(400, 50016, "Bulk delete needs between 2 and 100 messages")
+        messages = self.channels[channel_id]["messages"]
+        for mid in ids:
+            messages.pop(mid, None)
+        self._dispatch("MESSAGE_DELETE_BULK", {"ids": [str(i) for i in ids], "channel_id": str(channel_id),
+                                               "guild_id": self.channels[channel_id]["payload"].get("guild_id")})
+        return 204, None
+
+    def _edit_overwrite(self, request, body, channel_id, target_id):
+        channel = self.channels[channel_id]["payload"]
+        overwrite = {"id": str(target_id), "type": (body or {}).get("type", 0),
+                     "allow": str((body or {}).get("allow", 0)), "deny": str((body or {}).get("deny", 0))}
+        channel["permission_overwrites"] = [o for o in channel["permission_overwrites"] if o["id"] != str(target_id)] + [overwrite]
+        self._dispatch("CHANNEL_UPDATE", channel)
+        return 204, None
+
+    def _create_channel(self, request, body, guild_id):
+        g = self.guilds[guild_id]
+        payload = self._new_channel(g, body.get("name", "new-channel"), len(g["channels"]))
+        self._dispatch("CHANNEL_CREATE", payload)
+        return 201, payload
+
+    def _create_role(self, request, body, guild_id):
+        g = self.guilds[guild_id]
+        body = body or {}
+        role = {"id": str(self.snowflake()), "name": body.get("name", "new role"), "color": body.get("color", 0),
+                "hoist": body.get("hoist", False), "position": 1, "permissions": str(body.get("permissions", 0)),
+                "managed": False, "mentionable": body.get("mentionable", False), "flags": 0}
+        g["roles"][int(role["id"])] = role
+        self._dispatch("GUILD_ROLE_CREATE", {"guild_id": str(guild_id), "role": role})
+        return 200, role
+
+    def _edit_role(self, request, body, guild_id, role_id):
+        role = self.guilds[guild_id]["roles"].get(role_id)
+        if role is None:
+            return self._error(404, 10011, "Unknown Role")
+        for key in ("name", "color", "hoist", "mentionable"):
+            if key in (body or {}):
+                role[key] = body[key]
+        if "permissions" in (body or {}):
+            role["permissions"] = str(body["permissions"])
+        self._dispatch("GUILD_ROLE_UPDATE", {"guild_id": str(guild_id), "role": role})
+        return 200, role
+
+    def _get_member(self, request, body, guild_id, user_id):
+        member = self.guilds[guild_id]["members"].get(user_id)
+        if member is None:
+            return self._error(404, 10007, "Unknown Member")
+        return 200, member
+
+    def _member_removed(self, guild_id: int, user_id: int):
+        member = self.guilds[guild_id]["members"].pop(user_id, None)
+        if member:
+            self._dispatch("GUILD_MEMBER_REMOVE", {"guild_id": str(guild_id), "user": member["user"]})
+        return member
+
+    def _kick(self, request, body, guild_id, user_id):
+        if self._member_removed(guild_id, user_id) is None:
+            return self._error(404, 10007, "Unknown Member")
+        return 204, None
+
+    def _member_roles(self, guild_id, user_id, role_id, add: bool):
+        member = self.guilds[guild_id]["members"].get(user_id)
+        if member is None:
+            return self._error(404, 10007, "Unknown Member")
+        roles = [r for r in member["roles"] if r != str(role_id)]
+        if add:
+            roles.append(str(role_id))
+        member["roles"] = roles
+        self._dispatch("GUILD_MEMBER_UPDATE", dict(member, guild_id=str(guild_id)))
+        return 204, None
+
+    def _add_member_role(self, request, body, guild_id, user_id, role_id):
+        return self._member_roles(guild_id, user_id, role_id, True)
+
+    def _remove_member_role(self, request, body, guild_id, user_id, role_id):
+        return self._member_roles(guild_id, user_id, role_id, False)
+
+    def _get_bans(self, request, body, guild_id):
+        limit = int(request.query.get("limit", 1000))
+        after = int(request.query.get("after", 0))
+        bans = [b for uid, b in sorted(self.guilds[guild_id]["bans"].items()) if uid > after]
+        return 200, bans[:limit]
+
+    def _ban(self, request, body, guild_id, user_id):
+        user = self.users.get(user_id)
+        if user is None:
+            return self._error(404, 10013, "Unknown User")
+        reason = request.headers.get("X-Audit-Log-Reason")
+        self.guilds[guild_id]["bans"][user_id] = {"user": user, "reason": reason}
+        self._dispatch("GUILD_BAN_ADD", {"guild_id": str(guild_id), "user": user})
+        self._member_removed(guild_id, user_id)
+        return 204, None
+
+    def _unban(self, request, body, guild_id, user_id):
+        if self.guilds[guild_id]["bans"].pop(user_id, None) is None:
+            return self._error(404, 10026, "Unknown Ban")
+        self._dispatch("GUILD_BAN_REMOVE", {"guild_id": str(guild_id), "user": self.users[user_id]})
+        return 204, None
+
@@ -0,0 +1,235 @@
+"""Fake guilds, members, channels and messages for offline tests and benchmarks.
+
+`GuildMock` / `MemberMock` carry enough of the discord.py surface for the real handlers
+in src/mybot.py to run; test_mybot.py builds its fixtures from them.
+Every outbound call is counted in `GuildMock.requests` and can be slowed down with
+`latency` to imitate a REST round trip.
+"""
+import asyncio
+import itertools
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import discord
+
+_ids = itertools.count(1_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+def forbidden(message: str = "Cannot send messages to this user", code: int = 50007) -> discord.Forbidden:
+    return discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), {"code": code, "message": message})
+
+
+class PermissionsMock:
+    def __init__(self, **overrides):
+        self.send_messages = True
+        self.manage_guild = False
+        for k, v in overrides.items():
+            setattr(self, k, v)
+
+
+class RoleMock:
+    def __init__(self, guild, name: str, position: int = 1, id: int = None):
+        self.guild = guild
+        self.id = id or next_id()
+        self.name = name
+        self.position = position
+        self.mention = f"<@&{self.id}>"
+
+    def __repr__(self):
+        return f"<RoleMock {self.name}>"
+
+
+class ChannelMock:
+    def __init__(self, guild, name: str, id: int = None):
+        self.guild = guild
+        self.id = id or next_id()
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.sent = []
+        self.messages = []  # history, oldest first
+
+    def permissions_for(self, member):
+        return PermissionsMock()
+
+    async def send(self, content=None, *, embed=None, view=None, delete_after=None):
+        await self.guild.request("channel.send")
+        self.sent.append(SimpleNamespace(content=content, embed=embed, view=view))
+        msg = MessageMock(self.guild, self.guild.me, content or "", channel=self)
+        self.messages.append(msg)
+        return msg
+
+    async def history(self, limit=100):
+        await self.guild.request("channel.history")
+        for msg in reversed(self.messages[-limit:] if limit else self.messages):
+            yield msg
+
+    async def set_permissions(self, target, **kwargs):
+        await self.guild.request("channel.set_permissions")
+
+    def __repr__(self):
+        return f"<ChannelMock #{self.name}>"
+
+
+class MemberMock:
+    def __init__(self, guild, name: str = None, *, id: int = None, bot: bool = False, dms_closed: bool = False,
+                 created_at: datetime = None, roles=()):
+        self.guild = guild
+        self.id = id or next_id()
+        self.name = name or f"user{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = bot
+        self.dms_closed = dms_closed
+        self.created_at = created_at or datetime.now(timezone.utc) - timedelta(days=365)
+        self.joined_at = datetime.now(timezone.utc)
+        self.roles = list(roles)
+        self.guild_permissions = PermissionsMock()
+        self.dms = []
+
+    @property
+    def top_role(self):
+        return max(self.roles, key=lambda r: r.position) if self.roles else None
+
+    async def send(self, content=None, *, embed=None):
+        await self.guild.request("user.dm")
+        if self.dms_closed:
+            raise forbidden()
+        self.dms.append(SimpleNamespace(content=content, embed=embed))
+
+    async def add_roles(self, *roles, reason=None):
+        await self.guild.request("member.add_roles")
+        self.roles.extend(roles)
+
+    async def timeout(self, until, *, reason=None):
+        await self.guild.request("member.timeout")
+        self.timed_out_until = until
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.guild.request("member.remove_roles")
+        for r in roles:
+            if r in self.roles:
+                self.roles.remove(r)
+
+    def __str__(self):
+        return self.name
+
+
+class MessageMock:
+    def __init__(self, guild, author, content: str, *, channel=None, id: int = None):
+        self.guild = guild
+        self.id = id or next_id()
+        self.author = author
+        self.content = content
+        self.channel = channel
+        self.deleted = False
+        self._state = None  # commands.Context reads this; nothing uses it for plain messages
+
+    async def delete(self):
+        await self.guild.request("message.delete")
+        self.deleted = True
+
+
+class GuildMock:
+    def __init__(self, name: str = "Test Guild", *, id: int = None, latency: float = 0.0):
+        self.id = id or next_id()
+        self.name = name
+        self.latency = latency
+        self.requests = Counter()
+        self.roles = [RoleMock(self, "@everyone", position=0, id=self.id)]
+        self.default_role = self.roles[0]
+        self.text_channels = []
+        self._members = {}
+        self.me = MemberMock(self, "ModeratorBot", bot=True)
+        self.system_channel = None
+        self.owner = None
+
+    async def request(self, route: str):
+        # one simulated REST call
+        self.requests[route] += 1
+        await asyncio.sleep(self.latency)
+
+    # ----- lookups -----
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def member_count(self):
+        return len(self._members)
+
+    @property
+    def channels(self):
+        return list(self.text_channels)
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    def get_role(self, role_id):
+        for r in self.roles:
+            if r.id == role_id:
+                return r
+        return None
+
+    def get_channel(self, channel_id):
+        for c in self.text_channels:
+            if c.id == channel_id:
+                return c
+        return None
+
+    # ----- building -----
+    def add_member(self, member: MemberMock) -> MemberMock:
+        self._members[member.id] = member
+        return member
+
+    def add_channel(self, name: str) -> ChannelMock:
+        ch = ChannelMock(self, name)
+        self.text_channels.append(ch)
+        return ch
+
+    def add_role(self, name: str) -> RoleMock:
+        role = RoleMock(self, name, position=len(self.roles))
+        self.roles.append(role)
+        return role
+
+    # ----- REST-backed actions -----
+    async def create_text_channel(self, name, **kwargs):
+        await self.request("guild.create_channel")
+        return self.add_channel(name)
+
+    async def create_role(self, name=None, **kwargs):
+        await self.request("guild.create_role")
+        return self.add_role(name)
+
+    async def fetch_member(self, user_id):
+        await self.request("guild.fetch_member")
+        member = self._members.get(user_id)
+        if member is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Member")
+        return member
+
+    async def ban(self, user, *, reason=None):
+        await self.request("guild.ban")
+        self._members.pop(user.id, None)
+
+    def __repr__(self):
+        return f"<GuildMock {self.name}>"
+
+
+def build_guild(members: int = 100, *, channels=("general", "random"), log_channel: str = "mod-log",
+                mod_role: str = "Moderator", latency: float = 0.0) -> GuildMock:
+    guild = GuildMock(f"Guild {next_id()}", latency=latency)
+    for name in channels:
+        guild.add_channel(name)
+    if log_channel:
+        guild.add_channel(log_channel)
+    if mod_role:
+        guild.add_role(mod_role)
+    guild.system_channel = guild.text_channels[0] if guild.text_channels else None
+    for _ in range(members):
+        guild.add_member(MemberMock(guild))
+    guild.owner = guild.members[0] if members else guild.me
+    return guild
@@ -0,0 +1,237 @@
+"""Replay a recorded traffic file against the bot, offline.
+
+Recordings come from the bot itself (`TRAFFIC_RECORD_FILE=... python src/mybot.py`
+or `!traffic start` / `!traffic stop`, see src/traffic.py). Each recorded guild is
+rebuilt in tests/fakediscord.py with the same member/channel counts and blacklist,
+pseudonymous users and channels are mapped onto fake ones as they appear, and the
+events are dispatched through the bot's real gateway path with their original
+spacing, scaled by `--speed`.
+
+    python tests/replay_traffic.py data/traffic/traffic-20240101-120000.jsonl            # real time
+    python tests/replay_traffic.py recording.jsonl --speed 10 --json before.json          # 10x
+    python tests/replay_traffic.py recording.jsonl --speed 0 --latency 0.05 --json after.json
+    python tests/replay_traffic.py --compare before.json after.json
+
+Messages from users who were moderators at recording time are replayed as the guild
+owner, so their commands pass permission checks.
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+os.environ.setdefault("BOT_DATA_DIR", tempfile.mkdtemp(prefix="modbot-replay-"))
+
+import mybot  # noqa: E402
+from traffic import read_traffic  # noqa: E402
+from fakediscord import FakeDiscord  # noqa: E402
+
+HANDLERS = ("on_message", "on_member_join")  # the handlers timed in mybot.EVENT_SECONDS
+MENTION = re.compile(r"<(@!?|@&|#)(\d+)>")
+
+
+class Replayer:
+    """Maps a recording's pseudonymous IDs onto objects in a FakeDiscord."""
+
+    def __init__(self, fake: FakeDiscord, *, max_members: int = 500):
+        self.fake = fake
+        self.max_members = max_members
+        self.guilds = {}  # {pseudo guild: discord.Guild}
+        self.users = {}  # {(pseudo guild, pseudo user): user id}
+        self.channels = {}  # {(pseudo guild, pseudo channel): channel id}
+        self.roles = {}  # {(pseudo guild, pseudo role): role id}
+
+    def add_guild(self, ev: dict):
+        guild = self.fake.add_guild(f"Replay {len(self.guilds) + 1}", members=min(ev["members"], self.max_members),
+                                    channels=max(ev["channels"], 1))
+        self.guilds[ev["g"]] = guild
+        if ev.get("blacklist") or ev.get("exempt"):
+            mybot.blocklist.prime(guild.id, ev.get("blacklist", ()), ev.get("exempt", ()))
+        if ev.get("prefix", "!") != mybot.guild_config.value(guild.id, "prefix"):
+            mybot.guild_config.set(guild.id, "prefix", ev["prefix"])
+
+    def guild(self, pseudo_guild: int):
+        guild = self.guilds.get(pseudo_guild)
+        if guild is None:  # recording started mid-stream without a guild line; use defaults
+            self.add_guild({"g": pseudo_guild, "members": 50, "channels": 3})
+            guild = self.guilds[pseudo_guild]
+        return guild
+
+    def user(self, g: int, u: int, *, bot: bool = False) -> int:
+        key = (g, u)
+        if key not in self.users:
+            guild = self.guild(g)
+            # hand out existing members first, then grow the guild quietly
+            taken = set(self.users.values())
+            spare = [m.id for m in guild.members if not m.bot and m.id not in taken and m.id != guild.owner_id] if not bot else []
+            self.users[key] = spare[0] if spare else self.fake.add_member(guild, bot=bot, dispatch=False)
+        return self.users[key]
+
+    def channel(self, g: int, c: int) -> int:
+        key = (g, c)
+        if key not in self.channels:
+            guild = self.guild(g)
+            used = {cid for (pg, _), cid in self.channels.items() if pg == g}
+            log_channel = mybot.guild_config.value(guild.id, "log_channel")
+            free = [ch.id for ch in guild.text_channels if ch.id not in used and ch.name != log_channel]
+            self.channels[key] = free[0] if free else self.fake.add_channel(guild, f"channel-{len(used)}")
+        return self.channels[key]
+
+    def rewrite(self, g: int, text: str) -> str:
+        def sub(match):
+            kind, pseudo = match.group(1), int(match.group(2))
+            if kind == "#":
+                return f"<#{self.channel(g, pseudo)}>"
+            if kind == "@&":
+                role_id = self.roles.get((g, pseudo))
+                return f"<@&{role_id}>" if role_id else "@deleted-role"
+            return f"<@{self.user(g, pseudo)}>"
+        return MENTION.sub(sub, text)
+
+    def dispatch(self, ev: dict):
+        kind = ev["e"]
+        if kind == "blocklist":
+            mybot.blocklist.set_global(ev["words"])
+        elif kind == "guild":
+            if ev["g"] not in self.guilds:
+                self.add_guild(ev)
+        elif kind == "message":
+            guild = self.guild(ev["g"])
+            author = guild.owner_id if ev.get("mod") else self.user(ev["g"], ev["u"], bot=ev.get("bot", False))
+            channel = guild.get_channel(self.channel(ev["g"], ev["c"]))
+            self.fake.inject_message(channel, author, self.rewrite(ev["g"], ev["text"]))
+        elif kind == "join":
+            created = datetime.now(timezone.utc) - timedelta(days=ev.get("age", 365))
+            self.users[(ev["g"], ev["u"])] = self.fake.add_member(self.guild(ev["g"]), bot=ev.get("bot", False), created_at=created)
+        elif kind == "role":
+            guild, key = self.guild(ev["g"]), (ev["g"], ev["r"])
+            name = "Moderator" if ev.get("mod") else f"role-{ev['r'] % 10000}"
+            if ev["op"] == "create" or key not in self.roles:
+                self.roles[key] = self.fake.inject_role(guild, "create", name=name)
+            if ev["op"] == "update":
+                self.fake.inject_role(guild, "update", self.roles[key], name=name)
+            elif ev["op"] == "delete":
+                self.fake.inject_role(guild, "delete", self.roles.pop(key))
+
+
+def handler_stats() -> dict:
+    return {name: {"count": mybot.EVENT_SECONDS.count(event=name), "seconds": mybot.EVENT_SECONDS.sum(event=name)}
+            for name in HANDLERS}
+
+
+async def replay(path: str, *, speed: float = 1.0, latency: float = 0.0, max_members: int = 500, **limits) -> dict:
+    """Replays `path` and returns a summary dict (see --json)."""
+    events = list(read_traffic(path))
+    fake = FakeDiscord(latency=latency, **limits)
+    await fake.start(mybot.bot)
+    try:
+        replayer = Replayer(fake, max_members=max_members)
+        for ev in events:  # build guilds (and the shared blocklist) up front so their setup isn't counted
+            if ev["e"] in ("blocklist", "guild"):
+                replayer.dispatch(ev)
+        await asyncio.sleep(0)
+        fake.requests.clear()
+        fake.ratelimited.clear()
+        before = handler_stats()
+
+        kinds = Counter()
+        wall, cpu = time.perf_counter(), time.process_time()
+        for ev in events:
+            if ev["e"] in ("blocklist", "guild"):
+                continue
+            if speed:
+                delay = wall + ev["t"] / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            replayer.dispatch(ev)
+            kinds[ev["e"]] += 1
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        await fake.drain()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        after = handler_stats()
+        handlers = {name: {k: after[name][k] - before[name][k] for k in ("count", "seconds")}
+                    for name in HANDLERS if after[name]["count"] > before[name]["count"]}
+    finally:
+        await fake.stop()
+    return {
+        "file": os.path.basename(path), "speed": speed, "latency": latency, "events": dict(kinds),
+        "wall_seconds": round(wall, 4), "cpu_seconds": round(cpu, 4), "handlers": handlers,
+        "requests": dict(fake.requests), "ratelimited": dict(fake.ratelimited),
+    }
+
+
+def format_summary(summary: dict) -> str:
+    speed = f"{summary['speed']:g}x" if summary["speed"] else "full speed"
+    lines = [f"{summary['file']} at {speed}: "
+             + ", ".join(f"{n} {k}" for k, n in sorted(summary["events"].items())),
+             f"wall {summary['wall_seconds']:.3f}s, cpu {summary['cpu_seconds']:.3f}s"]
+    for name, h in summary["handlers"].items():
+        lines.append(f"  {name:<22} {h['count']:>7}  {h['seconds'] * 1000:>10.1f} ms total")
+    lines.append(f"  {sum(summary['requests'].values())} requests, {sum(summary['ratelimited'].values())} answered 429")
+    for route, n in sorted(summary["requests"].items(), key=lambda kv: -kv[1]):
+        lines.append(f"  {n:>7}  {route}")
+    return "\n".join(lines)
+
+
+def compare(a: dict, b: dict) -> str:
+    def row(label, x, y, fmt="{:.3f}"):
+        change = f"{(y - x) / x * 100:+.1f}%" if x else "n/a"
+        return f"  {label:<40} {fmt.format(x):>12} {fmt.format(y):>12}  {change:>8}"
+
+    lines = [f"  {'':<40} {'A':>12} {'B':>12}  {'change':>8}",
+             row("wall seconds", a["wall_seconds"], b["wall_seconds"]),
+             row("cpu seconds", a["cpu_seconds"], b["cpu_seconds"])]
+    for name in sorted(set(a["handlers"]) | set(b["handlers"])):
+        ha, hb = a["handlers"].get(name, {}), b["handlers"].get(name, {})
+        lines.append(row(f"{name} ms", ha.get("seconds", 0) * 1000, hb.get("seconds", 0) * 1000, "{:.1f}"))
+    lines.append(row("requests", sum(a["requests"].values()), sum(b["requests"].values()), "{:d}"))
+    for route in sorted(set(a["requests"]) | set(b["requests"])):
+        lines.append(row(route, a["requests"].get(route, 0), b["requests"].get(route, 0), "{:d}"))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", nargs="?", help="traffic file written by the bot")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster, 0 = no pauses")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every REST response")
+    parser.add_argument("--bucket-limit", type=int, default=5)
+    parser.add_argument("--bucket-window", type=float, default=1.0)
+    parser.add_argument("--global-limit", type=int, default=50, help="requests per second across all routes")
+    parser.add_argument("--max-members", type=int, default=500, help="cap on members built per recorded guild")
+    parser.add_argument("--json", metavar="FILE", help="also write the summary to FILE")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="compare two --json summaries and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as fa, open(args.compare[1]) as fb:
+            print(compare(json.load(fa), json.load(fb)))
+        return
+    if not args.recording:
+        parser.error("a recording (or --compare A B) is required")
+
+    with contextlib.redirect_stdout(sys.stderr):  # handler prints go to stderr
+        summary = asyncio.run(replay(
+            args.recording, speed=args.speed, latency=args.latency, max_members=args.max_members,
+            bucket_limit=args.bucket_limit, bucket_window=args.bucket_window, global_limit=args.global_limit,
+        ))
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import pytest
+import mybot
+from bench_handlers import run_scenario
+
+@pytest.mark.asyncio
+async def test_message_scenario_auto_moderates_hits():
+    result = await run_scenario("messages", events=200, guilds=2, members=20, blacklist=10, hit_ratio=0.5)
+    assert result.events == 200
+    assert len(result.latencies) == 200
+    deleted = result.requests["message.delete"]
+    assert deleted > 0
+    assert sum(len(v) for g in mybot.warnings_db.loaded().values() for v in g.values()) == deleted
+
+@pytest.mark.asyncio
+async def test_join_scenario_welcomes_each_member():
+    result = await run_scenario("joins", events=50, guilds=2, members=5)
+    assert result.requests["user.dm"] == 50
+    assert result.percentile(99) >= result.percentile(50)
+
+@pytest.mark.asyncio
+async def test_paced_replay():
+    result = await run_scenario("warns", events=20, rate=1000, guilds=1, members=5)
+    assert len(result.latencies) == 20
+
+@pytest.mark.asyncio
+async def test_embed_scenario_logs_each_event():
+    result = await run_scenario("embeds", events=30, guilds=2, members=5)
+    assert result.requests["channel.send"] == 30
+    assert "template" in result.notes
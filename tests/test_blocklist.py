@@ -0,0 +1,67 @@
+import json
+from blocklist import BlacklistFiles, CompiledBlocklist, LayeredBlocklist, read_words
+
+def test_compiled_matches_like_substring_search():
+    words = ["spam", "spammer", "bad word", "a.b", "Scam"]
+    compiled = CompiledBlocklist(words)
+    for text in ["no match here", "total spammer", "what a BAD WORD", "axb", "a.b!", "scam alert", "sp am"]:
+        found = compiled.first(text.lower())
+        expected = [w for w in words if w.lower() in text.lower()]
+        assert (found in expected) if expected else found is None, text
+    assert "SPAM" in compiled and len(compiled) == 5
+
+def test_exempt_match_does_not_hide_overlapping_words():
+    compiled = CompiledBlocklist(["spammer", "spam"])
+    assert compiled.first("spammer", skip={"spammer"}) == "spam"
+    assert compiled.first("spammer", skip={"spammer", "spam"}) is None
+    inner = CompiledBlocklist(["classic", "ass", "sic"])
+    assert inner.first("a classic", skip={"classic"}) == "ass"  # starts inside the exempt match
+    assert inner.first("a classic", skip={"classic", "ass"}) == "sic"
+    assert inner.first("classic then spam", skip={"classic", "ass", "sic"}) is None
+
+def test_guild_deltas_on_top_of_shared_words():
+    stored = {1: (["Spam", "local"], []), 2: ([], ["spam"])}
+    layered = LayeredBlocklist(["spam", "scam"], loader=lambda gid: stored.get(gid, ((), ())))
+    assert layered.added(1) == ["local"]  # the copy of a global word is dropped
+    assert layered.match(1, "LOCAL news") == "local"
+    assert layered.match(2, "spam") is None and layered.match(2, "scam") == "scam"
+    assert layered.match(3, "spam") == "spam"
+    assert layered.add(3, "SCAM") is None
+    assert layered.remove(3, "scam") == "exempted" and layered.match(3, "scam") is None
+    assert layered.add(3, "scam") == "unexempted" and layered.match(3, "scam") == "scam"
+    assert layered.add(3, "new") == "added" and layered.add(3, "NEW") is None
+    assert layered.remove(3, "New") == "removed" and layered.remove(3, "new") is None
+    assert sorted(layered.words(2)) == ["scam"]
+
+def test_read_words_skips_comments(tmp_path):
+    path = tmp_path / "global.txt"
+    path.write_text("# shared list\nspam\n\n  scam  \n", encoding="utf-8")
+    assert read_words(str(path)) == ["spam", "scam"]
+    assert read_words(str(tmp_path / "missing.txt")) == []
+
+def test_prime_skips_the_loader():
+    calls = []
+    layered = LayeredBlocklist(["spam"], loader=lambda gid: calls.append(gid) or ((), ()))
+    assert not layered.is_loaded(1)
+    layered.prime(1, ["eggs", "spam"], ["spam"])
+    assert layered.is_loaded(1) and calls == []
+    assert layered.match(1, "spam and eggs") == "eggs"
+    assert layered.added(1) == ["eggs"]
+
+def test_blacklist_files_migrate_once_without_global_copies(tmp_path):
+    legacy = tmp_path / "blacklist.json"
+    legacy.write_text(json.dumps({"guild_id_1": ["x"], "1": ["Spam", "local"], "2": {"words": ["spam"], "exempt": ["scam"]},
+                                  "3": ["spam"]}))
+    files = BlacklistFiles(str(tmp_path / "blacklists"), legacy_path=str(legacy), drop=lambda w: w.lower() in ("spam", "scam"))
+    assert not legacy.exists() and (tmp_path / "blacklist.json.migrated").exists()
+    assert files.guild_ids() == ["1", "2"]
+    assert files.load(1) == (["local"], []) and files.load(2) == ([], ["scam"]) and files.load(3) == ([], [])
+
+def test_blacklist_files_save_one_guild(tmp_path):
+    files = BlacklistFiles(str(tmp_path))
+    files.save(1, ["a"])
+    files.save(2, ["b"], ["c"])
+    before = (tmp_path / "1.json").stat().st_mtime_ns
+    files.save(2, [], [])
+    assert files.guild_ids() == ["1"] and (tmp_path / "1.json").stat().st_mtime_ns == before
+    assert BlacklistFiles(str(tmp_path)).load(1) == (["a"], [])
@@ -0,0 +1,39 @@
+import pytest
+from botmetrics import Registry, timed
+
+def test_histogram_render_is_cumulative():
+    reg = Registry()
+    h = reg.histogram("handler_seconds", "Handler time.", buckets=(0.1, 1.0))
+    h.observe(0.05, event="on_message")
+    h.observe(0.5, event="on_message")
+    h.observe(5, event="on_message")
+    text = reg.render()
+    assert '# TYPE handler_seconds histogram' in text
+    assert 'handler_seconds_bucket{event="on_message",le="0.1"} 1' in text
+    assert 'handler_seconds_bucket{event="on_message",le="1"} 2' in text
+    assert 'handler_seconds_bucket{event="on_message",le="+Inf"} 3' in text
+    assert 'handler_seconds_count{event="on_message"} 3' in text
+
+def test_counter_and_gauge_function():
+    reg = Registry()
+    c = reg.counter("errors_total", "Errors.")
+    c.inc(where="a")
+    c.inc(where="a")
+    assert c.value(where="a") == 2
+    g = reg.gauge("queue_depth", "Depth.")
+    g.set_function(lambda: 7, queue="dm")
+    assert 'queue_depth{queue="dm"} 7' in reg.render()
+    assert reg.counter("errors_total", "Errors.") is c
+
+@pytest.mark.asyncio
+async def test_timed_coroutine_keeps_name():
+    reg = Registry()
+    h = reg.histogram("t", "T.")
+
+    @timed(h, op="x")
+    async def on_message():
+        return 1
+
+    assert on_message.__name__ == "on_message"
+    assert await on_message() == 1
+    assert h.count(op="x") == 1
@@ -0,0 +1,63 @@
+import sys
+import time
+import runpy
+import asyncio
+from types import SimpleNamespace
+import pytest
+import botprofiler
+from botprofiler import StackSampler, SlowHandlerLog
+
+def busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+def test_sampler_writes_folded_stacks(tmp_path):
+    path = tmp_path / "profile.folded"
+    sampler = StackSampler(interval=0.001)
+    sampler.start(0.2, str(path))
+    busy(0.1)
+    sampler._thread.join()
+    lines = path.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "busy" in "\n".join(lines)
+
+def test_samples_go_to_the_handler_not_the_entry_point(tmp_path, monkeypatch):
+    # like production: the entry-point module calls asyncio.run, and a handler runs as a task
+    script = tmp_path / "entry.py"
+    script.write_text(
+        "import sys, asyncio\n"
+        "def helper():\n"
+        "    SAMPLER._record(sys._getframe())\n"
+        "async def on_message():\n"
+        "    helper()\n"
+        "async def main():\n"
+        "    await asyncio.create_task(on_message())\n"
+        "asyncio.run(main())\n"
+    )
+    monkeypatch.setattr(botprofiler, "SRC_DIR", str(tmp_path))
+    sampler = StackSampler()
+    runpy.run_path(str(script), init_globals={"SAMPLER": sampler}, run_name="__main__")
+    assert dict(sampler.handlers) == {"on_message": 1}
+
+@pytest.mark.asyncio
+async def test_slow_handler_log_records_guild():
+    log = SlowHandlerLog(threshold=0.01)
+    seen = []
+    log.on_slow = lambda handler, guild, seconds: seen.append(handler)
+    guild = SimpleNamespace(id=1, name="G")
+
+    @log.watch()
+    async def on_member_join(member):
+        await asyncio.sleep(0.02)
+
+    @log.watch()
+    async def fast(member):
+        pass
+
+    await on_member_join(SimpleNamespace(guild=guild))
+    await fast(SimpleNamespace(guild=guild))
+    assert seen == ["on_member_join"]
+    assert log.recent[0][2] is guild
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from fakes import GuildMock, MemberMock
+from dmqueue import DMDispatcher
+
+@pytest.mark.asyncio
+async def test_closed_dms_are_cached_and_duplicates_dropped():
+    guild = GuildMock()
+    open_user, closed_user = MemberMock(guild), MemberMock(guild, dms_closed=True)
+    results = []
+    dms = DMDispatcher(rate=0, on_result=results.append)
+    task = asyncio.create_task(dms.run())
+    assert dms.send(open_user, "hi")
+    assert not dms.send(open_user, "hi")  # same notice within the window
+    assert dms.send(open_user, "bye")
+    assert dms.send(closed_user, "hi")
+    await dms.drain()
+    assert not dms.send(closed_user, "again")  # known closed: no REST call
+    task.cancel()
+    assert [d.content for d in open_user.dms] == ["hi", "bye"]
+    assert guild.requests["user.dm"] == 3
+    assert sorted(results) == ["closed", "closed", "duplicate", "sent", "sent"]
+
+@pytest.mark.asyncio
+async def test_paced_and_bounded():
+    guild = GuildMock()
+    dms = DMDispatcher(rate=50, maxsize=3)
+    users = [MemberMock(guild) for _ in range(4)]
+    assert [dms.send(u, "x") for u in users] == [True, True, True, False]
+    task = asyncio.create_task(dms.run())
+    start = asyncio.get_running_loop().time()
+    await dms.drain()
+    task.cancel()
+    assert asyncio.get_running_loop().time() - start >= 2 / 50
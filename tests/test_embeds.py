@@ -0,0 +1,23 @@
+import discord
+from embeds import EmbedTemplate, template_for
+
+def test_build_matches_a_constructed_embed():
+    template = EmbedTemplate(color=discord.Color.red(), footer="shared")
+    built = template.build("Title", "Body")
+    plain = discord.Embed(title="Title", description="Body", color=discord.Color.red(), timestamp=built.timestamp)
+    plain.set_footer(text="shared")
+    assert built.to_dict() == plain.to_dict()
+    assert built.timestamp.tzinfo is not None
+
+def test_builds_do_not_share_mutable_state():
+    template = EmbedTemplate(footer="shared")
+    first = template.build("a", footer="own")
+    second = template.build("b")
+    first.add_field(name="x", value="y")
+    assert second.footer.text == "shared" and not second.fields
+    assert template_for(discord.Color.green()) is template_for(discord.Color.green())
+
+def test_editing_a_built_footer_leaves_the_template_alone():
+    template = EmbedTemplate(footer="shared")
+    template.build("a")._footer["text"] = "changed"
+    assert template.build("b").footer.text == "shared"
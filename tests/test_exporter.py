@@ -0,0 +1,63 @@
+import csv
+import gzip
+import json
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import discord
+import pytest
+import mybot
+from exporter import moderation_rows, write_export
+
+async def _rows(n):
+    for i in range(n):
+        yield {"type": "warning", "user_id": str(i), "reason": f"r{i}"}
+
+class _AuditGuild:
+    def __init__(self, banned):
+        self.banned = banned
+        self.limits = []
+
+    async def bans(self, limit=None):
+        yield SimpleNamespace(user=self.banned, reason="raid")
+
+    async def audit_logs(self, limit=None, action=None):
+        self.limits.append(limit)
+        if action is discord.AuditLogAction.ban:
+            yield SimpleNamespace(target=self.banned, user=None, reason="raid", created_at=datetime.now(timezone.utc))
+
+@pytest.mark.asyncio
+async def test_audit_rows_are_typed_apart_from_current_bans():
+    guild = _AuditGuild(SimpleNamespace(id=5))
+    rows = [row async for row in moderation_rows(guild, {}, audit_limit=10)]
+    assert [(r["type"], r["user_id"]) for r in rows] == [("ban", "5"), ("audit_ban", "5")]
+    assert guild.limits == [10, 10, 10]
+
+@pytest.mark.asyncio
+async def test_write_export_streams_gzip(tmp_path):
+    path = tmp_path / "out.jsonl.gz"
+    assert await write_export(_rows(1200), str(path), "jsonl") == 1200
+    with gzip.open(path, "rt") as f:
+        assert json.loads(f.readline())["reason"] == "r0"
+    path = tmp_path / "out.csv.gz"
+    await write_export(_rows(3), str(path), "csv")
+    with gzip.open(path, "rt") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["user_id"] for r in rows] == ["0", "1", "2"] and rows[0]["type"] == "warning"
+
+@pytest.mark.asyncio
+async def test_export_command_uploads_warnings_and_bans(fake):
+    guild = fake.add_guild(members=4, channels=1)
+    owner = fake.owner(guild)
+    others = [m for m in guild.members if not m.bot and m != owner]
+    await mybot.warn_user(guild, others[0], owner, "spam")
+    await guild.ban(others[1], reason="raid")
+    fake.inject_message(guild.text_channels[0], owner.id, "!export csv")
+    await asyncio.sleep(0)
+    await fake.drain()
+
+    (channel_id, filename, data), = fake.uploads
+    assert filename.endswith(".csv.gz") and channel_id == guild.text_channels[0].id
+    rows = list(csv.DictReader(gzip.decompress(data).decode().splitlines()))
+    assert {(r["type"], r["user_id"], r["reason"]) for r in rows} == {
+        ("warning", str(others[0].id), "spam"), ("ban", str(others[1].id), "raid")}
@@ -0,0 +1,80 @@
+import os
+import json
+import asyncio
+import pytest
+import mybot
+
+@pytest.mark.asyncio
+async def test_muted_role_is_created_once_and_cached_via_gateway(fake):
+    guild = fake.add_guild(channels=8)
+    role = await mybot.ensure_muted_role(guild)
+    await asyncio.sleep(0)
+    assert await mybot.ensure_muted_role(guild) == role
+    assert fake.requests["POST /guilds/{guild}/roles"] == 1
+    assert fake.requests["PUT /channels/{channel}/permissions/{id}"] == len(guild.channels)
+
+@pytest.mark.asyncio
+async def test_forced_429_is_retried(fake):
+    guild = fake.add_guild(channels=1)
+    fake.force_429("POST /channels/{channel}/messages", 2)
+    await mybot.log_action(guild, "Title", "Body")
+    log = next(c for c in guild.text_channels if c.name == "mod-log")
+    assert len(fake.channels[log.id]["messages"]) == 1
+    assert fake.ratelimited["POST /channels/{channel}/messages"] == 2
+
+@pytest.mark.asyncio
+async def test_ban_command_end_to_end(fake):
+    guild = fake.add_guild(members=3, channels=1)
+    owner = fake.owner(guild)
+    target = next(m for m in guild.members if not m.bot and m != owner)
+    fake.inject_message(guild.text_channels[0], owner.id, f"!ban <@{target.id}> spam")
+    await asyncio.sleep(0)
+    await fake.drain()
+    assert target.id in fake.guilds[guild.id]["bans"]
+    assert guild.get_member(target.id) is None
+
+@pytest.mark.asyncio
+async def test_expensive_commands_are_throttled(fake):
+    guild = fake.add_guild(members=3, channels=2)
+    owner = fake.owner(guild)
+    channel, other = guild.text_channels[:2]
+    fake.seed_messages(other, 20, author_id=owner.id)
+    for _ in range(3):
+        fake.inject_message(channel, owner.id, "!listroles")
+        await asyncio.sleep(0)
+        await fake.drain()
+    fake.inject_message(other, owner.id, "!purge 3")
+    fake.inject_message(other, owner.id, "!purge 3")  # queued behind the first, not rejected
+    await asyncio.sleep(0.05)
+    await fake.drain()
+    sent = [m for m in fake.channels[channel.id]["messages"].values() if m["author"]["id"] == str(fake.bot_user["id"])]
+    assert sum("Roles in" in str(m["embeds"]) for m in sent) == 2
+    assert sum("on cooldown" in m["content"] for m in sent) == 1
+    assert fake.requests["POST /channels/{channel}/messages/bulk-delete"] == 2
+
+@pytest.mark.asyncio
+async def test_modhelp_uses_the_guild_prefix(fake):
+    guild = fake.add_guild(members=2, channels=1)
+    owner = fake.owner(guild)
+    channel = guild.text_channels[0]
+    mybot.guild_config.set(guild.id, "prefix", "?")
+    try:
+        fake.inject_message(channel, owner.id, "?modhelp")
+        await asyncio.sleep(0)
+        await fake.drain()
+    finally:
+        mybot.guild_config.reset(guild.id)
+    help_text = str(list(fake.channels[channel.id]["messages"].values())[-1]["embeds"])
+    assert "`?kick @user" in help_text and "`!kick" not in help_text
+
+@pytest.mark.asyncio
+async def test_blacklist_changes_write_only_that_guilds_file(fake):
+    if mybot.shared_store:
+        pytest.skip("blacklists are in the shared store")
+    guild, other = fake.add_guild(members=2, channels=1), fake.add_guild(members=2, channels=1)
+    fake.inject_message(guild.text_channels[0], fake.owner(guild).id, "!blacklist add eggs")
+    await asyncio.sleep(0)
+    await fake.drain()
+    with open(os.path.join(mybot.BLACKLIST_DIR, f"{guild.id}.json"), encoding="utf-8") as f:
+        assert json.load(f) == ["eggs"]
+    assert not os.path.exists(os.path.join(mybot.BLACKLIST_DIR, f"{other.id}.json"))
@@ -0,0 +1,51 @@
+import json
+import pytest
+from guildconfig import GuildConfigStore
+
+@pytest.fixture
+def store(tmp_path):
+    return GuildConfigStore(str(tmp_path / "guild_config.json"), defaults={"prefix": "!"})
+
+def test_defaults_and_override(store):
+    assert store.value(1, "prefix") == "!"
+    store.set(1, "prefix", "?")
+    assert store.value(1, "prefix") == "?"
+    assert store.value(2, "prefix") == "!"
+
+def test_coerce_uses_default_types(store):
+    assert store.coerce("warn_threshold", "5") == 5
+    assert store.coerce("mod_role_names", "Staff, Helpers") == ["Staff", "Helpers"]
+    with pytest.raises(KeyError):
+        store.coerce("nope", "x")
+
+@pytest.mark.parametrize("raw", ["0", "-2", "three"])
+def test_coerce_rejects_counts_below_one(store, raw):
+    with pytest.raises(ValueError):
+        store.coerce("warn_threshold", raw)
+
+def test_coerce_checks_choices(tmp_path):
+    store = GuildConfigStore(str(tmp_path / "guild_config.json"), defaults={"raid_action": "alert"},
+                             choices={"raid_action": ("alert", "mute")})
+    assert store.coerce("raid_action", " Mute ") == "mute"
+    with pytest.raises(ValueError):
+        store.coerce("raid_action", "ban")
+
+def test_reset_restores_default(store):
+    store.set(1, "warn_threshold", 5)
+    store.reset(1, "warn_threshold")
+    assert store.value(1, "warn_threshold") == 3
+    assert store.overrides(1) == {}
+
+def test_reload_picks_up_external_edit(store):
+    store.set(1, "prefix", "?")
+    with open(store.path, "w", encoding="utf-8") as f:
+        json.dump({"1": {"prefix": "$"}}, f)
+    assert store.reload()
+    assert store.value(1, "prefix") == "$"
+
+def test_invalid_file_keeps_current_settings(store):
+    store.set(1, "prefix", "?")
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert not store.reload()
+    assert store.value(1, "prefix") == "?"
@@ -0,0 +1,11 @@
+from launcher import parse_shard_ids, shard_ranges
+
+def test_parse_shard_ids():
+    assert parse_shard_ids("0-3,6") == [0, 1, 2, 3, 6]
+    assert parse_shard_ids("") == []
+
+def test_shard_ranges_cover_every_shard_once():
+    ranges = shard_ranges(10, 4)
+    assert [len(r) for r in ranges] == [3, 3, 2, 2]
+    assert sum(ranges, []) == list(range(10))
+    assert shard_ranges(2, 8) == [[0], [1]]
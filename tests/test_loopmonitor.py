@@ -0,0 +1,44 @@
+import time
+import asyncio
+import logging
+from loopmonitor import LoopLagMonitor, SlowCallbackCapture, enable_slow_callback_reports
+
+def test_alert_threshold_and_cooldown():
+    seen = []
+    monitor = LoopLagMonitor(threshold=0.5, cooldown=60, observe=seen.append)
+    assert not monitor.record(0.1)
+    assert monitor.record(0.7)
+    assert not monitor.record(0.9)  # still cooling down
+    assert monitor.max_lag == 0.9
+    assert seen == [0.1, 0.7, 0.9]
+
+def test_capture_keeps_slowest():
+    capture = SlowCallbackCapture(keep=2)
+    for seconds in (0.2, 0.5, 0.1, 0.9):
+        capture.emit(logging.LogRecord("asyncio", logging.WARNING, __file__, 1, "Executing %s took %.3f seconds", ("<Handle cb>", seconds), None))
+    assert [s for s, _, _ in capture.slowest()] == [0.9, 0.5]
+
+def test_debug_loop_reports_blocking_callback():
+    loop = asyncio.new_event_loop()
+    try:
+        capture = enable_slow_callback_reports(loop, 0.01)
+        loop.call_soon(time.sleep, 0.05)
+        loop.run_until_complete(asyncio.sleep(0.01))
+        assert capture.total >= 1
+    finally:
+        logging.getLogger("asyncio").removeHandler(capture)
+        loop.close()
+
+def test_failed_alert_is_reported_and_probing_continues():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.0, cooldown=0)
+    errors = []
+
+    async def on_alert(lag):
+        raise RuntimeError("mod-log gone")
+
+    async def main():
+        task = asyncio.ensure_future(monitor.run(on_alert, lambda: len(errors) >= 2, on_error=errors.append))
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(main())
+    assert [str(e) for e in errors] == ["mod-log gone", "mod-log gone"]
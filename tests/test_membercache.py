@@ -0,0 +1,52 @@
+import pytest
+import discord
+from fakes import GuildMock, MemberMock
+from membercache import MemberLRU, cache_options
+
+def test_lru_is_bounded_and_keeps_recent_members():
+    guild = GuildMock()
+    lru = MemberLRU(maxsize=2)
+    a, b, c = (MemberMock(guild) for _ in range(3))
+    lru.touch(a)
+    lru.touch(b)
+    assert lru.get(guild, a.id) is a  # refreshes a
+    lru.touch(c)
+    assert len(lru) == 2
+    assert lru.get(guild, b.id) is None
+    assert {m.id for m in lru.recent(guild)} == {a.id, c.id}
+
+@pytest.mark.asyncio
+async def test_resolve_falls_back_to_fetch_member():
+    guild = GuildMock()
+    known = guild.add_member(MemberMock(guild))
+    guild.get_member = lambda user_id: None  # like a guild that was never chunked: only fetch_member finds them
+    lru = MemberLRU()
+    assert await lru.resolve(guild, known.id) is known
+    assert await lru.resolve(guild, known.id) is known
+    assert guild.requests["guild.fetch_member"] == 1
+    assert await lru.resolve(guild, 12345) is None
+    assert (lru.hits, lru.misses) == (1, 2)
+
+def test_cache_options():
+    assert cache_options("full") == {}
+    lean = cache_options("lean")
+    assert lean["chunk_guilds_at_startup"] is False and not lean["member_cache_flags"].joined
+    with pytest.raises(ValueError):
+        cache_options("tiny")
+
+def test_role_counts_scan_the_lru_once(monkeypatch):
+    import mybot
+    guild = GuildMock()
+    mods, vips = guild.add_role("Mods"), guild.add_role("VIP")
+    lru = MemberLRU()
+    for roles in ([mods], [mods, vips], []):
+        lru.touch(MemberMock(guild, roles=roles))
+    scans = []
+    recent = lru.recent
+    monkeypatch.setattr(lru, "recent", lambda g: scans.append(g) or recent(g))
+    monkeypatch.setattr(mybot, "members", lru)
+    monkeypatch.setattr(mybot, "MEMBER_CACHE", "lean")
+    counts = mybot.recent_role_counts(guild)
+    assert [mybot.role_member_count(guild, r, counts) for r in (mods, vips)] == ["2 of 3 active", "1 of 3 active"]
+    assert len(scans) == 1
+    assert mybot.role_member_count(guild, vips) == "1 of 3 active"
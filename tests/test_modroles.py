@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+from guildconfig import GuildConfigStore
+from modroles import ModRoleCache
+
+def make_guild(*roles):
+    by_id = {r.id: r for r in roles}
+    return SimpleNamespace(id=1, roles=list(roles), get_role=by_id.get)
+
+def make_member(guild, *roles, manage_guild=False):
+    return SimpleNamespace(guild=guild, roles=list(roles), guild_permissions=SimpleNamespace(manage_guild=manage_guild))
+
+def test_name_and_id_matching(tmp_path):
+    config = GuildConfigStore(str(tmp_path / "cfg.json"))
+    staff = SimpleNamespace(id=10, name="Staff", position=5)
+    mod = SimpleNamespace(id=11, name="Mod", position=3)
+    member_role = SimpleNamespace(id=12, name="Member", position=1)
+    guild = make_guild(staff, mod, member_role)
+    cache = ModRoleCache(config)
+    assert cache.role_ids(guild) == {11}
+
+    config.set(1, "mod_role_ids", [10])
+    cache.invalidate(1)
+    assert cache.role_ids(guild) == {10, 11}
+    assert cache.mention_role(guild) is staff
+    assert cache.is_moderator(make_member(guild, member_role, staff))
+    assert not cache.is_moderator(make_member(guild, member_role))
+    assert cache.is_moderator(make_member(guild, manage_guild=True))
@@ -1,54 +1,44 @@
 import pytest
-from discord.ext import commands
-from src.mybot import bot, warn_user, ensure_muted_role, log_action
+from fakes import MemberMock, build_guild
+from mybot import warn_user, ensure_muted_role, log_action, warnings_db
 
 @pytest.fixture
 def guild_mock():
-    class GuildMock:
-        id = 123456
-        name = "Test Guild"
-        def __init__(self):
-            self.roles = []
-            self.text_channels = []
-    
-    return GuildMock()
+    return build_guild(members=0, channels=("general",), log_channel=None, mod_role=None)
 
 @pytest.fixture
 def member_mock(guild_mock):
-    class MemberMock:
-        id = 78910
-        display_name = "Test User"
-        guild = guild_mock
-        roles = []
-
-        async def add_roles(self, role):
-            self.roles.append(role)
-
-        async def remove_roles(self, role):
-            self.roles.remove(role)
-
-    return MemberMock()
+    return guild_mock.add_member(MemberMock(guild_mock, "Test User"))
 
 @pytest.fixture
 def log_channel_mock(guild_mock):
-    class LogChannelMock:
-        async def send(self, embed):
-            pass
-
-    guild_mock.text_channels.append(LogChannelMock())
-    return guild_mock.text_channels[0]
+    return guild_mock.add_channel("mod-log")
 
 @pytest.mark.asyncio
 async def test_warn_user(guild_mock, member_mock, log_channel_mock):
     await warn_user(guild_mock, member_mock, None, "Test warning")
-    # Add assertions to verify the warning was logged correctly
+    warnings = warnings_db.user(guild_mock.id, member_mock.id)
+    assert [(w["by_name"], w["reason"]) for w in warnings] == [("Auto", "Test warning")]
+    [sent] = log_channel_mock.sent
+    assert sent.embed.title == "Warn Issued"
+    assert member_mock.mention in sent.embed.description
 
 @pytest.mark.asyncio
 async def test_ensure_muted_role(guild_mock):
     role = await ensure_muted_role(guild_mock)
     assert role is not None
     assert role.name == "Muted"
+    assert await ensure_muted_role(guild_mock) is role
+    assert guild_mock.requests["guild.create_role"] == 1
 
 @pytest.mark.asyncio
 async def test_log_action(guild_mock, log_channel_mock):
     await log_action(guild_mock, "Test Title", "Test Description")
+    [sent] = log_channel_mock.sent
+    assert (sent.embed.title, sent.embed.description) == ("Test Title", "Test Description")
+
+@pytest.mark.asyncio
+async def test_log_action_creates_missing_log_channel(guild_mock):
+    await log_action(guild_mock, "Test Title", "Test Description")
+    assert [c.name for c in guild_mock.text_channels] == ["general", "mod-log"]
+    assert len(guild_mock.text_channels[-1].sent) == 1
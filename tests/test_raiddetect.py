@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+import mybot
+from raiddetect import RaidDetector
+
+NEW = datetime.now(timezone.utc)
+OLD = NEW - timedelta(days=365)
+
+def test_young_accounts_trip_the_detector_and_flag_the_window():
+    raids = RaidDetector(window=10, max_joins=100, max_young=3, cooldown=60)
+    assert raids.observe(1, 1, NEW, now=0).flagged == ()
+    assert raids.observe(1, 2, OLD, now=1).flagged == ()
+    check = raids.observe(1, 3, NEW, now=2)
+    assert not check.started
+    check = raids.observe(1, 4, NEW, now=3)
+    assert check.started and check.flagged == (1, 3, 4) and (check.joins, check.young) == (4, 3)
+    assert raids.observe(1, 5, NEW, now=20).flagged == (5,)  # still in raid mode, not started again
+    assert raids.observe(1, 6, OLD, now=21).flagged == ()
+    assert raids.observe(2, 7, NEW, now=21).flagged == ()  # other guilds are unaffected
+    assert not raids.active(1, now=100)
+
+def test_join_rate_window_slides_and_memory_is_bounded():
+    raids = RaidDetector(window=1, max_joins=5, max_young=100, max_tracked=4, max_guilds=2)
+    for i in range(20):
+        assert not raids.observe(1, i, OLD, now=i).started  # one join a second never builds up
+    assert not raids.observe(1, 100, OLD, now=30).started
+    assert len(raids._guilds[1].joins) <= 4
+    raids.observe(2, 1, OLD, now=31)
+    raids.observe(3, 1, OLD, now=31)
+    assert len(raids) == 2 and 1 not in raids._guilds
+
+@pytest.mark.asyncio
+async def test_raid_mutes_flagged_joins_and_logs_once(fake, monkeypatch):
+    guild = fake.add_guild(members=2, channels=1)
+    monkeypatch.setattr(mybot, "raids", RaidDetector(max_joins=100, max_young=3))
+    mybot.guild_config.set(guild.id, "raid_action", "mute")
+    try:
+        fake.add_member(guild, created_at=OLD)
+        young = [fake.add_member(guild, created_at=NEW) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        await fake.drain()
+    finally:
+        mybot.guild_config.reset(guild.id)
+    [muted] = [r for r in guild.roles if r.name == "Muted"]  # created once, though several joins needed it at once
+    assert all(muted in guild.get_member(uid).roles for uid in young)
+    log = next(c for c in guild.text_channels if c.name == "mod-log")
+    summaries = [m for m in fake.channels[log.id]["messages"].values() if "Possible raid" in str(m.get("embeds"))]
+    assert len(summaries) == 1
+    welcomes = [m for c in fake.channels.values() for m in c["messages"].values() if "Everyone welcome" in (m.get("content") or "")]
+    assert len(welcomes) == 3  # the old account and the two young ones that joined before the raid was spotted
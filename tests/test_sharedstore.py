@@ -0,0 +1,87 @@
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from sharedstore import SharedStore
+
+def _entry(reason="spam"):
+    return {"by": None, "by_name": "Auto", "reason": reason, "time": "2024-01-01T00:00:00"}
+
+def test_warnings_and_blacklist_persist(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"), origin="a")
+    assert store.warnings.add(1, 10, _entry()) == 1
+    assert store.warnings.add(1, 10, _entry()) == 2
+    assert store.blacklist_add(1, "Spam")
+    assert not store.blacklist_add(1, "spam")
+
+    other = SharedStore(str(tmp_path / "state.db"), origin="b")
+    assert len(other.warnings.user(1, 10)) == 2
+    assert other.blacklist(1) == ["Spam"]
+    assert other.warnings.clear_user(1, 10)
+    assert not other.warnings.clear_user(1, 10)
+
+def test_blacklist_exemptions(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"), origin="a")
+    store.blacklist_add(1, "Spam")
+    store.blacklist_exempt(1, "spam")
+    assert store.blacklist(1) == [] and store.blacklist_exemptions(1) == ["spam"]
+    store.blacklist_exempt(1, "SPAM", exempt=False)
+    assert store.blacklist_exemptions(1) == []
+    assert not store.blacklist_remove(1, "spam")
+
+def test_other_processes_writes_invalidate_cache(tmp_path):
+    a = SharedStore(str(tmp_path / "state.db"), origin="a")
+    b = SharedStore(str(tmp_path / "state.db"), origin="b")
+    assert a.blacklist(1) == [] and a.warnings.user(1, 10) == []
+    b.blacklist_add(1, "spam")
+    b.warnings.add(1, 10, _entry())
+    assert a.blacklist(1) == ["spam"]  # not cached here: the caller's LayeredBlocklist is
+    assert a.warnings.user(1, 10) == []  # still cached
+    assert sorted(a.poll_changes()) == [(1, "blacklist"), (1, "warnings")]
+    assert len(a.warnings.user(1, 10)) == 1
+    assert b.poll_changes() == []  # its own writes
+
+def test_due_unmutes_only_for_owned_guilds(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"))
+    store.schedule_unmute(1, 10, 100, 1000, 5)
+    store.schedule_unmute(2, 20, 200, None, 5)
+    later = time.time() + 301
+    assert store.due_unmutes([1], now=time.time()) == []
+    assert store.due_unmutes([1], now=later) == [(1, 10, 100, 1000, 5)]
+    assert store.cancel_unmute(1, 10)
+    assert not store.cancel_unmute(1, 10)
+
+def test_import_legacy_runs_once(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"))
+    assert store.import_legacy({"1": ["spam"]}, {"1": {"10": [_entry()]}})
+    assert not store.import_legacy({"1": ["eggs"]}, {})
+    assert store.blacklist(1) == ["spam"] and len(store.warnings.user(1, 10)) == 1
+
+def test_import_legacy_skips_template_placeholders(tmp_path):
+    data = Path(__file__).parent.parent / "data"
+    blacklists = json.loads((data / "blacklist.json.template").read_text())
+    warnings = json.loads((data / "warnings.json.template").read_text())
+    store = SharedStore(str(tmp_path / "state.db"))
+    assert store.import_legacy(dict(blacklists, **{"5": ["spam"]}), warnings)
+    assert store.blacklist(5) == ["spam"]
+    assert store.db.execute("SELECT COUNT(*) FROM warnings").fetchone()[0] == 0
+
+def test_writer_waits_out_another_process_lock(tmp_path):
+    a = SharedStore(str(tmp_path / "state.db"), origin="a", busy_timeout=0.05)
+    b = SharedStore(str(tmp_path / "state.db"), origin="b")
+    b.db.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, b.db.execute, ("COMMIT",)).start()
+    assert a.blacklist_add(1, "spam")  # several busy timeouts, retried
+    assert a.blacklist_delta(1) == (["spam"], [])
+
+def test_run_uses_the_store_thread(tmp_path):
+    store = SharedStore(str(tmp_path / "state.db"))
+
+    def add_and_name(word):
+        store.blacklist_add(1, word)
+        return threading.current_thread().name
+
+    assert asyncio.run(store.run(add_and_name, "spam")).startswith("shared-store")
+    assert asyncio.run(store.warnings.run(store.warnings.add, 1, 10, _entry())) == 1
+    store.close()
@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from traffic import TrafficRecorder, read_traffic, sanitize_content
+from replay_traffic import replay
+
+def test_sanitize_keeps_commands_blacklist_hits_and_mentions():
+    out = sanitize_content("!warn <@123> said badword twice", keep=["badword"], prefix="!", pseudonym=lambda i: i + 1)
+    assert out == "!warn <@124> xxxx badword xxxxx"
+
+def test_sanitize_with_a_matcher():
+    out = sanitize_content("say BadWord now", keep=lambda word: "badword" in word)
+    assert out == "xxx BadWord xxx"
+
+def _guild(gid=1):
+    return SimpleNamespace(id=gid, member_count=10, text_channels=[object(), object()])
+
+def test_recording_round_trip(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    rec = TrafficRecorder(str(path))
+    guild = _guild()
+    author = SimpleNamespace(id=123456789012345678, bot=False)
+    rec.message(SimpleNamespace(guild=guild, channel=SimpleNamespace(id=7), author=author, content="hello there"), blacklist=["spam"])
+    rec.join(SimpleNamespace(guild=guild, id=43, bot=False, created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+    rec.role(SimpleNamespace(guild=guild, id=9), "create", is_mod=True)
+    rec.close()
+
+    events = list(read_traffic(str(path)))
+    assert [e["e"] for e in events] == ["guild", "message", "join", "role"]
+    assert events[0]["blacklist"] == ["spam"] and events[0]["channels"] == 2
+    assert events[1]["text"] == "xxxxx xxxxx"
+    assert events[1]["u"] == rec.pseudonym(author.id)
+    assert 1.9 < events[2]["age"] < 2.1
+    assert str(author.id) not in path.read_text()
+
+def test_global_blacklist_is_written_once_and_guild_words_read_once(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    rec = TrafficRecorder(str(path), global_blacklist=["spam", "scam"])
+    reads = []
+    author = SimpleNamespace(id=5, bot=False)
+    for gid in (1, 1, 2):
+        rec.message(SimpleNamespace(guild=_guild(gid), channel=SimpleNamespace(id=7), author=author, content="spammy text"),
+                    blacklist=lambda: reads.append(1) or ["local"], exempt=lambda: ["scam"],
+                    blocked=lambda word: "spam" in word)
+    rec.close()
+    events = list(read_traffic(str(path)))
+    assert events[0] == {"e": "blocklist", "words": ["spam", "scam"], "t": events[0]["t"]}
+    guilds = [e for e in events if e["e"] == "guild"]
+    assert [(g["blacklist"], g["exempt"]) for g in guilds] == [(["local"], ["scam"])] * 2
+    assert len(reads) == 2
+    assert all(e["text"] == "spammy xxxx" for e in events if e["e"] == "message")
+
+@pytest.mark.asyncio
+async def test_replay_drives_handlers_and_rest(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text("\n".join([
+        '{"e":"header","v":1,"t":0}',
+        '{"e":"guild","g":5,"members":4,"channels":2,"blacklist":["badword"],"prefix":"!","t":0}',
+        '{"e":"message","g":5,"c":1,"u":2,"bot":false,"mod":false,"text":"xxx badword","t":0.01}',
+        '{"e":"join","g":5,"u":3,"bot":false,"age":0.5,"t":0.02}',
+        '{"e":"role","op":"create","g":5,"r":8,"mod":true,"t":0.03}',
+    ]) + "\n")
+    summary = await replay(str(path), speed=0)
+    assert summary["events"] == {"message": 1, "join": 1, "role": 1}
+    assert summary["handlers"]["on_message"]["count"] >= 1
+    assert summary["handlers"]["on_member_join"]["count"] == 1
+    assert summary["requests"].get("DELETE /channels/{channel}/messages/{id}") == 1
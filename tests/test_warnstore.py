@@ -0,0 +1,102 @@
+import json
+import asyncio
+import threading
+from pathlib import Path
+from warnstore import WarningStore
+
+def _entry(reason="spam"):
+    return {"by": None, "by_name": "Auto", "reason": reason, "time": "2024-01-01T00:00:00"}
+
+def test_guilds_load_lazily_and_persist_per_shard(tmp_path):
+    store = WarningStore(str(tmp_path / "warnings"))
+    assert store.add(1, 10, _entry()) == 1
+    assert store.add(1, 10, _entry()) == 2
+    store.add(2, 20, _entry())
+    assert sorted(p.name for p in (tmp_path / "warnings").iterdir()) == ["1.journal", "2.journal"]
+
+    fresh = WarningStore(str(tmp_path / "warnings"))
+    assert fresh.loaded() == {}
+    assert len(fresh.user(1, 10)) == 2
+    assert list(fresh.loaded()) == ["1"]
+
+def test_clear_user(tmp_path):
+    store = WarningStore(str(tmp_path))
+    assert not store.clear_user(1, 10)
+    store.add(1, 10, _entry())
+    assert store.clear_user(1, 10)
+    assert WarningStore(str(tmp_path)).user(1, 10) == []
+
+def test_corrupt_shard_only_resets_its_guild(tmp_path):
+    store = WarningStore(str(tmp_path))
+    store.add(1, 10, _entry())
+    store.add(2, 20, _entry())
+    store.compact(2)
+    (tmp_path / "2.json").write_text("{not json")
+    fresh = WarningStore(str(tmp_path))
+    assert fresh.guild(2) == {}
+    assert (tmp_path / "2.json.bak").exists()
+    assert len(fresh.user(1, 10)) == 1
+
+def test_legacy_file_is_split_into_shards(tmp_path):
+    legacy = tmp_path / "warnings.json"
+    legacy.write_text(json.dumps({"1": {"10": [_entry()]}, "2": {}}))
+    store = WarningStore(str(tmp_path / "warnings"), legacy_path=str(legacy))
+    assert not legacy.exists() and (tmp_path / "warnings.json.migrated").exists()
+    assert len(store.user(1, 10)) == 1
+    assert not (tmp_path / "warnings" / "2.json").exists()
+
+def test_template_file_migrates_without_error(tmp_path):
+    legacy = tmp_path / "warnings.json"
+    legacy.write_text((Path(__file__).parent.parent / "data" / "warnings.json.template").read_text())
+    store = WarningStore(str(tmp_path / "warnings"), legacy_path=str(legacy))
+    assert store.guild_ids() == [] and (tmp_path / "warnings.json.migrated").exists()
+
+def test_journal_replay_and_compaction(tmp_path):
+    store = WarningStore(str(tmp_path), compact_every=3)
+    store.add(1, 10, _entry("a"))
+    store.add(1, 10, _entry("b"))
+    assert not (tmp_path / "1.json").exists()
+    store.clear_user(1, 10)  # third change: compacts
+    store.add(1, 11, _entry("c"))
+    assert json.loads((tmp_path / "1.json").read_text()) == {"seq": 3, "users": {}}
+    assert len((tmp_path / "1.journal").read_text().splitlines()) == 1
+    assert WarningStore(str(tmp_path)).guild(1) == {"11": [_entry("c")]}
+
+def test_crash_between_snapshot_and_truncate_does_not_double_apply(tmp_path):
+    store = WarningStore(str(tmp_path))
+    store.add(1, 10, _entry())
+    store.add(1, 10, _entry())
+    journal = (tmp_path / "1.journal").read_text()
+    store.compact(1)
+    (tmp_path / "1.journal").write_text(journal)  # as if truncation never happened
+    assert len(WarningStore(str(tmp_path)).user(1, 10)) == 2
+
+def test_torn_journal_line_is_dropped(tmp_path):
+    store = WarningStore(str(tmp_path))
+    store.add(1, 10, _entry())
+    store.close()
+    with open(tmp_path / "1.journal", "a") as f:
+        f.write('{"seq":2,"op":"add","u":"10","w":{"rea')
+    fresh = WarningStore(str(tmp_path))
+    assert len(fresh.user(1, 10)) == 1
+    assert fresh.add(1, 10, _entry()) == 2
+    assert len(WarningStore(str(tmp_path)).user(1, 10)) == 2
+
+def test_open_journals_are_capped(tmp_path):
+    store = WarningStore(str(tmp_path), max_open=2)
+    for gid in (1, 2, 3, 1):
+        store.add(gid, 10, _entry())
+    assert list(store._journals) == ["3", "1"]
+    fresh = WarningStore(str(tmp_path))
+    assert [len(fresh.user(g, 10)) for g in (1, 2, 3)] == [2, 1, 1]
+
+def test_run_uses_the_store_thread(tmp_path):
+    store = WarningStore(str(tmp_path))
+
+    def add_and_name():
+        store.add(1, 10, _entry())
+        return threading.current_thread().name
+
+    assert asyncio.run(store.run(add_and_name)).startswith("warnstore")
+    store.close()
+    assert len(WarningStore(str(tmp_path)).user(1, 10)) == 1